@@ -0,0 +1,109 @@
+# config.py
+import os
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _env_flag(name, default=False):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+class Config:
+    """Base configuration; every value can be overridden through the environment"""
+    SECRET_KEY = os.environ.get('SECRET_KEY', 'your-secret-key-here-for-development')
+
+    # Database binding (resolved when create_app() runs, never at import time)
+    DATABASE_PROVIDER = os.environ.get('DATABASE_PROVIDER', 'sqlite')
+    DATABASE_PATH = os.environ.get('DATABASE_PATH', os.path.join(BASE_DIR, 'data', 'app_database.sqlite'))
+    DATABASE_BUSY_TIMEOUT = float(os.environ.get('DATABASE_BUSY_TIMEOUT', '5'))  # seconds waiting for a lock
+    # SQLite PRAGMA profile: durable, balanced, bulk-load (see model.database.STORAGE_PROFILES)
+    DATABASE_PROFILE = os.environ.get('DATABASE_PROFILE', 'balanced')
+
+    # Opt-in side effects
+    SEED_DEMO_DATA = _env_flag('SEED_DEMO_DATA')
+    START_SCHEDULER = _env_flag('START_SCHEDULER')
+
+    # Werkzeug hashing method for new passwords (None = werkzeug default cost)
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD') or None
+
+    # Password hashing worker pool (0 workers = hash inline) and login concurrency caps
+    PASSWORD_POOL_WORKERS = int(os.environ.get('PASSWORD_POOL_WORKERS', '2'))
+    PASSWORD_POOL_MAX_PENDING = int(os.environ.get('PASSWORD_POOL_MAX_PENDING', '16'))
+    LOGIN_MAX_CONCURRENT_PER_ACCOUNT = int(os.environ.get('LOGIN_MAX_CONCURRENT_PER_ACCOUNT', '2'))
+    LOGIN_MAX_CONCURRENT_PER_IP = int(os.environ.get('LOGIN_MAX_CONCURRENT_PER_IP', '4'))
+
+    # Single-writer queue with group commit (disabled = write inline, e.g. ':memory:' databases)
+    WRITE_QUEUE_ENABLED = _env_flag('WRITE_QUEUE_ENABLED', True)
+    WRITE_QUEUE_MAX_PENDING = int(os.environ.get('WRITE_QUEUE_MAX_PENDING', '64'))
+    WRITE_BATCH_MAX = int(os.environ.get('WRITE_BATCH_MAX', '32'))
+    WRITE_BATCH_WINDOW_MS = float(os.environ.get('WRITE_BATCH_WINDOW_MS', '2'))
+    WRITE_BUSY_RETRIES = int(os.environ.get('WRITE_BUSY_RETRIES', '5'))
+    WRITE_TIMEOUT = float(os.environ.get('WRITE_TIMEOUT', '10'))
+    WRITE_RETRY_AFTER = int(os.environ.get('WRITE_RETRY_AFTER', '1'))  # seconds, sent with 429/503
+    INGEST_MAX_ITEMS = int(os.environ.get('INGEST_MAX_ITEMS', '20000'))
+
+    # Read-only connections for dashboard reads (disabled = read on the request thread's connection)
+    READ_POOL_ENABLED = _env_flag('READ_POOL_ENABLED', True)
+    READ_POOL_SIZE = int(os.environ.get('READ_POOL_SIZE', '4'))
+    READ_POOL_TIMEOUT = float(os.environ.get('READ_POOL_TIMEOUT', '2'))  # then read on the primary connection
+
+    # In-process cache of per-patient reads, keyed by the patient's data version
+    READ_CACHE_ENABLED = _env_flag('READ_CACHE_ENABLED', True)
+    READ_CACHE_SIZE = int(os.environ.get('READ_CACHE_SIZE', '1024'))
+    READ_CACHE_TTL = float(os.environ.get('READ_CACHE_TTL', '300'))  # seconds
+    # 'local' (per process), 'sqlite' (READ_CACHE_URL = file shared by the workers) or 'redis' (redis:// URL)
+    READ_CACHE_BACKEND = os.environ.get('READ_CACHE_BACKEND', 'local')
+    READ_CACHE_URL = os.environ.get('READ_CACHE_URL', '')
+    # Seconds between two polls for other processes' writes (PRAGMA data_version + DataChange log), 0 = off
+    CACHE_WATCH_INTERVAL = float(os.environ.get('CACHE_WATCH_INTERVAL', '1'))
+    DATA_CHANGE_RETENTION = int(os.environ.get('DATA_CHANGE_RETENTION', '3600'))  # seconds
+
+    # Alert retention: read alerts older than this move to AlertArchive (scheduler, in batches)
+    ALERT_RETENTION_DAYS = int(os.environ.get('ALERT_RETENTION_DAYS', '30'))
+    ALERT_ARCHIVE_BATCH_SIZE = int(os.environ.get('ALERT_ARCHIVE_BATCH_SIZE', '500'))
+    ALERT_VACUUM_MAX_PAGES = int(os.environ.get('ALERT_VACUUM_MAX_PAGES', '0'))  # 0 = all free pages
+
+    # Slow-query log threshold in milliseconds
+    SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', '100'))
+
+
+class DevelopmentConfig(Config):
+    """Local development: demo data and the compliance scheduler are enabled"""
+    SEED_DEMO_DATA = _env_flag('SEED_DEMO_DATA', True)
+    START_SCHEDULER = _env_flag('START_SCHEDULER', True)
+
+
+class ProductionConfig(Config):
+    """Pre-forked server (wsgi.py): workers never run the scheduler, gunicorn starts it once"""
+    SEED_DEMO_DATA = _env_flag('SEED_DEMO_DATA')
+    START_SCHEDULER = False
+
+
+class TestingConfig(Config):
+    """Isolated in-memory database, no background threads, cheap password hashing"""
+    DATABASE_PATH = ':memory:'
+    SEED_DEMO_DATA = False
+    START_SCHEDULER = False
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+    PASSWORD_POOL_WORKERS = 0
+    WRITE_QUEUE_ENABLED = False
+    READ_POOL_ENABLED = False
+
+
+def load_config(config=None):
+    """Return a plain dict of settings from a config class/object, a dict, or None (defaults)"""
+    if config is None:
+        config = Config
+    if isinstance(config, dict):
+        settings = load_config(Config)
+        settings.update(config)
+        return settings
+    return {key: getattr(config, key) for key in dir(config) if key.isupper()}
+
+'''
+    Questo file (config.py) contiene la configurazione dell'applicazione.
+    Definisce database, dati demo, scheduler e soglie, sovrascrivibili da variabili d'ambiente.
+'''
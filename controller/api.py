@@ -0,0 +1,119 @@
+# controller/api.py
+import json
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from flask import Blueprint, current_app, jsonify, request
+from flask_login import current_user
+from pony.orm import db_session
+
+from model import validate_user, get_patient_by_user_id, PasswordPoolBusy
+from model.ingest import ingest_device_batch
+from model.idempotency import (
+    run_idempotent, get_idempotent_response, request_fingerprint, IdempotencyKeyReused, MAX_KEY_LENGTH
+)
+from model.writer import run_write, WriteQueueFull, WriteStillRunning
+
+api = Blueprint('api', __name__, url_prefix='/api/v1')
+
+_BATCH_FIELDS = ('glucose_readings', 'medication_intakes', 'symptoms')
+
+
+def _error(status_code, message, retry_after=None):
+    response = jsonify({'error': message})
+    response.status_code = status_code
+    if retry_after is not None:
+        response.headers['Retry-After'] = str(retry_after)
+    return response
+
+
+@db_session
+def _authenticated_patient():
+    """(user_id, patient_id) from the session cookie or HTTP Basic credentials, else None"""
+    user = None
+    if current_user.is_authenticated:
+        user = current_user
+    elif request.authorization and request.authorization.username:
+        user = validate_user(request.authorization.username, request.authorization.password or '',
+                             client_ip=request.remote_addr)
+    if not user or user.role != 'patient':
+        return None
+    patient = get_patient_by_user_id(user.id)
+    return (user.id, patient.id) if patient else None
+
+
+def _ingest_job(user_id, patient_id, key, request_hash, payload):
+    """Runs on the writer thread, inside the grouped transaction"""
+    def ingest():
+        return 201, ingest_device_batch(patient_id, payload)
+    try:
+        return run_idempotent(user_id, key, request_hash, ingest)
+    except IdempotencyKeyReused as e:
+        return 422, {'error': str(e)}, False
+
+
+@api.route('/ingest', methods=['POST'])
+def ingest():
+    """Batch submission from meters and phone apps: glucose readings, intakes and symptoms"""
+    settings = current_app.config
+    try:
+        identity = _authenticated_patient()
+    except PasswordPoolBusy:
+        return _error(429, 'Too many login attempts, retry later', settings['WRITE_RETRY_AFTER'])
+    if identity is None:
+        response = _error(401, 'Patient credentials required')
+        response.headers['WWW-Authenticate'] = 'Basic realm="ingest"'
+        return response
+    user_id, patient_id = identity
+
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or not any(field in payload for field in _BATCH_FIELDS):
+        return _error(400, f"Expected a JSON object with {', '.join(_BATCH_FIELDS)}")
+    if any(not isinstance(payload.get(field, []), list) for field in _BATCH_FIELDS):
+        return _error(400, 'Batch fields must be lists')
+    if sum(len(payload.get(field, [])) for field in _BATCH_FIELDS) > settings['INGEST_MAX_ITEMS']:
+        return _error(413, f"At most {settings['INGEST_MAX_ITEMS']} items per request")
+
+    key = request.headers.get('Idempotency-Key', '').strip() or None
+    if key and len(key) > MAX_KEY_LENGTH:
+        return _error(400, f"Idempotency-Key longer than {MAX_KEY_LENGTH} characters")
+    request_hash = request_fingerprint(request.get_data())
+
+    # A retry of a committed request is answered without queueing anything
+    replay = None
+    if key:
+        try:
+            replay = get_idempotent_response(user_id, key, request_hash)
+        except IdempotencyKeyReused as e:
+            return _error(422, str(e))
+    if replay is not None:
+        (status_code, body), replayed = replay, True
+    else:
+        try:
+            status_code, body, replayed = run_write(_ingest_job, user_id, patient_id, key, request_hash, payload)
+        except WriteQueueFull:
+            return _error(429, 'Write queue is full, retry later', settings['WRITE_RETRY_AFTER'])
+        except FutureTimeout:
+            # Cancelled while still queued: nothing was written, a retry is safe
+            return _error(503, 'Write is taking too long, retry later', settings['WRITE_RETRY_AFTER'])
+        except WriteStillRunning:
+            # Started and may still commit: accepted, and not to be resent (a keyed retry is replayed)
+            return _error(202, 'Batch accepted and still being saved, do not resend it')
+        except Exception as e:
+            print(f"Error ingesting device batch: {e}")
+            return _error(500, 'Failed to store the batch')
+
+    response = current_app.response_class(json.dumps(body), status=status_code, mimetype='application/json')
+    if replayed:
+        response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def register_api(server):
+    """Mount the JSON API on the Flask server behind the Dash app"""
+    server.register_blueprint(api)
+
+'''
+    Questo file (api.py) espone l'API JSON per l'invio in blocco dei dati da glucometri e app:
+    autenticazione con sessione o HTTP Basic, chiavi di idempotenza per i tentativi ripetuti,
+    scritture raggruppate dal thread di scrittura e risposta 429 con Retry-After a coda piena.
+'''
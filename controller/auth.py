@@ -2,10 +2,11 @@
 import dash
 from dash.dependencies import Input, Output, State
 import dash_bootstrap_components as dbc
+from flask import request
 from flask_login import login_user, logout_user, current_user
 from pony.orm import db_session
 
-from model import validate_user, add_user, get_user_by_username
+from model import validate_user, add_user, get_user_by_username, PasswordPoolBusy
 
 def register_auth_callbacks(app):
     """Register authentication-related callbacks"""
@@ -24,7 +25,11 @@ def register_auth_callbacks(app):
         if not n_clicks or not username or not password:
             return '', dash.no_update
         
-        user = validate_user(username, password)
+        try:
+            user = validate_user(username, password, client_ip=request.remote_addr)
+        except PasswordPoolBusy:
+            return dbc.Alert('Too many login attempts right now, please try again in a moment', color='warning'), dash.no_update
+
         if user:
             login_user(user)
             # Redirect based on user role
@@ -61,7 +66,12 @@ def register_auth_callbacks(app):
             role = 'patient'
         
         # Try to add the user with the specified role
-        if add_user(username, password, role):
+        try:
+            created = add_user(username, password, role)
+        except PasswordPoolBusy:
+            return dbc.Alert('The server is busy, please try again in a moment', color='warning'), dash.no_update
+
+        if created:
             return dbc.Alert('Registration successful! Please log in.', color='success'), '/login'
         else:
             return dbc.Alert('Username already exists', color='danger'), dash.no_update
@@ -2,18 +2,22 @@
 import dash
 from dash.dependencies import Input, Output, State
 import dash_bootstrap_components as dbc
-from dash import html, dash_table
+from dash import html, dash_table, Patch
+from dash.exceptions import PreventUpdate
 import plotly.graph_objs as go
 from flask_login import current_user
-from pony.orm import db_session, select
+from pony.orm import select
 from datetime import datetime, timedelta
 
 from model import (
     get_doctor_by_user_id, Patient, Doctor, add_therapy, 
-    get_patient_glucose_readings, get_unread_alerts,
+    get_doctor_alert_counts, get_alert_inbox, acknowledge_alerts,
     get_patient_active_therapies, update_patient_info,
-    get_therapy_compliance_status
+    get_patient_summaries, get_patient_detail, get_glucose_chart
 )
+from model.patient_detail import CHART_RANGES
+from model.reads import read_session
+from controller.writes import queued_write
 from view.doctor_dashboard import (
     get_patient_list_tab, get_patient_details_tab, 
     get_prescribe_therapy_tab, get_alerts_monitoring_tab,
@@ -47,7 +51,7 @@ def register_doctor_callbacks(app):
          Output('compliance-issues-count', 'children')],
         Input('url', 'pathname')
     )
-    @db_session
+    @read_session()
     def update_doctor_stats(pathname):
         if not current_user.is_authenticated or current_user.role != 'doctor':
             return "--", "--", "--", "--"
@@ -56,35 +60,22 @@ def register_doctor_callbacks(app):
         if not doctor:
             return "--", "--", "--", "--"
         
-        # Total patients count
-        patients_count = len(doctor.patients)
+        # Counts in SQL: no patient, therapy or alert rows are loaded
+        patients_count = doctor.patients.count()
+        total_therapies = doctor.prescribed_therapies.count()
         
-        # High priority alerts
-        high_priority_alerts = get_unread_alerts(doctor_id=doctor.id)
-        high_priority_count = len([a for a in high_priority_alerts if a.severity == 'high'])
+        # High priority alerts and patients with compliance alerts, in one grouped query
+        alert_counts = get_doctor_alert_counts(doctor.id)
         
-        # Total active therapies prescribed by this doctor
-        total_therapies = len(doctor.prescribed_therapies)
-        
-        # Compliance issues - count patients with medication compliance alerts
-        compliance_issues = 0
-        for patient in doctor.patients:
-            patient_alerts = get_unread_alerts(patient_id=patient.id)
-            has_compliance_issue = any(
-                alert.alert_type in ['medication_compliance', 'patient_non_compliance', 'medication_reminder']
-                for alert in patient_alerts
-            )
-            if has_compliance_issue:
-                compliance_issues += 1
-        
-        return str(patients_count), str(high_priority_count), str(total_therapies), str(compliance_issues)
+        return (str(patients_count), str(alert_counts['high_priority']), str(total_therapies),
+                str(alert_counts['compliance_patients']))
     
     # Patients table
     @app.callback(
         Output('patients-table', 'children'),
         Input('doctor-tabs', 'active_tab')
     )
-    @db_session
+    @read_session()
     def update_patients_table(active_tab):
         if active_tab != "patient-list":
             return ""
@@ -101,23 +92,21 @@ def register_doctor_callbacks(app):
         if not patients:
             return dbc.Alert("No patients assigned", color="info")
         
+        # One query for the summary rows of all the doctor's patients
+        summaries = get_patient_summaries([patient.id for patient in patients])
+        
         # Create table data
         table_data = []
         for patient in patients:
-            # Get latest glucose reading
-            recent_readings = get_patient_glucose_readings(patient.id, days=1)
-            latest_glucose = recent_readings[-1].value if recent_readings else "No data"
-            
-            # Get active therapies count
-            active_therapies = get_patient_active_therapies(patient.id)
-            therapies_count = len(active_therapies)
+            summary = summaries.get(patient.id)
+            has_reading = summary is not None and summary['latest_value'] is not None
             
             table_data.append({
                 'Patient ID': patient.id,
                 'Username': patient.user.username,
-                'Latest Glucose': str(latest_glucose),
-                'Active Therapies': therapies_count,
-                'Last Reading': recent_readings[-1].measurement_time.strftime('%m/%d %H:%M') if recent_readings else "No data"
+                'Latest Glucose': str(summary['latest_value']) if has_reading else "No data",
+                'Active Therapies': summary['active_therapy_count'] if summary else 0,
+                'Last Reading': summary['latest_time'].strftime('%m/%d %H:%M') if has_reading else "No data"
             })
         
         return dash_table.DataTable(
@@ -139,7 +128,7 @@ def register_doctor_callbacks(app):
         Output('selected-patient', 'options'),
         Input('doctor-tabs', 'active_tab')
     )
-    @db_session
+    @read_session()
     def update_selected_patient_options(active_tab):
         if active_tab != 'patient-details':
             return dash.no_update
@@ -165,7 +154,7 @@ def register_doctor_callbacks(app):
         Output('therapy-patient-select', 'options'),
         Input('doctor-tabs', 'active_tab')
     )
-    @db_session
+    @read_session()
     def update_therapy_patient_options(active_tab):
         if active_tab != 'prescribe-therapy':
             return dash.no_update
@@ -186,12 +175,12 @@ def register_doctor_callbacks(app):
         ]
         return options
     
-    # Patient detail content
+    # Patient detail: one bundle (cached per patient data version) fills the whole view
     @app.callback(
         Output('patient-detail-content', 'children'),
         Input('selected-patient', 'value')
     )
-    @db_session
+    @read_session()
     def update_patient_detail(patient_id):
         if not patient_id:
             return html.Div("Select a patient to view details")
@@ -199,189 +188,41 @@ def register_doctor_callbacks(app):
         if not current_user.is_authenticated or current_user.role != 'doctor':
             return "Access denied"
         
-        return get_patient_detail_content()
-    
-    # Patient info display
-    @app.callback(
-        Output('patient-info-display', 'children'),
-        Input('selected-patient', 'value')
-    )
-    @db_session
-    def update_patient_info(patient_id):
-        if not patient_id:
-            return ""
-        
         try:
-            patient = Patient[patient_id]
-            return html.Div([
-                html.P(f"Username: {patient.user.username}"),
-                html.P(f"Risk Factors: {patient.risk_factors or 'Not specified'}"),
-                html.P(f"Medical History: {patient.medical_history or 'Not specified'}"),
-                html.P(f"Comorbidities: {patient.comorbidities or 'Not specified'}")
-            ])
-        except:
+            detail = get_patient_detail(patient_id)
+        except Exception as e:
+            return html.P(f"Error loading patient details: {str(e)}")
+        if detail is None:
             return "Patient not found"
-    
-    # Patient compliance info
-    @app.callback(
-        Output('patient-compliance-info', 'children'),
-        Input('selected-patient', 'value')
-    )
-    @db_session
-    def update_patient_compliance_info(patient_id):
-        if not patient_id:
-            return "Select a patient to view compliance information"
         
-        try:
-            # Get therapy compliance status
-            compliance_data = get_therapy_compliance_status(patient_id, days=7)
-            
-            if not compliance_data:
-                return html.P("No active therapies found for this patient")
-            
-            compliance_items = []
-            for therapy_info in compliance_data:
-                therapy = therapy_info['therapy']
-                compliance_pct = therapy_info['compliance_percentage']
-                
-                color = "success" if compliance_pct >= 80 else "warning" if compliance_pct >= 60 else "danger"
-                
-                compliance_items.append(
-                    dbc.Card([
-                        dbc.CardBody([
-                            html.H6(f"{therapy.drug_name}", className="card-title"),
-                            html.P(f"Prescribed: {therapy.dose_amount}{therapy.dose_unit}, {therapy.daily_doses}x/day"),
-                            html.P(f"Compliance: {compliance_pct:.1f}%", className=f"text-{color}")
-                        ])
-                    ], className="mb-2")
-                )
-            
-            return compliance_items
-            
-        except Exception as e:
-            return html.P(f"Error loading compliance data: {str(e)}")
-
-    # Doctor glucose chart
+        return get_patient_detail_content(
+            patient_info=patient_info_panel(detail),
+            glucose_figure=glucose_trend_figure(detail['glucose_chart']),
+            glucose_ranges=CHART_RANGES,
+            glucose_days=detail['glucose_chart']['days'],
+            recent_readings=recent_readings_table(detail['recent_readings']),
+            compliance_info=compliance_cards(detail['therapies']),
+            risk_factors=detail['risk_factors'],
+            medical_history=detail['medical_history'],
+            comorbidities=detail['comorbidities']
+        )
+    
+    # Glucose chart range: longer ranges plot hourly rollups, every series downsampled server side
     @app.callback(
         Output('doctor-glucose-chart', 'figure'),
-        Input('selected-patient', 'value')
+        Input('doctor-glucose-range', 'value'),
+        State('selected-patient', 'value'),
+        prevent_initial_call=True
     )
-    @db_session
-    def update_doctor_glucose_chart(patient_id):
-        if not patient_id:
-            return {}
+    @read_session()
+    def update_doctor_glucose_chart(days, patient_id):
+        if not patient_id or not days:
+            raise PreventUpdate
         
-        try:
-            readings = get_patient_glucose_readings(patient_id, days=30)
-            
-            if not readings:
-                return {
-                    'data': [],
-                    'layout': {
-                        'title': 'No glucose readings available',
-                        'xaxis': {'title': 'Date'},
-                        'yaxis': {'title': 'Glucose (mg/dL)'}
-                    }
-                }
-            
-            # Separate before and after meal readings
-            before_meal_x = []
-            before_meal_y = []
-            after_meal_x = []
-            after_meal_y = []
-            
-            for reading in readings:
-                if reading.is_before_meal:
-                    before_meal_x.append(reading.measurement_time)
-                    before_meal_y.append(reading.value)
-                else:
-                    after_meal_x.append(reading.measurement_time)
-                    after_meal_y.append(reading.value)
-            
-            traces = []
-            
-            if before_meal_x:
-                traces.append(go.Scatter(
-                    x=before_meal_x,
-                    y=before_meal_y,
-                    mode='markers+lines',
-                    name='Before Meals',
-                    marker=dict(color='blue')
-                ))
-            
-            if after_meal_x:
-                traces.append(go.Scatter(
-                    x=after_meal_x,
-                    y=after_meal_y,
-                    mode='markers+lines',
-                    name='After Meals',
-                    marker=dict(color='red')
-                ))
-            
-            return {
-                'data': traces,
-                'layout': {
-                    'title': 'Patient Glucose Trend (Last 30 Days)',
-                    'xaxis': {'title': 'Date & Time'},
-                    'yaxis': {'title': 'Glucose Level (mg/dL)'},
-                    'hovermode': 'closest'
-                }
-            }
-        except:
-            return {}
-    
-    # Recent readings for doctor view
-    @app.callback(
-        Output('doctor-recent-readings', 'children'),
-        Input('selected-patient', 'value')
-    )
-    @db_session
-    def update_doctor_recent_readings(patient_id):
-        if not patient_id:
-            return ""
+        if not current_user.is_authenticated or current_user.role != 'doctor':
+            raise PreventUpdate
         
-        try:
-            readings = get_patient_glucose_readings(patient_id, days=7)
-            recent_readings = readings[-10:] if len(readings) > 10 else readings
-            
-            if not recent_readings:
-                return "No recent readings"
-            
-            # Create table data
-            table_data = []
-            for reading in reversed(recent_readings):  # Show most recent first
-                status = get_glucose_status(reading.value, reading.is_before_meal)
-                table_data.append({
-                    'Date & Time': reading.measurement_time.strftime('%m/%d %H:%M'),
-                    'Value': f"{reading.value} mg/dL",
-                    'Timing': 'Before Meal' if reading.is_before_meal else 'After Meal',
-                    'Status': status
-                })
-            
-            return dash_table.DataTable(
-                data=table_data,
-                columns=[
-                    {'name': 'Date & Time', 'id': 'Date & Time'},
-                    {'name': 'Value', 'id': 'Value'},
-                    {'name': 'Timing', 'id': 'Timing'},
-                    {'name': 'Status', 'id': 'Status'}
-                ],
-                style_cell={'textAlign': 'left', 'fontSize': '12px'},
-                style_data_conditional=[
-                    {
-                        'if': {'filter_query': '{Status} = High'},
-                        'backgroundColor': '#ffebee',
-                        'color': 'black',
-                    },
-                    {
-                        'if': {'filter_query': '{Status} = Low'},
-                        'backgroundColor': '#fff3e0',
-                        'color': 'black',
-                    }
-                ]
-            )
-        except:
-            return "Error loading readings"
+        return glucose_trend_figure(get_glucose_chart(patient_id, days))
     
     # Prescribe therapy callback
     @app.callback(
@@ -395,7 +236,7 @@ def register_doctor_callbacks(app):
          State('therapy-instructions', 'value')],
         prevent_initial_call=True
     )
-    @db_session
+    @read_session(read_your_writes=True)
     def prescribe_therapy(n_clicks, patient_id, drug_name, daily_doses, dose_amount, dose_unit, instructions):
         if not n_clicks:
             return ""
@@ -420,11 +261,13 @@ def register_doctor_callbacks(app):
             return dbc.Alert("Doctor record not found", color="danger")
         
         # Add therapy
-        success = add_therapy(
-            patient_id, doctor.id, drug_name, daily_doses, 
+        success, busy = queued_write(
+            add_therapy, patient_id, doctor.id, drug_name, daily_doses,
             dose_amount, dose_unit, instructions or ""
         )
-        
+        if busy:
+            return busy
+
         if success:
             return dbc.Alert(
                 f"Therapy prescribed successfully: {drug_name} {dose_amount}{dose_unit}, {daily_doses} times/day",
@@ -438,7 +281,7 @@ def register_doctor_callbacks(app):
         Output('current-patient-therapies', 'children'),
         Input('therapy-patient-select', 'value')
     )
-    @db_session
+    @read_session()
     def update_current_therapies(patient_id):
         if not patient_id:
             return "Select a patient"
@@ -453,9 +296,9 @@ def register_doctor_callbacks(app):
             for therapy in therapies:
                 therapy_list.append(
                     dbc.ListGroupItem([
-                        html.H6(therapy.drug_name, className="mb-1"),
-                        html.P(f"{therapy.dose_amount} {therapy.dose_unit}, {therapy.daily_doses} times/day", className="mb-1"),
-                        html.Small(f"Instructions: {therapy.instructions or 'None'}")
+                        html.H6(therapy['drug_name'], className="mb-1"),
+                        html.P(f"{therapy['dose_amount']} {therapy['dose_unit']}, {therapy['daily_doses']} times/day", className="mb-1"),
+                        html.Small(f"Instructions: {therapy['instructions'] or 'None'}")
                     ])
                 )
             
@@ -463,43 +306,88 @@ def register_doctor_callbacks(app):
         except:
             return "Error loading therapies"
     
-    # Priority alerts
+    # Priority alerts: one inbox page, "Load more" appends the next one (Patch: only new rows are sent).
+    # The list is reloaded after "Mark all as read" (priority-alerts-ack-output changes).
     @app.callback(
-        Output('priority-alerts-list', 'children'),
-        Input('doctor-tabs', 'active_tab')
+        [Output('priority-alerts-list', 'children'),
+         Output('priority-alerts-cursor', 'data'),
+         Output('priority-alerts-visible', 'data'),
+         Output('priority-alerts-more', 'style'),
+         Output('priority-alerts-ack', 'style')],
+        [Input('doctor-tabs', 'active_tab'),
+         Input('priority-alerts-more', 'n_clicks'),
+         Input('priority-alerts-ack-output', 'children')],
+        State('priority-alerts-cursor', 'data')
     )
-    @db_session
-    def update_priority_alerts(active_tab):
+    @read_session()
+    def update_priority_alerts(active_tab, more_clicks, ack_output, cursor):
+        hidden = {'display': 'none'}
         if active_tab != "alerts-monitoring":
-            return ""
+            return "", None, [], hidden, hidden
         
         if not current_user.is_authenticated or current_user.role != 'doctor':
-            return "Access denied"
+            return "Access denied", None, [], hidden, hidden
         
         doctor = get_doctor_by_user_id(current_user.id)
         if not doctor:
-            return "Doctor record not found"
+            return "Doctor record not found", None, [], hidden, hidden
         
-        alerts = get_unread_alerts(doctor_id=doctor.id)
-        priority_alerts = [a for a in alerts if a.severity in ['high', 'medium']]
+        load_more = dash.ctx.triggered_id == 'priority-alerts-more'
+        if load_more and not cursor:
+            raise PreventUpdate
+        priority_alerts, next_cursor = get_alert_inbox(
+            doctor_id=doctor.id, severities=('medium', 'high'), cursor=cursor if load_more else None
+        )
+        more_style = {} if next_cursor else hidden
         
-        if not priority_alerts:
-            return dbc.Alert("No priority alerts", color="success")
+        if not priority_alerts and not load_more:
+            return dbc.Alert("No priority alerts", color="success"), None, [], hidden, hidden
         
         alert_components = []
         for alert in priority_alerts:
             color_map = {'medium': 'warning', 'high': 'danger'}
-            color = color_map.get(alert.severity, 'info')
+            color = color_map.get(alert['severity'], 'info')
             
             alert_components.append(
                 dbc.Alert([
-                    html.H6(f"Patient: {alert.patient.user.username}", className="alert-heading"),
-                    html.P(alert.message),
-                    html.Small(f"Created: {alert.created_at.strftime('%m/%d/%Y %H:%M')}")
+                    html.H6(f"Patient: {alert['patient_username']}", className="alert-heading"),
+                    html.P(alert['text']),
+                    html.Small(f"Created: {alert['created_at'].strftime('%m/%d/%Y %H:%M')}")
                 ], color=color, className="mb-2")
             )
         
-        return alert_components
+        alert_ids = [alert['id'] for alert in priority_alerts]
+        if load_more:
+            page, visible = Patch(), Patch()
+            page.extend(alert_components)
+            visible.extend(alert_ids)
+            return page, next_cursor, visible, more_style, {}
+        return alert_components, next_cursor, alert_ids, more_style, {}
+
+    # Mark the priority alerts listed in the tab as read
+    @app.callback(
+        Output('priority-alerts-ack-output', 'children'),
+        Input('priority-alerts-ack', 'n_clicks'),
+        State('priority-alerts-visible', 'data'),
+        prevent_initial_call=True
+    )
+    @read_session(read_your_writes=True)
+    def acknowledge_priority_alerts(n_clicks, visible_ids):
+        if not n_clicks or not visible_ids:
+            raise PreventUpdate
+        
+        if not current_user.is_authenticated or current_user.role != 'doctor':
+            return "Access denied"
+        
+        doctor = get_doctor_by_user_id(current_user.id)
+        if not doctor:
+            return "Doctor record not found"
+        
+        # Scoped to this doctor: ids of other doctors' alerts are ignored
+        acknowledged, busy = queued_write(acknowledge_alerts, doctor_id=doctor.id, alert_ids=visible_ids)
+        if busy:
+            return busy
+        return dbc.Alert(f"{acknowledged} alerts marked as read", color="success", duration=4000)
 
     # Update patient info callback
     @app.callback(
@@ -512,7 +400,7 @@ def register_doctor_callbacks(app):
          State('update-doctor-notes', 'value')],
         prevent_initial_call=True
     )
-    @db_session
+    @read_session(read_your_writes=True)
     def update_patient_information(n_clicks, selected_patient_id, risk_factors, medical_history, comorbidities, doctor_notes):
         if not n_clicks or not selected_patient_id:
             return ""
@@ -521,14 +409,17 @@ def register_doctor_callbacks(app):
             return dbc.Alert("Access denied", color="danger")
         
         # Update patient information
-        success = update_patient_info(
-            selected_patient_id, 
-            risk_factors=risk_factors or "", 
-            medical_history=medical_history or "", 
+        success, busy = queued_write(
+            update_patient_info,
+            selected_patient_id,
+            risk_factors=risk_factors or "",
+            medical_history=medical_history or "",
             comorbidities=comorbidities or "",
             notes=doctor_notes or ""
         )
-        
+        if busy:
+            return busy
+
         if success:
             patient = Patient[selected_patient_id]
             return dbc.Alert(
@@ -538,27 +429,129 @@ def register_doctor_callbacks(app):
         else:
             return dbc.Alert("Failed to update patient information", color="danger")
 
-    # Populate patient info fields when patient is selected
-    @app.callback(
-        [Output('update-risk-factors', 'value'),
-         Output('update-medical-history', 'value'),
-         Output('update-comorbidities', 'value')],
-        Input('selected-patient', 'value')
+def patient_info_panel(detail):
+    """Profile lines of the patient detail view"""
+    return html.Div([
+        html.P(f"Username: {detail['username']}"),
+        html.P(f"Risk Factors: {detail['risk_factors'] or 'Not specified'}"),
+        html.P(f"Medical History: {detail['medical_history'] or 'Not specified'}"),
+        html.P(f"Comorbidities: {detail['comorbidities'] or 'Not specified'}")
+    ])
+
+def compliance_cards(therapies):
+    """One card per active therapy with its 7-day compliance"""
+    if not therapies:
+        return html.P("No active therapies found for this patient")
+    
+    compliance_items = []
+    for therapy in therapies:
+        compliance_pct = therapy['compliance_percentage']
+        color = "success" if compliance_pct >= 80 else "warning" if compliance_pct >= 60 else "danger"
+        
+        compliance_items.append(
+            dbc.Card([
+                dbc.CardBody([
+                    html.H6(f"{therapy['drug_name']}", className="card-title"),
+                    html.P(f"Prescribed: {therapy['dose_amount']}{therapy['dose_unit']}, {therapy['daily_doses']}x/day"),
+                    html.P(f"Compliance: {compliance_pct:.1f}%", className=f"text-{color}")
+                ])
+            ], className="mb-2")
+        )
+    return compliance_items
+
+def glucose_trend_figure(chart):
+    """Glucose per meal timing over the chart's range (already downsampled by the model)"""
+    if not any(series['points'] for series in chart['series']):
+        return {
+            'data': [],
+            'layout': {
+                'title': 'No glucose readings available',
+                'xaxis': {'title': 'Date'},
+                'yaxis': {'title': 'Glucose (mg/dL)'}
+            }
+        }
+    
+    names = {True: ('Before Meals', 'blue'), False: ('After Meals', 'red')}
+    band_colors = {True: 'rgba(0, 0, 255, 0.15)', False: 'rgba(255, 0, 0, 0.15)'}
+    unit = 'readings' if chart['readings'] else 'hourly averages'
+    traces = []
+    for series in chart['series']:
+        points = series['points']
+        if not points:
+            continue
+        name, color = names[series['is_before_meal']]
+        if series.get('band'):
+            # Hourly min-max as a shaded band behind the average line
+            band = series['band']
+            traces.append(go.Scatter(
+                x=[time for time, _, _ in band], y=[high for _, _, high in band],
+                mode='lines', line=dict(width=0), showlegend=False, hoverinfo='skip'
+            ))
+            traces.append(go.Scatter(
+                x=[time for time, _, _ in band], y=[low for _, low, _ in band],
+                mode='lines', line=dict(width=0), fill='tonexty', fillcolor=band_colors[series['is_before_meal']],
+                name=f"{name} hourly range", hoverinfo='skip'
+            ))
+        if len(points) < series['total']:
+            name = f"{name} ({len(points)} of {series['total']} {unit})"
+        traces.append(go.Scatter(
+            x=[time for time, _ in points],
+            y=[value for _, value in points],
+            # Markers only while they stay readable
+            mode='markers+lines' if len(points) <= 100 else 'lines',
+            name=name,
+            marker=dict(color=color),
+            line=dict(color=color, width=1),
+            hovertemplate='%{x|%m/%d %H:%M}: %{y} mg/dL<extra></extra>'
+        ))
+    
+    return {
+        'data': traces,
+        'layout': {
+            'title': f"Patient Glucose Trend (Last {chart['days']} Days)",
+            'xaxis': {'title': 'Date & Time'},
+            'yaxis': {'title': 'Glucose Level (mg/dL)'},
+            'hovermode': 'closest'
+        }
+    }
+
+def recent_readings_table(readings):
+    """Latest readings (most recent first) with their status"""
+    if not readings:
+        return "No recent readings"
+    
+    table_data = []
+    for reading in readings:
+        status = get_glucose_status(reading['value'], reading['is_before_meal'])
+        table_data.append({
+            'Date & Time': reading['measurement_time'].strftime('%m/%d %H:%M'),
+            'Value': f"{reading['value']} mg/dL",
+            'Timing': 'Before Meal' if reading['is_before_meal'] else 'After Meal',
+            'Status': status
+        })
+    
+    return dash_table.DataTable(
+        data=table_data,
+        columns=[
+            {'name': 'Date & Time', 'id': 'Date & Time'},
+            {'name': 'Value', 'id': 'Value'},
+            {'name': 'Timing', 'id': 'Timing'},
+            {'name': 'Status', 'id': 'Status'}
+        ],
+        style_cell={'textAlign': 'left', 'fontSize': '12px'},
+        style_data_conditional=[
+            {
+                'if': {'filter_query': '{Status} = High'},
+                'backgroundColor': '#ffebee',
+                'color': 'black',
+            },
+            {
+                'if': {'filter_query': '{Status} = Low'},
+                'backgroundColor': '#fff3e0',
+                'color': 'black',
+            }
+        ]
     )
-    @db_session
-    def populate_patient_info_fields(selected_patient_id):
-        if not selected_patient_id:
-            return "", "", ""
-        
-        try:
-            patient = Patient[selected_patient_id]
-            return (
-                patient.risk_factors or "",
-                patient.medical_history or "",
-                patient.comorbidities or ""
-            )
-        except:
-            return "", "", ""
 
 def get_glucose_status(value, is_before_meal):
     """Helper function to determine glucose status"""
@@ -11,6 +11,7 @@ from model import (
     get_doctor_by_user_id, get_patient_by_user_id, add_therapy,
     Patient, Doctor
 )
+from controller.writes import queued_write
 
 def register_modal_callbacks(app):
     """Register modal-related callbacks"""
@@ -85,10 +86,12 @@ def register_modal_callbacks(app):
             dose_amount = 1.0
             dose_unit = dosage
 
-        success = add_therapy(
-            patient_id, doctor.id, medication, daily_doses,
+        success, busy = queued_write(
+            add_therapy, patient_id, doctor.id, medication, daily_doses,
             dose_amount, dose_unit, instructions or ""
         )
+        if busy:
+            return busy
 
         if success:
             return dbc.Alert(f"Therapy added successfully: {medication}", color="success")
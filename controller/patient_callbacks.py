@@ -1,17 +1,21 @@
 # controller/patient_callbacks.py
+import base64
 import dash
 from dash.dependencies import Input, Output, State
 import dash_bootstrap_components as dbc
-from dash import html, dash_table
+from dash import html, dash_table, Patch
+from dash.exceptions import PreventUpdate
 from flask_login import current_user
-from pony.orm import db_session
 from datetime import datetime, timedelta
 
 from model import (
-    get_patient_by_user_id, add_glucose_reading, get_patient_glucose_readings,
+    get_patient_by_user_id, add_glucose_reading,
     add_symptom, record_medication_intake, get_patient_active_therapies,
-    get_unread_alerts, check_glucose_alerts, check_and_clear_compliance_alerts
+    get_alert_inbox, acknowledge_alerts, check_glucose_alerts, check_and_clear_compliance_alerts,
+    get_patient_summary, ingest_glucose_readings, parse_glucose_csv
 )
+from model.reads import read_session
+from controller.writes import queued_write
 from view.patient_dashboard import (
     get_log_data_tab, get_therapies_tab, get_alerts_tab
 )
@@ -41,7 +45,7 @@ def register_patient_callbacks(app):
          Output('unread-alerts-count', 'children')],
         Input('url', 'pathname')
     )
-    @db_session
+    @read_session()
     def update_patient_stats(pathname):
         if not current_user.is_authenticated or current_user.role != 'patient':
             return "--", "--", "--", "--"
@@ -50,24 +54,15 @@ def register_patient_callbacks(app):
         if not patient:
             return "--", "--", "--", "--"
         
-        # Latest glucose reading
-        recent_readings = get_patient_glucose_readings(patient.id, days=1)
-        latest_glucose = recent_readings[-1].value if recent_readings else "--"
-        
-        # Active therapies count
-        active_therapies = get_patient_active_therapies(patient.id)
-        therapies_count = len(active_therapies)
-        
-        # Week average glucose
-        week_readings = get_patient_glucose_readings(patient.id, days=7)
-        if week_readings:
-            week_avg = round(sum(r.value for r in week_readings) / len(week_readings), 1)
-        else:
-            week_avg = "--"
+        # Single-row read of the precomputed patient summary
+        summary = get_patient_summary(patient.id)
+        if not summary:
+            return "--", "--", "--", "--"
         
-        # Unread alerts
-        unread_alerts = get_unread_alerts(patient_id=patient.id)
-        alerts_count = len(unread_alerts)
+        latest_glucose = summary['latest_value'] if summary['latest_value'] is not None else "--"
+        therapies_count = summary['active_therapy_count']
+        week_avg = summary['week_average'] if summary['week_average'] is not None else "--"
+        alerts_count = summary['unread_alert_count']
         
         return str(latest_glucose), str(therapies_count), str(week_avg), str(alerts_count)
     
@@ -76,7 +71,7 @@ def register_patient_callbacks(app):
         Output('therapy-select', 'options'),
         Input('patient-tabs', 'active_tab')
     )
-    @db_session
+    @read_session()
     def update_therapy_options(active_tab):
         if not current_user.is_authenticated or current_user.role != 'patient':
             return []
@@ -88,8 +83,8 @@ def register_patient_callbacks(app):
         active_therapies = get_patient_active_therapies(patient.id)
         return [
             {
-                'label': f"{therapy.drug_name} - {therapy.dose_amount}{therapy.dose_unit} x{therapy.daily_doses}/day",
-                'value': therapy.id
+                'label': f"{therapy['drug_name']} - {therapy['dose_amount']}{therapy['dose_unit']} x{therapy['daily_doses']}/day",
+                'value': therapy['id']
             }
             for therapy in active_therapies
         ]
@@ -105,7 +100,7 @@ def register_patient_callbacks(app):
          State('glucose-notes', 'value')],
         prevent_initial_call=True
     )
-    @db_session
+    @read_session(read_your_writes=True)
     def log_glucose_reading(n_clicks, glucose_value, is_before_meal, notes):
         if not n_clicks or not glucose_value:
             return "", dash.no_update, dash.no_update
@@ -121,22 +116,22 @@ def register_patient_callbacks(app):
         if glucose_value < 30 or glucose_value > 600:
             return dbc.Alert("Please enter a valid glucose value (30-600 mg/dL)", color="warning"), dash.no_update, dash.no_update
         
-        # Add glucose reading
-        success = add_glucose_reading(patient.id, glucose_value, is_before_meal, notes)
-        
+        # Add glucose reading and check for alerts, in one queued write
+        def log_and_check(patient_id):
+            if not add_glucose_reading(patient_id, glucose_value, is_before_meal, notes):
+                return False
+            check_glucose_alerts(patient_id)
+            return True
+
+        success, busy = queued_write(log_and_check, patient.id)
+        if busy:
+            return busy, dash.no_update, dash.no_update
+
         if success:
-            # Check for alerts after adding reading
-            check_glucose_alerts(patient.id)
-            
-            # Update latest glucose and weekly average
-            recent_readings = get_patient_glucose_readings(patient.id, days=1)
-            latest_glucose = str(recent_readings[-1].value) if recent_readings else "--"
-            
-            week_readings = get_patient_glucose_readings(patient.id, days=7)
-            if week_readings:
-                week_avg = str(round(sum(r.value for r in week_readings) / len(week_readings), 1))
-            else:
-                week_avg = "--"
+            # Update latest glucose and weekly average from the patient summary
+            summary = get_patient_summary(patient.id)
+            latest_glucose = str(summary['latest_value']) if summary and summary['latest_value'] is not None else "--"
+            week_avg = str(summary['week_average']) if summary and summary['week_average'] is not None else "--"
             
             # Determine if reading is concerning
             alert_type = ""
@@ -156,6 +151,52 @@ def register_patient_callbacks(app):
         else:
             return dbc.Alert("Failed to log glucose reading", color="danger"), dash.no_update, dash.no_update
     
+    # Bulk glucose upload callback (meter / CGM CSV export)
+    @app.callback(
+        [Output('patient-form-output', 'children', allow_duplicate=True),
+         Output('latest-glucose-value', 'children', allow_duplicate=True),
+         Output('week-avg-glucose', 'children', allow_duplicate=True)],
+        [Input('glucose-upload', 'contents')],
+        [State('glucose-upload', 'filename')],
+        prevent_initial_call=True
+    )
+    @read_session(read_your_writes=True)
+    def upload_glucose_readings(contents, filename):
+        if not contents:
+            return "", dash.no_update, dash.no_update
+
+        if not current_user.is_authenticated or current_user.role != 'patient':
+            return dbc.Alert("Access denied", color="danger"), dash.no_update, dash.no_update
+
+        patient = get_patient_by_user_id(current_user.id)
+        if not patient:
+            return dbc.Alert("Patient record not found", color="danger"), dash.no_update, dash.no_update
+
+        try:
+            text = base64.b64decode(contents.split(',', 1)[1]).decode('utf-8')
+            readings = parse_glucose_csv(text)
+        except (IndexError, ValueError, UnicodeDecodeError):
+            return dbc.Alert(f"Could not read {filename or 'the file'} as CSV", color="warning"), dash.no_update, dash.no_update
+
+        result, busy = queued_write(ingest_glucose_readings, patient.id, readings)
+        if busy:
+            return busy, dash.no_update, dash.no_update
+        if result is None:
+            return dbc.Alert("Failed to upload glucose readings", color="danger"), dash.no_update, dash.no_update
+
+        summary = get_patient_summary(patient.id)
+        latest_glucose = str(summary['latest_value']) if summary and summary['latest_value'] is not None else "--"
+        week_avg = str(summary['week_average']) if summary and summary['week_average'] is not None else "--"
+        return (
+            dbc.Alert(
+                f"{filename or 'Upload'}: {result['inserted']} readings added, {result['duplicates']} already present, "
+                f"{result['rejected']} rejected",
+                color="success" if not result['rejected'] else "warning"
+            ),
+            latest_glucose,
+            week_avg
+        )
+
     # Record medication intake callback
     @app.callback(
         Output('patient-form-output', 'children', allow_duplicate=True),
@@ -167,7 +208,7 @@ def register_patient_callbacks(app):
          State('medication-notes', 'value')],
         prevent_initial_call=True
     )
-    @db_session
+    @read_session(read_your_writes=True)
     def record_medication(n_clicks, therapy_id, dose_taken, med_date, med_time, notes):
         if not n_clicks or not therapy_id or dose_taken is None:
             return ""
@@ -192,13 +233,17 @@ def register_patient_callbacks(app):
         except ValueError:
             return dbc.Alert("Invalid date or time format", color="warning")
         
-        # Record medication intake
-        success = record_medication_intake(patient.id, therapy_id, dose_taken, notes, intake_datetime)
-        
-        # Check and clear compliance alerts if patient is now compliant
-        if success:
-            check_and_clear_compliance_alerts(patient.id)
-        
+        # Record medication intake, then clear compliance alerts if patient is now compliant
+        def record_and_clear(patient_id):
+            if not record_medication_intake(patient_id, therapy_id, dose_taken, notes, intake_datetime):
+                return False
+            check_and_clear_compliance_alerts(patient_id)
+            return True
+
+        success, busy = queued_write(record_and_clear, patient.id)
+        if busy:
+            return busy
+
         if success:
             return dbc.Alert(
                 f"Medication intake recorded successfully for {med_date} at {med_time}", 
@@ -216,7 +261,7 @@ def register_patient_callbacks(app):
          State('symptom-description', 'value')],
         prevent_initial_call=True
     )
-    @db_session
+    @read_session(read_your_writes=True)
     def log_symptom(n_clicks, symptom_name, severity, description):
         if not n_clicks or not symptom_name:
             return ""
@@ -233,7 +278,9 @@ def register_patient_callbacks(app):
             description = None
         
         # Add symptom
-        success = add_symptom(patient.id, symptom_name, description, severity)
+        success, busy = queued_write(add_symptom, patient.id, symptom_name, description, severity)
+        if busy:
+            return busy
         
         if success:
             return dbc.Alert(f"Symptom '{symptom_name}' logged successfully", color="success")
@@ -245,7 +292,7 @@ def register_patient_callbacks(app):
         Output('active-therapies-table', 'children'),
         Input('patient-tabs', 'active_tab')
     )
-    @db_session
+    @read_session()
     def update_active_therapies(active_tab):
         if active_tab != "therapies":
             return ""
@@ -266,11 +313,11 @@ def register_patient_callbacks(app):
         table_data = []
         for therapy in therapies:
             table_data.append({
-                'Medication': therapy.drug_name,
-                'Dose': f"{therapy.dose_amount} {therapy.dose_unit}",
-                'Frequency': f"{therapy.daily_doses} times/day",
-                'Instructions': therapy.instructions or "No special instructions",
-                'Start Date': therapy.start_date.strftime('%d/%m/%Y')
+                'Medication': therapy['drug_name'],
+                'Dose': f"{therapy['dose_amount']} {therapy['dose_unit']}",
+                'Frequency': f"{therapy['daily_doses']} times/day",
+                'Instructions': therapy['instructions'] or "No special instructions",
+                'Start Date': therapy['start_date'].strftime('%d/%m/%Y')
             })
         
         return dash_table.DataTable(
@@ -286,42 +333,86 @@ def register_patient_callbacks(app):
             style_header={'backgroundColor': 'lightblue'}
         )
     
-    # Patient alerts
+    # Patient alerts: one inbox page, "Load more" appends the next one (Patch: only new rows are sent).
+    # The list is reloaded after "Mark all as read" (patient-alerts-ack-output changes).
     @app.callback(
-        Output('patient-alerts-list', 'children'),
-        Input('patient-tabs', 'active_tab')
+        [Output('patient-alerts-list', 'children'),
+         Output('patient-alerts-cursor', 'data'),
+         Output('patient-alerts-visible', 'data'),
+         Output('patient-alerts-more', 'style'),
+         Output('patient-alerts-ack', 'style')],
+        [Input('patient-tabs', 'active_tab'),
+         Input('patient-alerts-more', 'n_clicks'),
+         Input('patient-alerts-ack-output', 'children')],
+        State('patient-alerts-cursor', 'data')
     )
-    @db_session
-    def update_patient_alerts(active_tab):
+    @read_session()
+    def update_patient_alerts(active_tab, more_clicks, ack_output, cursor):
+        hidden = {'display': 'none'}
         if active_tab != "alerts":
-            return ""
+            return "", None, [], hidden, hidden
         
         if not current_user.is_authenticated or current_user.role != 'patient':
-            return "Access denied"
+            return "Access denied", None, [], hidden, hidden
         
         patient = get_patient_by_user_id(current_user.id)
         if not patient:
-            return "Patient record not found"
+            return "Patient record not found", None, [], hidden, hidden
         
-        alerts = get_unread_alerts(patient_id=patient.id)
+        load_more = dash.ctx.triggered_id == 'patient-alerts-more'
+        if load_more and not cursor:
+            raise PreventUpdate
+        alerts, next_cursor = get_alert_inbox(patient_id=patient.id, cursor=cursor if load_more else None)
+        more_style = {} if next_cursor else hidden
         
-        if not alerts:
-            return dbc.Alert("No new alerts", color="success")
+        if not alerts and not load_more:
+            return dbc.Alert("No new alerts", color="success"), None, [], hidden, hidden
         
         alert_components = []
         for alert in alerts:
             color_map = {'low': 'info', 'medium': 'warning', 'high': 'danger'}
-            color = color_map.get(alert.severity, 'info')
+            color = color_map.get(alert['severity'], 'info')
             
             alert_components.append(
                 dbc.Alert([
-                    html.H6(f"{alert.alert_type.replace('_', ' ').title()}", className="alert-heading"),
-                    html.P(alert.message),
-                    html.Small(f"Created: {alert.created_at.strftime('%d/%m/%Y %H:%M')}")
+                    html.H6(f"{alert['alert_type'].replace('_', ' ').title()}", className="alert-heading"),
+                    html.P(alert['text']),
+                    html.Small(f"Created: {alert['created_at'].strftime('%d/%m/%Y %H:%M')}")
                 ], color=color, className="mb-2")
             )
         
-        return alert_components
+        alert_ids = [alert['id'] for alert in alerts]
+        if load_more:
+            page, visible = Patch(), Patch()
+            page.extend(alert_components)
+            visible.extend(alert_ids)
+            return page, next_cursor, visible, more_style, {}
+        return alert_components, next_cursor, alert_ids, more_style, {}
+    
+    # Mark the alerts listed in the alerts tab as read
+    @app.callback(
+        Output('patient-alerts-ack-output', 'children'),
+        Input('patient-alerts-ack', 'n_clicks'),
+        State('patient-alerts-visible', 'data'),
+        prevent_initial_call=True
+    )
+    @read_session(read_your_writes=True)
+    def acknowledge_patient_alerts(n_clicks, visible_ids):
+        if not n_clicks or not visible_ids:
+            raise PreventUpdate
+        
+        if not current_user.is_authenticated or current_user.role != 'patient':
+            return "Access denied"
+        
+        patient = get_patient_by_user_id(current_user.id)
+        if not patient:
+            return "Patient record not found"
+        
+        # Scoped to this patient: ids of other patients' alerts are ignored
+        acknowledged, busy = queued_write(acknowledge_alerts, patient_id=patient.id, alert_ids=visible_ids)
+        if busy:
+            return busy
+        return dbc.Alert(f"{acknowledged} alerts marked as read", color="success", duration=4000)
 
 def get_glucose_status(value, is_before_meal):
     """Helper function to determine glucose status"""
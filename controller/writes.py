@@ -0,0 +1,28 @@
+# controller/writes.py
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import dash_bootstrap_components as dbc
+
+from model.writer import run_write, WriteQueueFull, WriteStillRunning
+
+
+def queued_write(func, *args, **kwargs):
+    """Run a model write on the writer thread: (result, None), or (None, message) when it did not complete
+
+    A write that timed out in the queue was cancelled, so the user may retry it; one that had
+    already started may still commit, so the user is told to wait instead of sending it again.
+    """
+    try:
+        return run_write(func, *args, **kwargs), None
+    except (WriteQueueFull, FutureTimeout):
+        return None, dbc.Alert("The server is busy saving other data, please try again in a moment",
+                               color="warning")
+    except WriteStillRunning:
+        return None, dbc.Alert("Still saving your data: it will appear shortly, no need to submit it again",
+                               color="info")
+
+'''
+    Questo file (writes.py) fa passare le scritture dei callback Dash dal thread di scrittura
+    unico: restituisce il risultato oppure un avviso da mostrare quando la coda è piena o quando
+    la scrittura, già avviata, è ancora in corso e non va ripetuta.
+'''
@@ -0,0 +1,58 @@
+# gunicorn.conf.py
+import multiprocessing
+import os
+import subprocess
+import sys
+
+from config import _env_flag
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+wsgi_app = 'wsgi:server'
+bind = os.environ.get('BIND', '0.0.0.0:8050')
+
+# Pre-forked workers sharing the app built once in the master
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', '1'))
+preload_app = True
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '60'))
+
+# The compliance scheduler runs in one dedicated process, never in the workers
+RUN_SCHEDULER = _env_flag('RUN_SCHEDULER', True)
+
+_scheduler_process = None
+
+
+def when_ready(server):
+    """Master is listening: start the single scheduler process"""
+    global _scheduler_process
+    if RUN_SCHEDULER and _scheduler_process is None:
+        _scheduler_process = subprocess.Popen([sys.executable, os.path.join(BASE_DIR, 'scheduler.py')], cwd=BASE_DIR)
+        server.log.info("Compliance scheduler started (pid %s)", _scheduler_process.pid)
+
+
+def pre_fork(server, worker):
+    """Never hand the master's SQLite connection to a child: each worker opens its own"""
+    from model.database import release_connection
+    release_connection()
+
+
+def post_fork(server, worker):
+    server.log.info("Worker spawned (pid %s)", worker.pid)
+
+
+def on_exit(server):
+    global _scheduler_process
+    if _scheduler_process is not None:
+        _scheduler_process.terminate()
+        try:
+            _scheduler_process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            _scheduler_process.kill()
+        _scheduler_process = None
+
+'''
+    Questo file (gunicorn.conf.py) configura il server di produzione (gunicorn wsgi:server).
+    L'app viene caricata una volta nel master e condivisa dai worker pre-forkati; ogni worker
+    apre la propria connessione al database e lo scheduler gira in un solo processo dedicato.
+'''
@@ -1,9 +1,12 @@
 # model/__init__.py
-# Import and configure database
-from model.database import db, configure_db
+# Import the database (bound explicitly through configure_db, never at import time)
+from model.database import db, configure_db, is_db_configured
 
 # Import entity classes
-from model.user import User, Patient, Doctor, GlucoseReading, Symptom, Therapy, MedicationIntake, Alert
+from model.user import (
+    User, Patient, Doctor, GlucoseReading, Symptom, Therapy, MedicationIntake, Alert, AlertArchive,
+    GlucoseHourlyRollup, GlucoseDailyRollup, PatientSummary, IdempotencyKey
+)
 
 # Import all operations for external use
 from model.operations import (
@@ -18,15 +21,50 @@ from model.operations import (
     update_patient_info
 )
 
-# Configure the database when the module is imported
-configure_db()
+# Alert text rendered from rule + payload at display time
+from model.alert_rules import alert_text
+
+# Keyset-paginated unread-alert inbox
+from model.inbox import get_alert_inbox, acknowledge_alerts, get_doctor_alert_counts
+
+# Doctor's patient view in one cached bundle
+from model.patient_detail import get_patient_detail, get_glucose_chart
+
+# Pre-aggregated glucose statistics (hourly / daily rollups)
+from model.rollups import rebuild_glucose_rollups, get_glucose_window_stats, get_glucose_series
+
+# Bulk glucose uploads (meter / CGM exports)
+from model.ingest import (
+    ingest_glucose_readings, parse_glucose_csv, ingest_medication_intakes, ingest_symptoms, ingest_device_batch
+)
+
+# Single-writer queue for API writes (grouped commits, back-pressure)
+from model.writer import WriteQueueFull, WriteStillRunning, get_writer_stats
 
-# Initialize the database with default users
-initialize_db()
+# Read-only connection pool for dashboard reads
+from model.reads import read_session, get_read_pool_stats
+
+# In-process cache of per-patient reads (LRU + TTL, keyed by data version)
+from model.cache import get_read_cache_stats, invalidate_patient_reads
+
+# One-row dashboard summaries per patient
+from model.summary import (
+    get_patient_summary, get_patient_summaries, rebuild_patient_summaries, get_patient_data_version,
+    get_patient_data_versions
+)
+
+# Password pool back-pressure and metrics
+from model.security import PasswordPoolBusy, get_password_pool_stats
+
+# Slow-query log and per-statement timing aggregates
+from model.query_log import (
+    get_slow_queries, get_query_fingerprints, format_query_report, reset_query_log
+)
 
 # Export all necessary functions for diabetes care system
 __all__ = [
-    'db', 'User', 'Patient', 'Doctor', 'GlucoseReading', 'Symptom', 'Therapy', 'MedicationIntake', 'Alert',
+    'db', 'configure_db', 'is_db_configured', 'User', 'Patient', 'Doctor', 'GlucoseReading', 'Symptom', 'Therapy', 'MedicationIntake', 'Alert',
+    'AlertArchive', 'GlucoseHourlyRollup', 'GlucoseDailyRollup', 'PatientSummary', 'IdempotencyKey',
     'initialize_db', 'get_user', 'get_user_by_username', 'add_user', 'validate_user',
     'list_all_users', 'delete_user', 'get_patient_by_user_id', 'get_doctor_by_user_id',
     'add_glucose_reading', 'get_patient_glucose_readings', 'add_therapy',
@@ -35,10 +73,19 @@ __all__ = [
     'check_medication_compliance', 'check_all_patients_compliance', 
     'get_therapy_compliance_status', 'check_glucose_thresholds_and_alert',
     'clear_compliance_alerts_for_patient', 'check_and_clear_compliance_alerts',
-    'update_patient_info'
+    'update_patient_info', 'alert_text', 'get_alert_inbox', 'acknowledge_alerts',
+    'get_doctor_alert_counts', 'get_patient_detail',
+    'get_glucose_chart', 'rebuild_glucose_rollups', 'get_glucose_window_stats', 'get_glucose_series',
+    'ingest_glucose_readings', 'parse_glucose_csv', 'ingest_medication_intakes', 'ingest_symptoms',
+    'ingest_device_batch', 'WriteQueueFull', 'WriteStillRunning', 'get_writer_stats', 'read_session',
+    'get_read_pool_stats', 'get_read_cache_stats', 'invalidate_patient_reads',
+    'get_patient_summary', 'get_patient_summaries', 'rebuild_patient_summaries',
+    'get_patient_data_version', 'get_patient_data_versions',
+    'PasswordPoolBusy', 'get_password_pool_stats',
+    'get_slow_queries', 'get_query_fingerprints', 'format_query_report', 'reset_query_log'
 ]
 
 '''
     Questo file (__init__.py) del modulo model configura e espone tutte le funzionalità del database.
-    Importa entità, operazioni e inizializza il sistema di persistenza per l'app diabetologica.
+    Importa entità e operazioni; il database viene collegato solo da configure_db().
 '''
\ No newline at end of file
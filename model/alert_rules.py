@@ -0,0 +1,103 @@
+# model/alert_rules.py
+from functools import lru_cache
+from string import Formatter
+
+from model.storage_format import from_epoch
+
+# English text of each rule (AlertRule.CODES), filled in when the alert is displayed. Fields are
+# payload keys, plus 'patient' (username) and 'drug' (name of the payload's therapy).
+ALERT_TEMPLATES = {
+    'glucose_before_meal': "Glucose level {value} mg/dL before meal (normal: 80-130 mg/dL)",
+    'glucose_after_meal': "Glucose level {value} mg/dL after meal (should be <180 mg/dL)",
+    'glucose_critical_reading': "CRITICAL: Patient {patient} glucose {value} mg/dL {meal} meal at {at:%H:%M}",
+    'glucose_elevated_readings': "Patient {patient} has elevated glucose readings in last 24h: {values}",
+    'glucose_critical_upload': "CRITICAL: Patient {patient} uploaded critical glucose readings ({count}): {readings}",
+    'missed_doses': ("You haven't recorded taking {drug} for {days} consecutive days. "
+                     "Please remember to take your medication as prescribed."),
+    'patient_missed_doses': "Patient {patient} has not recorded taking {drug} for {days} consecutive days.",
+    'dose_reminder': ("Reminder: Please remember to record your {drug} intake. "
+                      "You've missed recording for {days} days in the last 3 days."),
+}
+
+# Longest list of values kept in a payload (and quoted in the text); 'count' keeps the total
+MAX_VALUES_IN_ALERT = 10
+
+_formatter = Formatter()
+
+
+@lru_cache(maxsize=None)
+def _compiled_template(rule):
+    """(literal, field, format spec) pieces of a rule's template, parsed once per process"""
+    return tuple((literal, field, spec) for literal, field, spec, _ in _formatter.parse(ALERT_TEMPLATES[rule]))
+
+
+def glucose_values_payload(values, times=None):
+    """Payload part listing glucose values (with their times as epoch seconds, if given)"""
+    if times is None:
+        return {'count': len(values), 'values': list(values[:MAX_VALUES_IN_ALERT])}
+    return {'count': len(values), 'readings': [[at, value] for at, value in
+                                               zip(times[:MAX_VALUES_IN_ALERT], values[:MAX_VALUES_IN_ALERT])]}
+
+
+def _value_list(shown, count):
+    text = ", ".join(shown)
+    if count > len(shown):
+        text += f" and {count - len(shown)} more"
+    return text
+
+
+def _template_fields(payload):
+    """Payload values as the templates show them"""
+    fields = dict(payload)
+    if 'at' in fields:
+        fields['at'] = from_epoch(fields['at'])
+    count = fields.get('count', 0)
+    if 'values' in fields:
+        fields['values'] = _value_list([f"{value} mg/dL" for value in fields['values']], count)
+    if 'readings' in fields:
+        fields['readings'] = _value_list([f"{value} mg/dL at {from_epoch(at):%H:%M}"
+                                          for at, value in fields['readings']], count)
+    return fields
+
+
+def render_alert_text(rule, payload, **context):
+    """Text of a rule alert; context supplies the fields not stored in the payload"""
+    fields = _template_fields(payload)
+    fields.update(context)
+    parts = []
+    for literal, field, spec in _compiled_template(rule):
+        parts.append(literal)
+        if field is not None:
+            parts.append(format(fields[field], spec or ''))
+    return ''.join(parts)
+
+
+def render_alert(rule, message, payload, patient_username, drug_name=None):
+    """Display text from alert fields: the stored message, or the rule rendered with its payload"""
+    if not rule:
+        return message
+    context = {'patient': patient_username}
+    if 'therapy' in payload:
+        context['drug'] = drug_name or f"therapy {payload['therapy']}"
+    try:
+        return render_alert_text(rule, payload, **context)
+    except (KeyError, ValueError) as e:
+        print(f"Error rendering {rule} alert: {e}")
+        return rule.replace('_', ' ')
+
+
+def alert_text(alert):
+    """Display text of an alert: a flat inbox row, or an Alert entity (read with the inbox's joined query)"""
+    if isinstance(alert, dict):
+        return render_alert(alert['rule'], alert['message'], alert['payload'], alert['patient_username'],
+                            alert.get('drug_name'))
+    # Imported here: the inbox imports this module to render its rows
+    from model.inbox import get_alert_rows
+    return get_alert_rows([alert.id])[alert.id]['text']
+
+
+'''
+    Questo file (alert_rules.py) contiene i modelli di testo degli alert generati dalle regole.
+    Gli alert salvano solo la regola e un payload strutturato (valori, terapia, conteggi); il testo
+    viene composto alla visualizzazione, con i modelli analizzati una sola volta e tenuti in cache.
+'''
@@ -0,0 +1,604 @@
+# model/cache.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from functools import wraps
+from pony.orm import db_session
+
+from model.resp import RespClient, RespError, parse_redis_url
+
+# Read-through cache of per-patient reads (plain data only, never Pony entities)
+READ_CACHE_ENABLED = True
+READ_CACHE_SIZE = 1024  # entries, least recently used dropped first
+READ_CACHE_TTL = 300.0  # seconds an entry may be served, even if its data version is still current
+# Where entries live: 'local' (this process), 'sqlite' (a file shared by the processes of a host)
+# or 'redis' (any Redis-protocol server); READ_CACHE_URL is the file path or the redis:// URL
+READ_CACHE_BACKEND = 'local'
+READ_CACHE_URL = ''
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'bypassed': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0,
+          'errors': 0, 'unavailable': 0}
+
+
+def _count(name, amount=1):
+    with _stats_lock:
+        _stats[name] += amount
+
+
+class CacheBackend:
+    """Storage behind the read cache
+
+    Keys are (function, patient id, data version, extra) tuples. Shared backends hold the
+    entries of every worker process: a write anywhere bumps the patient's version in the
+    database, so the other workers stop finding the old entries without being notified.
+    Backend failures count as misses (the read goes to the database) and as 'errors'; the
+    backend is then skipped for RETRY_AFTER seconds, counted as 'unavailable'. Entries missed
+    by an invalidation meanwhile are harmless: their data version is already outdated.
+    """
+    name = None
+    shared = False  # entries are seen by the other processes too
+    RETRY_AFTER = 10.0
+    _down_until = 0.0
+
+    def available(self):
+        if time.monotonic() >= self._down_until:
+            return True
+        _count('unavailable')
+        return False
+
+    def get(self, key):
+        """(True, value) for a live entry, (False, None) otherwise"""
+        raise NotImplementedError
+
+    def set(self, key, value):
+        raise NotImplementedError
+
+    def invalidate_patient(self, patient_id):
+        """Drop every entry of one patient; returns the number dropped (None if unknown)"""
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def size(self):
+        """Number of entries, None when the backend cannot tell cheaply"""
+        return None
+
+
+def _key_string(key):
+    name, patient_id, version, extra = key
+    return f'{name}:{patient_id}:{version}:{extra!r}'
+
+
+class LocalCache(CacheBackend):
+    """Bounded LRU of (expiry, value) entries with a time-to-live, indexed by patient for invalidation"""
+    name = 'local'
+
+    def __init__(self, maxsize, ttl, timer=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.timer = timer
+        self._entries = OrderedDict()
+        self._by_patient = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """(True, value) for a live entry, (False, None) otherwise"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            expires, value = entry
+            if expires <= self.timer():
+                self._remove(key)
+                _count('expirations')
+                return False, None
+            self._entries.move_to_end(key)
+            return True, value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (self.timer() + self.ttl, value)
+            self._entries.move_to_end(key)
+            self._by_patient.setdefault(key[1], set()).add(key)
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+                _count('evictions')
+
+    def invalidate_patient(self, patient_id):
+        """Drop every entry of one patient; returns the number dropped"""
+        with self._lock:
+            keys = self._by_patient.pop(patient_id, ())
+            for key in keys:
+                self._entries.pop(key, None)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_patient.clear()
+
+    def size(self):
+        return len(self._entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key):
+        del self._entries[key]
+        keys = self._by_patient.get(key[1])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_patient[key[1]]
+
+
+class SQLiteCache(CacheBackend):
+    """Entries in a SQLite file of their own, shared by the processes of one host
+
+    Kept apart from the application database so cache traffic never waits for its writer.
+    Expired entries are skipped on read and pruned, with the oldest ones beyond maxsize,
+    every PRUNE_EVERY writes.
+    """
+    name = 'sqlite'
+    shared = True
+    PRUNE_EVERY = 100
+
+    def __init__(self, path, maxsize, ttl, busy_timeout=1.0):
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._writes = 0
+        self._connection().execute(
+            'CREATE TABLE IF NOT EXISTS "cache" ("key" TEXT PRIMARY KEY, "patient" INTEGER NOT NULL, '
+            '"expires" REAL NOT NULL, "value" BLOB NOT NULL)'
+        )
+        self._connection().execute('CREATE INDEX IF NOT EXISTS "cache_patient" ON "cache" ("patient")')
+
+    def _connection(self):
+        # One connection per thread and process (sqlite3 connections are neither)
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None,
+                                         check_same_thread=False)
+            connection.execute('PRAGMA journal_mode = WAL')
+            connection.execute('PRAGMA synchronous = OFF')  # derived data: losing it is harmless
+            self._local.connection, self._local.pid = connection, os.getpid()
+        return connection
+
+    def get(self, key):
+        if not self.available():
+            return False, None
+        try:
+            row = self._connection().execute('SELECT "expires", "value" FROM "cache" WHERE "key" = ?',
+                                             (_key_string(key),)).fetchone()
+            if row is None:
+                return False, None
+            if row[0] <= time.time():
+                _count('expirations')
+                return False, None
+            return True, loads_value(row[1])
+        except (sqlite3.Error, ValueError) as e:
+            return _backend_error(self, e)
+
+    def set(self, key, value):
+        if not self.available():
+            return
+        try:
+            connection = self._connection()
+            connection.execute('INSERT OR REPLACE INTO "cache" ("key", "patient", "expires", "value") '
+                               'VALUES (?, ?, ?, ?)',
+                               (_key_string(key), key[1], time.time() + self.ttl, dumps_value(value)))
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                self._prune(connection)
+        except (sqlite3.Error, TypeError) as e:
+            _backend_error(self, e)
+
+    def _prune(self, connection):
+        connection.execute('DELETE FROM "cache" WHERE "expires" <= ?', (time.time(),))
+        cursor = connection.execute(
+            'DELETE FROM "cache" WHERE "key" IN (SELECT "key" FROM "cache" ORDER BY "expires" DESC '
+            'LIMIT -1 OFFSET ?)', (self.maxsize,)
+        )
+        if cursor.rowcount > 0:
+            _count('evictions', cursor.rowcount)
+
+    def invalidate_patient(self, patient_id):
+        if not self.available():
+            return 0
+        try:
+            return self._connection().execute('DELETE FROM "cache" WHERE "patient" = ?', (patient_id,)).rowcount
+        except sqlite3.Error as e:
+            _backend_error(self, e)
+            return 0
+
+    def clear(self):
+        if not self.available():
+            return
+        try:
+            self._connection().execute('DELETE FROM "cache"')
+        except sqlite3.Error as e:
+            _backend_error(self, e)
+
+    def size(self):
+        if not self.available():
+            return None
+        try:
+            return self._connection().execute('SELECT COUNT(*) FROM "cache"').fetchone()[0]
+        except sqlite3.Error as e:
+            _backend_error(self, e)
+            return None
+
+
+class RedisCache(CacheBackend):
+    """Entries on a Redis-protocol server, shared by every worker of every host
+
+    Each entry is a string key with the TTL as its expiry, plus a per-patient set of keys for
+    invalidation. The server applies its own memory limit (maxmemory), so maxsize is not used.
+    """
+    name = 'redis'
+    shared = True
+
+    def __init__(self, url, ttl, prefix='diabetes:read:', timeout=1.0):
+        self.connect_args = dict(parse_redis_url(url), timeout=timeout)
+        self.ttl = ttl
+        self.prefix = prefix
+        self._local = threading.local()
+
+    def _client(self):
+        client = getattr(self._local, 'client', None)
+        if client is None or self._local.pid != os.getpid():
+            client = RespClient(**self.connect_args)
+            self._local.client, self._local.pid = client, os.getpid()
+        return client
+
+    def _patient_set(self, patient_id):
+        return f'{self.prefix}patient:{patient_id}'
+
+    def get(self, key):
+        if not self.available():
+            return False, None
+        try:
+            data = self._client().execute('GET', self.prefix + _key_string(key))
+            if data is None:
+                return False, None
+            return True, loads_value(data)
+        except (OSError, RespError, ValueError) as e:
+            return _backend_error(self, e)
+
+    def set(self, key, value):
+        if not self.available():
+            return
+        ttl = max(1, round(self.ttl))
+        name = self.prefix + _key_string(key)
+        patient_set = self._patient_set(key[1])
+        try:
+            self._client().pipeline([
+                ('SET', name, dumps_value(value), 'EX', ttl),
+                ('SADD', patient_set, name),
+                ('EXPIRE', patient_set, ttl),
+            ])
+        except (OSError, RespError, TypeError) as e:
+            _backend_error(self, e)
+
+    def invalidate_patient(self, patient_id):
+        if not self.available():
+            return 0
+        patient_set = self._patient_set(patient_id)
+        try:
+            client = self._client()
+            names = client.execute('SMEMBERS', patient_set) or []
+            client.execute('DEL', patient_set, *names)
+            return len(names)
+        except (OSError, RespError) as e:
+            _backend_error(self, e)
+            return 0
+
+    def clear(self):
+        if not self.available():
+            return
+        try:
+            client = self._client()
+            cursor = b'0'
+            while True:
+                cursor, names = client.execute('SCAN', cursor, 'MATCH', self.prefix + '*', 'COUNT', 500)
+                if names:
+                    client.execute('DEL', *names)
+                if cursor in (b'0', '0'):
+                    break
+        except (OSError, RespError) as e:
+            _backend_error(self, e)
+
+
+def _backend_error(backend, error):
+    """Count and report a backend failure; the read falls back to the database and the backend
+    is skipped for a while, so an unreachable server does not slow down every read"""
+    _count('errors')
+    backend._down_until = time.monotonic() + backend.RETRY_AFTER
+    print(f"Read cache ({backend.name}) error, skipped for {backend.RETRY_AFTER:g}s: {error}")
+    return False, None
+
+
+# Shared entries are JSON, never pickle: whoever can write to the cache server or file must not
+# be able to run code in the workers. Datetimes, dates and tuples are tagged to come back as such.
+_TAGS = {
+    '$datetime': datetime.fromisoformat,
+    '$date': date.fromisoformat,
+    '$tuple': tuple,
+}
+
+
+def _tagged(value):
+    if isinstance(value, datetime):
+        return {'$datetime': value.isoformat()}
+    if isinstance(value, date):
+        return {'$date': value.isoformat()}
+    if isinstance(value, tuple):
+        return {'$tuple': [_tagged(item) for item in value]}
+    if isinstance(value, list):
+        return [_tagged(item) for item in value]
+    if isinstance(value, dict):
+        if not all(isinstance(name, str) for name in value):
+            raise TypeError("Cached dicts must have string keys")
+        return {name: _tagged(item) for name, item in value.items()}
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    raise TypeError(f"Cannot cache a {type(value).__name__}: only plain data")
+
+
+def _untagged(obj):
+    if len(obj) == 1:
+        name, value = next(iter(obj.items()))
+        if name in _TAGS:
+            return _TAGS[name](value)
+    return obj
+
+
+def dumps_value(value):
+    """Bytes of a cached value for a shared backend (TypeError for anything but plain data)"""
+    return json.dumps(_tagged(value), separators=(',', ':')).encode()
+
+
+def loads_value(data):
+    """Value back from dumps_value() bytes (ValueError if they are not)"""
+    return json.loads(data, object_hook=_untagged)
+
+
+def create_cache_backend(backend='local', url='', size=None, ttl=None):
+    """Cache backend by name: 'local', 'sqlite' (url = file path) or 'redis' (url = redis://...)"""
+    size = READ_CACHE_SIZE if size is None else size
+    ttl = READ_CACHE_TTL if ttl is None else ttl
+    if backend == 'local':
+        return LocalCache(size, ttl)
+    if backend == 'sqlite':
+        if not url:
+            raise ValueError("The sqlite read cache needs READ_CACHE_URL (a file path)")
+        return SQLiteCache(url, size, ttl)
+    if backend == 'redis':
+        return RedisCache(url or 'redis://127.0.0.1:6379/0', ttl)
+    raise ValueError(f"Unknown read cache backend: {backend!r}")
+
+
+_cache = LocalCache(READ_CACHE_SIZE, READ_CACHE_TTL)
+
+# Data versions already read, reused without a query while the invalidation watcher of this
+# process runs (model/invalidation.py): it forgets a version once any connection changes it.
+# This process's own writes forget theirs when their transaction commits (install_commit_hook).
+_known_versions = {}
+_known_lock = threading.Lock()
+_forgotten = {}  # patient id -> times its version was forgotten (a racing read must not store it back)
+_forgotten_all = 0
+_uncommitted = threading.local()
+
+
+def _forget_versions(patient_ids=None):
+    """Drop known versions (None: all of them)"""
+    global _forgotten_all
+    with _known_lock:
+        if patient_ids is None:
+            _known_versions.clear()
+            _forgotten_all += 1
+            return
+        for patient_id in patient_ids:
+            _known_versions.pop(patient_id, None)
+            _forgotten[patient_id] = _forgotten.get(patient_id, 0) + 1
+
+
+def _after_commit():
+    changed = getattr(_uncommitted, 'patients', None)
+    if changed:
+        _uncommitted.patients = set()
+        _forget_versions(changed)
+
+
+def _after_rollback():
+    _uncommitted.patients = set()
+
+
+def install_commit_hook(database):
+    """Forget the known versions of the patients a transaction changed once it commits
+
+    Forgetting them only before the commit would let a concurrent read store the old version
+    back, hiding the write from this process until the watcher's next poll.
+    """
+    if getattr(database, '_cache_commit_hook_installed', False):
+        return
+    provider = database.provider
+    original_commit, original_rollback = provider.commit, provider.rollback
+
+    def commit(connection, cache=None):
+        original_commit(connection, cache)
+        _after_commit()
+
+    def rollback(connection, cache=None):
+        try:
+            original_rollback(connection, cache)
+        finally:
+            _after_rollback()
+
+    provider.commit, provider.rollback = commit, rollback
+    database._cache_commit_hook_installed = True
+
+
+def configure_read_cache(enabled=None, size=None, ttl=None, backend=None, url=None):
+    """Change the cache settings; a new backend (or size, TTL) starts from an empty local cache"""
+    global READ_CACHE_ENABLED, READ_CACHE_SIZE, READ_CACHE_TTL, READ_CACHE_BACKEND, READ_CACHE_URL, _cache
+    if enabled is not None:
+        READ_CACHE_ENABLED = bool(enabled)
+    if size is not None:
+        READ_CACHE_SIZE = max(1, int(size))
+    if ttl is not None:
+        READ_CACHE_TTL = max(0.0, float(ttl))
+    if backend is not None:
+        READ_CACHE_BACKEND = backend
+    if url is not None:
+        READ_CACHE_URL = url
+    _cache = create_cache_backend(READ_CACHE_BACKEND, READ_CACHE_URL)
+
+
+def configure_read_cache_from_settings(settings):
+    """Apply the READ_CACHE_* settings of a config dict"""
+    configure_read_cache(
+        enabled=settings['READ_CACHE_ENABLED'],
+        size=settings['READ_CACHE_SIZE'],
+        ttl=settings['READ_CACHE_TTL'],
+        backend=settings['READ_CACHE_BACKEND'],
+        url=settings['READ_CACHE_URL']
+    )
+
+
+def invalidate_patient_reads(patient_id):
+    """Drop the cached reads of a patient (write paths call it when they bump the data version)
+
+    Its known version is forgotten now and again when the writing transaction commits.
+    """
+    patient_id = int(patient_id)
+    _forget_versions([patient_id])
+    if not hasattr(_uncommitted, 'patients'):
+        _uncommitted.patients = set()
+    _uncommitted.patients.add(patient_id)
+    dropped = _cache.invalidate_patient(int(patient_id)) or 0
+    if dropped:
+        _count('invalidations', dropped)
+    return dropped
+
+
+def clear_read_cache():
+    _forget_versions()
+    _cache.clear()
+
+
+def evict_changed_patients(patient_ids):
+    """Forget what this process knows of patients changed by another connection
+
+    A shared backend was already cleaned by the writing process, so only the local state goes;
+    None in patient_ids stands for every patient. Returns the number of entries dropped.
+    """
+    if None in patient_ids:
+        _forget_versions()
+        if not _cache.shared:
+            _cache.clear()
+        return 0
+    _forget_versions(set(patient_ids))
+    dropped = 0
+    for patient_id in set(patient_ids):
+        if not _cache.shared:
+            dropped += _cache.invalidate_patient(patient_id) or 0
+    if dropped:
+        _count('invalidations', dropped)
+    return dropped
+
+
+def _data_version(patient_id):
+    # Imported here: summary.py imports this module to invalidate on writes, and the watcher too
+    from model.summary import get_patient_data_version
+    from model.invalidation import invalidation_watcher_running
+    if not invalidation_watcher_running():
+        return get_patient_data_version(patient_id)
+    with _known_lock:
+        version = _known_versions.get(patient_id)
+        seen = (_forgotten_all, _forgotten.get(patient_id, 0))
+    if version is None:
+        version = get_patient_data_version(patient_id)
+        with _known_lock:
+            # Not if the version was forgotten meanwhile: this one may predate that write
+            if version is not None and seen == (_forgotten_all, _forgotten.get(patient_id, 0)):
+                _known_versions[patient_id] = version
+    return version
+
+
+def cached_patient_read(key=None):
+    """Cache a read `func(patient_id, ...)` per (function, patient, data version, key)
+
+    key(patient_id, *args, **kwargs) returns the rest of the cache key, e.g. the day for reads
+    relative to today; by default it is the arguments themselves. The function must return
+    plain data (dicts, lists, numbers, datetimes): cached values are shared between requests
+    and sessions, so callers treat them as read only. A patient without a data version yet
+    (no summary row) is always read from the database. While the invalidation watcher runs, a
+    version already read is reused instead of queried again.
+    """
+    def decorator(func):
+        name = f'{func.__module__}.{func.__qualname__}'
+
+        @wraps(func)
+        @db_session
+        def wrapper(patient_id, *args, **kwargs):
+            version = _data_version(int(patient_id)) if READ_CACHE_ENABLED else None
+            if version is None:
+                _count('bypassed')
+                return func(patient_id, *args, **kwargs)
+
+            extra = key(patient_id, *args, **kwargs) if key else (args, tuple(sorted(kwargs.items())))
+            cache_key = (name, int(patient_id), version, extra)
+            hit, value = _cache.get(cache_key)
+            if hit:
+                _count('hits')
+                return value
+            _count('misses')
+            value = func(patient_id, *args, **kwargs)
+            _cache.set(cache_key, value)
+            return value
+
+        wrapper.uncached = func
+        return wrapper
+    return decorator
+
+
+def get_read_cache_stats():
+    """Counters of the read cache (hits, misses, reads without a version, evictions, expirations,
+    invalidations, backend errors, calls skipped while a backend was unavailable)"""
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_ratio'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+    stats['enabled'] = READ_CACHE_ENABLED
+    stats['backend'] = _cache.name
+    stats['size'] = _cache.size()
+    stats['max_size'] = READ_CACHE_SIZE
+    stats['ttl'] = READ_CACHE_TTL
+    return stats
+
+
+def reset_read_cache_stats():
+    with _stats_lock:
+        for name in _stats:
+            _stats[name] = 0
+
+'''
+    Questo file (cache.py) fornisce la cache in memoria delle letture per paziente: un LRU limitato
+    con scadenza (TTL) le cui chiavi includono la versione dei dati del paziente, quindi una scrittura
+    rende subito obsoleti i valori precedenti; le scritture li eliminano anche esplicitamente.
+    I valori sono dati semplici, mai entità Pony, e le statistiche contano hit, miss ed evizioni.
+    Le voci possono stare in memoria, in un file SQLite condiviso dai processi o su un server
+    con protocollo Redis (serializzate in JSON, mai con pickle): la versione letta dal database
+    le rende valide per tutti i processi, e un backend che non risponde viene saltato per un po'.
+    Con il watcher di invalidazione attivo le versioni già lette vengono riusate senza query.
+'''
@@ -0,0 +1,59 @@
+# model/clock.py
+import time
+from datetime import datetime, timedelta
+
+# Clock used by the model operations; None means the real wall clock
+_active_clock = None
+
+
+def now():
+    """Current time according to the active clock"""
+    if _active_clock is None:
+        return datetime.now()
+    return _active_clock.now()
+
+
+def sleep(seconds):
+    """Wait according to the active clock: a real sleep, or simulated time moving forward"""
+    if _active_clock is None or not hasattr(_active_clock, 'sleep'):
+        time.sleep(seconds)
+    else:
+        _active_clock.sleep(seconds)
+
+
+def set_clock(clock):
+    """Install a clock object (anything with a now() method) for all model operations"""
+    global _active_clock
+    _active_clock = clock
+
+
+def reset_clock():
+    """Go back to the real wall clock"""
+    set_clock(None)
+
+
+class SimulatedClock:
+    """Manually advanced clock for simulations and time-dependent tests"""
+
+    def __init__(self, start=None):
+        self._now = start or datetime.now()
+
+    def now(self):
+        return self._now
+
+    def set(self, moment):
+        self._now = moment
+
+    def advance(self, delta=None, **kwargs):
+        self._now += delta if delta is not None else timedelta(**kwargs)
+        return self._now
+
+    def sleep(self, seconds):
+        """Drop-in replacement for time.sleep that only moves simulated time"""
+        self.advance(timedelta(seconds=seconds))
+
+'''
+    Questo file (clock.py) fornisce l'orologio usato dalle operazioni del modello.
+    Di default usa l'ora reale; nelle simulazioni si installa un SimulatedClock
+    per far avanzare il tempo di giorni in pochi secondi.
+'''
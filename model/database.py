@@ -1,23 +1,168 @@
 # model/database.py
-from pony.orm import Database
+from pony.orm import Database, db_session
 import os
 
-# Initialize the database
+from model.query_log import install_query_log
+from model.cache import install_commit_hook
+from model.storage_format import (
+    install_storage_format, add_missing_columns, migrate_storage_format, to_epoch, from_epoch
+)
+
+# Initialize the database (bound lazily by configure_db, not at import time)
 db = Database()
 
-# Configure the database path - now in the data directory
-def configure_db():
-    data_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
-    
-    # Create data directory if it doesn't exist
-    if not os.path.exists(data_dir):
-        os.makedirs(data_dir)
-        
-    db_path = os.path.join(data_dir, 'app_database.sqlite')
-    db.bind(provider='sqlite', filename=db_path, create_db=True)
-    db.generate_mapping(create_tables=True)
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'app_database.sqlite')
+
+# Named PRAGMA sets applied to every new SQLite connection (DATABASE_PROFILE setting).
+# WAL lets readers run while the writer commits; journal_mode is stored in the file itself.
+# auto_vacuum only takes effect on a new, empty file (so it comes before journal_mode): freed pages
+# are then returned by PRAGMA incremental_vacuum (alert retention job, model/retention.py).
+STORAGE_PROFILES = {
+    # Every commit is fsynced, WAL included: nothing is lost on power failure
+    'durable': {
+        'auto_vacuum': 'INCREMENTAL',
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'mmap_size': 0,
+        'cache_size': -16384,       # KiB (16 MB)
+        'temp_store': 'DEFAULT',
+        'busy_timeout': 5000,       # ms
+    },
+    # WAL is fsynced at checkpoints only: a power failure may drop the last commits, never corrupts
+    'balanced': {
+        'auto_vacuum': 'INCREMENTAL',
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 268435456,     # 256 MB of the file read through mmap
+        'cache_size': -65536,       # 64 MB
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,
+    },
+    # Seeding, backfills and rebuilds only: no fsync at all (an OS crash can corrupt the file)
+    'bulk-load': {
+        'auto_vacuum': 'INCREMENTAL',
+        'journal_mode': 'WAL',
+        'synchronous': 'OFF',
+        'mmap_size': 268435456,
+        'cache_size': -262144,      # 256 MB
+        'temp_store': 'MEMORY',
+        'busy_timeout': 30000,
+    },
+}
+DEFAULT_STORAGE_PROFILE = 'balanced'
+
+_storage_pragmas = {}
+_db_path = None
+
+def is_db_configured():
+    """True once the database has been bound and the mapping generated"""
+    return db.schema is not None
+
+@db.on_connect(provider='sqlite')
+def _apply_storage_profile(database, connection):
+    """Runs once for every new connection (one per thread and per process)"""
+    cursor = connection.cursor()
+    for name, value in _storage_pragmas.items():
+        cursor.execute(f'PRAGMA {name} = {value}')
+
+def storage_pragmas(profile=None, busy_timeout=None):
+    """PRAGMA name -> value for a profile name; raises ValueError for an unknown name"""
+    profile = profile or DEFAULT_STORAGE_PROFILE
+    if profile == 'sqlite-defaults':
+        pragmas = {}
+    elif profile in STORAGE_PROFILES:
+        pragmas = dict(STORAGE_PROFILES[profile])
+    else:
+        raise ValueError(f"Unknown storage profile {profile!r} (expected one of {', '.join(STORAGE_PROFILES)})")
+    if busy_timeout is not None:
+        pragmas['busy_timeout'] = int(float(busy_timeout) * 1000)
+    return pragmas
+
+# Configure the database path - by default in the data directory
+def configure_db(filename=None, provider='sqlite', slow_query_ms=None, busy_timeout=None, profile=None):
+    """Bind the database and generate the mapping; calling it again is a no-op
+
+    profile names one of STORAGE_PROFILES (None = DEFAULT_STORAGE_PROFILE, 'sqlite-defaults'
+    leaves SQLite's own settings). busy_timeout (seconds) overrides the profile's wait for
+    another connection's write lock before "database is locked" is raised.
+    """
+    global _storage_pragmas, _db_path
+    pragmas = storage_pragmas(profile, busy_timeout)
+    if is_db_configured():
+        return db
+    _storage_pragmas = pragmas
+
+    # DATABASE_PATH lets tools (e.g. the simulation harness) use their own file
+    db_path = filename or os.environ.get('DATABASE_PATH') or DEFAULT_DB_PATH
+
+    if db_path != ':memory:':
+        # Create data directory if it doesn't exist
+        db_dir = os.path.dirname(os.path.abspath(db_path))
+        if not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+
+    db.bind(provider=provider, filename=db_path, create_db=True)
+    _db_path = db_path if provider == 'sqlite' else None
+
+    # Time every statement Pony executes (slow-query log and fingerprint stats)
+    install_query_log(db, slow_query_ms)
+
+    # Cached reads forget a patient's known data version once the write changing it commits
+    install_commit_hook(db)
+
+    # Integer epoch datetimes and enum codes; older files are converted once (PRAGMA user_version)
+    # and get the optional columns added since they were created
+    if provider == 'sqlite':
+        install_storage_format(db)
+        db.generate_mapping(create_tables=True, check_tables=False)
+        add_missing_columns(db)
+        migrate_storage_format(db)
+        db.check_tables()
+    else:
+        db.generate_mapping(create_tables=True)
+    return db
+
+def get_db_path():
+    """SQLite file the database is bound to (':memory:' for tests, None for other providers)"""
+    return _db_path
+
+def storage_connection_pragmas():
+    """PRAGMAs of the configured profile, for connections opened outside Pony (read pool)"""
+    return dict(_storage_pragmas)
+
+def get_storage_settings():
+    """Current values of the storage PRAGMAs on this thread's connection"""
+    settings = {}
+    with db_session:
+        for name in STORAGE_PROFILES[DEFAULT_STORAGE_PROFILE]:
+            # mmap_size returns no row on an in-memory database
+            row = db.execute(f'PRAGMA {name}').fetchone()
+            settings[name] = row[0] if row else None
+    return settings
+
+def release_connection():
+    """Close this process's pooled connection so that forked children open their own"""
+    if is_db_configured():
+        db.disconnect()
+
+def to_db_datetime(value):
+    """A datetime exactly as Pony stores it in SQLite, epoch seconds (for raw SQL statements)"""
+    return to_epoch(value) if value is not None else None
+
+def from_db_datetime(value):
+    """A datetime column value read with raw SQL, back to a datetime"""
+    return from_epoch(value)
+
+def execute_many(sql, rows):
+    """Run one statement for many parameter rows inside the current db_session's write transaction"""
+    rows = list(rows)
+    if not rows:
+        return
+    db._exec_sql(sql, rows, start_transaction=True)
 
 '''
     Questo file (database.py) gestisce la configurazione del database per l'applicazione.
-    Inizializza Pony ORM e configura il database SQLite nella cartella 'data'.
-'''
\ No newline at end of file
+    Il collegamento a SQLite avviene in modo pigro tramite configure_db(), chiamata dalla
+    factory dell'app o dagli strumenti, così l'import del modulo non ha effetti sul database.
+    I profili di archiviazione (durable, balanced, bulk-load) impostano i PRAGMA di ogni connessione.
+'''
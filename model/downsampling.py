@@ -0,0 +1,93 @@
+# model/downsampling.py
+
+
+def _number(x):
+    """Datetimes as epoch seconds, numbers unchanged (only distances between points matter)"""
+    return x.timestamp() if hasattr(x, 'timestamp') else float(x)
+
+
+def _lttb_indices(xs, ys, target):
+    """Indices kept by Largest-Triangle-Three-Buckets: first, last and one per bucket in between"""
+    n = len(xs)
+    every = (n - 2) / (target - 2)
+    kept = [0]
+    a = 0
+    for i in range(target - 2):
+        # Average of the next bucket (the last point for the last bucket)
+        start = int((i + 1) * every) + 1
+        end = min(int((i + 2) * every) + 1, n)
+        avg_x = sum(xs[start:end]) / (end - start)
+        avg_y = sum(ys[start:end]) / (end - start)
+        # The point of this bucket making the largest triangle with the previous pick and that average
+        best, chosen = -1.0, start - 1
+        for j in range(int(i * every) + 1, start):
+            area = abs((xs[a] - avg_x) * (ys[j] - ys[a]) - (xs[a] - xs[j]) * (avg_y - ys[a]))
+            if area > best:
+                best, chosen = area, j
+        kept.append(chosen)
+        a = chosen
+    kept.append(n - 1)
+    return kept
+
+
+def lttb(points, target):
+    """Downsample (x, y) points sorted by x to `target` points keeping the visual shape
+
+    x may be numbers or datetimes. Series that are already short enough (or targets below 3)
+    are returned unchanged.
+    """
+    if target < 3 or len(points) <= target:
+        return list(points)
+    xs = [_number(x) for x, _ in points]
+    ys = [y for _, y in points]
+    return [points[i] for i in _lttb_indices(xs, ys, target)]
+
+
+def downsample(points, target, low=None, high=None):
+    """LTTB to at most `target` points, never dropping the extremes outside [low, high]
+
+    Part of the budget is reserved for the extremes: the series is cut into (target - 3) // 4
+    equal buckets, and the lowest point of a bucket below `low` and the highest above `high`
+    are kept, so a hypo or a spike survives however long the range. LTTB picks the remaining
+    points (at least half of them). The result is in x order.
+    """
+    n = len(points)
+    if target < 3 or n <= target:
+        return list(points)
+    xs = [_number(x) for x, _ in points]
+    ys = [y for _, y in points]
+    extremes = set()
+    buckets = (target - 3) // 4
+    for i in range(buckets):
+        bucket = range(i * n // buckets, (i + 1) * n // buckets)
+        lowest = min(bucket, key=ys.__getitem__)
+        highest = max(bucket, key=ys.__getitem__)
+        if low is not None and ys[lowest] < low:
+            extremes.add(lowest)
+        if high is not None and ys[highest] > high:
+            extremes.add(highest)
+    kept = extremes.union(_lttb_indices(xs, ys, target - len(extremes)))
+    return [points[i] for i in sorted(kept)]
+
+
+def envelope(rows, target):
+    """Reduce (x, low, high) rows sorted by x to at most `target` rows, for a min/max band
+
+    Each reduced row covers an equal run of rows: its first x, lowest low and highest high,
+    so no extreme is lost. Rows that already fit are returned unchanged.
+    """
+    n = len(rows)
+    if target < 1 or n <= target:
+        return list(rows)
+    reduced = []
+    for i in range(target):
+        run = rows[i * n // target:(i + 1) * n // target]
+        reduced.append((run[0][0], min(r[1] for r in run), max(r[2] for r in run)))
+    return reduced
+
+'''
+    Questo file (downsampling.py) riduce le serie dei grafici a un numero di punti fissato, lato
+    server: l'algoritmo Largest-Triangle-Three-Buckets conserva la forma della curva, i valori
+    estremi fuori dall'intervallo obiettivo restano sempre visibili entro lo stesso numero di punti
+    e le bande minimo/massimo vengono ridotte senza perdere gli estremi.
+'''
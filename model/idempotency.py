@@ -0,0 +1,73 @@
+# model/idempotency.py
+import hashlib
+import json
+from datetime import timedelta
+from pony.orm import db_session, delete
+
+from model.clock import now
+from model.user import User, IdempotencyKey
+
+# Stored responses are kept this long; a retry after that is treated as a new request
+IDEMPOTENCY_KEY_TTL_HOURS = 24
+
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyKeyReused(Exception):
+    """Raised when a key is sent again with a different request body"""
+
+
+def request_fingerprint(body):
+    """sha256 of the raw request body"""
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    return hashlib.sha256(body or b'').hexdigest()
+
+
+@db_session
+def get_idempotent_response(user_id, key, request_hash):
+    """(status_code, body) stored for this key, or None; raises IdempotencyKeyReused on a body mismatch"""
+    stored = IdempotencyKey.get(user=User[user_id], key=key)
+    if stored is None or stored.created_at < now() - timedelta(hours=IDEMPOTENCY_KEY_TTL_HOURS):
+        return None
+    if stored.request_hash != request_hash:
+        raise IdempotencyKeyReused(f"Idempotency key {key!r} was used for a different request")
+    return stored.status_code, json.loads(stored.response_body)
+
+
+@db_session
+def run_idempotent(user_id, key, request_hash, func, *args):
+    """Run func (returning (status_code, body)) once per key, in the caller's transaction
+
+    The stored response is written in the same transaction as the data, so a request
+    either left both or neither. Returns (status_code, body, replayed).
+    """
+    if not key:
+        status_code, body = func(*args)
+        return status_code, body, False
+
+    stored = get_idempotent_response(user_id, key, request_hash)
+    if stored is not None:
+        return stored + (True,)
+
+    status_code, body = func(*args)
+    if status_code < 500:
+        user = User[user_id]
+        # An expired row for the same key is replaced
+        delete(k for k in IdempotencyKey if k.user == user and k.key == key)
+        IdempotencyKey(user=user, key=key, request_hash=request_hash, status_code=status_code,
+                       response_body=json.dumps(body), created_at=now())
+    return status_code, body, False
+
+
+@db_session
+def purge_idempotency_keys():
+    """Drop stored responses older than the TTL; returns the number of rows removed"""
+    cutoff = now() - timedelta(hours=IDEMPOTENCY_KEY_TTL_HOURS)
+    return delete(k for k in IdempotencyKey if k.created_at < cutoff)
+
+'''
+    Questo file (idempotency.py) gestisce le chiavi di idempotenza dell'API di acquisizione:
+    la risposta di una scrittura viene salvata nella stessa transazione dei dati, così un
+    client che ripete la richiesta con la stessa chiave riceve la stessa risposta senza duplicati.
+'''
@@ -0,0 +1,171 @@
+# model/inbox.py
+import json
+from collections import Counter
+from pony.orm import db_session
+
+from model.clock import now
+from model.database import db, to_db_datetime, from_db_datetime
+from model.storage_format import AlertSeverity, AlertType, AlertRule
+from model.summary import summary_alerts_changed
+from model.alert_rules import render_alert
+
+# Alerts per inbox page (the dashboards load the next page on demand)
+ALERT_PAGE_SIZE = 20
+MAX_ALERT_PAGE_SIZE = 200
+
+# Unread alerts of these types count a patient as a compliance issue on the doctor's dashboard
+COMPLIANCE_ALERT_TYPES = ('medication_compliance', 'patient_non_compliance', 'medication_reminder')
+
+# Alert fields plus everything its text needs (patient username, therapy drug name): one query per page
+_INBOX_SELECT = (
+    'SELECT a."id", a."patient", u."username", a."alert_type", a."severity", a."message", a."rule", '
+    'a."payload", a."created_at", t."drug_name" FROM "Alert" a '
+    'JOIN "Patient" p ON p."id" = a."patient" JOIN "User" u ON u."id" = p."user" '
+    # '$$' is a literal '$' in Pony's raw SQL
+    'LEFT JOIN "Therapy" t ON t."id" = json_extract(a."payload", \'$$.therapy\') '
+)
+
+
+def _alert_row(row):
+    """Flat alert dict (DTO) of an _INBOX_SELECT row, text already rendered"""
+    alert_id, patient_id, username, alert_type, severity, message, rule, payload, created_at, drug_name = row
+    rule = AlertRule.value_of(rule)
+    payload = json.loads(payload) if payload else {}
+    return {
+        'id': alert_id,
+        'patient_id': patient_id,
+        'patient_username': username,
+        'alert_type': AlertType.value_of(alert_type),
+        'severity': AlertSeverity.value_of(severity),
+        'message': message,
+        'rule': rule,
+        'payload': payload,
+        'drug_name': drug_name,
+        'text': render_alert(rule, message, payload, username, drug_name),
+        'created_at': from_db_datetime(created_at),
+    }
+
+
+def encode_cursor(alert):
+    """Opaque position after `alert` (a row dict) in the newest-first order: '<created_at epoch>.<id>'"""
+    return f"{to_db_datetime(alert['created_at'])}.{alert['id']}"
+
+
+def decode_cursor(cursor):
+    """(created_at epoch, id) of a cursor; raises ValueError for a malformed one"""
+    created, _, alert_id = str(cursor).partition('.')
+    return int(created), int(alert_id)
+
+
+@db_session
+def get_alert_inbox(doctor_id=None, patient_id=None, severities=None, cursor=None, limit=None):
+    """One page of unread alerts, newest first; returns (alert dicts, next_cursor or None)
+
+    The page is read with an index range scan ((doctor | patient), is_read, created_at) that
+    starts after the cursor, so every page costs the same however long the inbox is.
+    severities restricts the page to some levels, e.g. ('medium', 'high'). Each alert is a
+    flat dict (id, patient_id, patient_username, alert_type, severity, message, rule, payload,
+    drug_name, text, created_at) read with one joined query: rendering a page loads no further rows.
+    """
+    if doctor_id is not None:
+        owner = 'a."doctor" = $owner_id'
+        params = {'owner_id': doctor_id}
+    elif patient_id is not None:
+        owner = 'a."patient" = $owner_id'
+        params = {'owner_id': patient_id}
+    else:
+        return [], None
+
+    limit = min(max(1, int(limit or ALERT_PAGE_SIZE)), MAX_ALERT_PAGE_SIZE)
+    conditions = [owner, 'a."is_read" = 0']
+    if severities:
+        codes = ', '.join(str(AlertSeverity.code(severity)) for severity in severities)
+        conditions.append(f'a."severity" IN ({codes})')
+    if cursor:
+        params['after_time'], params['after_id'] = decode_cursor(cursor)
+        conditions.append('(a."created_at", a."id") < ($after_time, $after_id)')
+    params['limit'] = limit + 1
+
+    rows = db.select(f'{_INBOX_SELECT} WHERE {" AND ".join(conditions)} '
+                     'ORDER BY a."created_at" DESC, a."id" DESC LIMIT $limit', params)
+    alerts = [_alert_row(row) for row in rows]
+    if len(alerts) <= limit:
+        return alerts, None
+    alerts = alerts[:limit]
+    return alerts, encode_cursor(alerts[-1])
+
+
+@db_session
+def get_alert_rows(alert_ids):
+    """{alert id: flat alert dict} for some alerts, read with the inbox's joined query"""
+    id_list = ', '.join(str(int(alert_id)) for alert_id in alert_ids)
+    if not id_list:
+        return {}
+    return {row[0]: _alert_row(row) for row in db.select(f'{_INBOX_SELECT} WHERE a."id" IN ({id_list})')}
+
+
+@db_session
+def get_doctor_alert_counts(doctor_id):
+    """Unread-alert counters of the doctor's dashboard, in one grouped query
+
+    'high_priority': unread high-severity alerts addressed to the doctor; 'compliance_patients':
+    the doctor's patients with an unread alert of a COMPLIANCE_ALERT_TYPES type.
+    """
+    types = ', '.join(str(AlertType.code(alert_type)) for alert_type in COMPLIANCE_ALERT_TYPES)
+    high_priority, compliance_patients = db.select(
+        'SELECT COALESCE(SUM(a."doctor" = $doctor_id AND a."severity" = $high), 0), '
+        f'COUNT(DISTINCT CASE WHEN a."alert_type" IN ({types}) AND p."assigned_doctor" = $doctor_id '
+        'THEN a."patient" END) '
+        'FROM "Alert" a JOIN "Patient" p ON p."id" = a."patient" '
+        'WHERE a."is_read" = 0 AND (a."doctor" = $doctor_id OR p."assigned_doctor" = $doctor_id)',
+        {'doctor_id': doctor_id, 'high': AlertSeverity.code('high')}
+    )[0]
+    return {'high_priority': high_priority, 'compliance_patients': compliance_patients}
+
+
+@db_session
+def acknowledge_alerts(doctor_id=None, patient_id=None, alert_ids=None, alert_types=None, before=None,
+                       resolve=False):
+    """Mark unread alerts read with a single UPDATE; returns the number of alerts acknowledged
+
+    doctor_id and/or patient_id limit the update to the caller's alerts (one is required);
+    alert_ids, alert_types and before (created before that time) narrow it down. resolve=True
+    also stamps resolved_at. The patients' unread counters drop by the rows actually changed.
+    Alert objects already loaded in the calling session are not refreshed.
+    """
+    if doctor_id is None and patient_id is None:
+        raise ValueError("acknowledge_alerts needs a doctor_id or a patient_id")
+    conditions = ['"is_read" = 0']
+    params = {'now': to_db_datetime(now())}
+    if doctor_id is not None:
+        conditions.append('"doctor" = $doctor_id')
+        params['doctor_id'] = doctor_id
+    if patient_id is not None:
+        conditions.append('"patient" = $patient_id')
+        params['patient_id'] = patient_id
+    if alert_ids is not None:
+        if not alert_ids:
+            return 0
+        conditions.append(f'"id" IN ({", ".join(str(int(alert_id)) for alert_id in alert_ids)})')
+    if alert_types:
+        conditions.append(f'"alert_type" IN ({", ".join(str(AlertType.code(t)) for t in alert_types)})')
+    if before is not None:
+        conditions.append('"created_at" < $before')
+        params['before'] = to_db_datetime(before)
+
+    resolved = ', "resolved_at" = COALESCE("resolved_at", $now)' if resolve else ''
+    rows = db.execute(f'UPDATE "Alert" SET "is_read" = 1{resolved} WHERE {" AND ".join(conditions)} '
+                      'RETURNING "patient"', params).fetchall()
+    for changed_patient, count in Counter(row[0] for row in rows).items():
+        summary_alerts_changed(changed_patient, -count)
+    return len(rows)
+
+'''
+    Questo file (inbox.py) fornisce la casella degli alert non letti a pagine: ordine dal più
+    recente, filtro per gravità e cursori (data, id) che riprendono la lettura dall'indice senza
+    rileggere le pagine precedenti. Ogni pagina è letta con una sola query con join (username del
+    paziente, farmaco della terapia) e restituita come dizionari già pronti per la visualizzazione.
+    get_doctor_alert_counts() calcola i contatori della dashboard del medico con una sola query.
+    acknowledge_alerts() segna come letti (o risolti) gli alert scelti per id o per filtro con un
+    solo UPDATE, aggiornando i contatori dei riepiloghi.
+'''
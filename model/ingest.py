@@ -0,0 +1,254 @@
+# model/ingest.py
+import csv
+import io
+from datetime import datetime, timedelta
+from pony.orm import db_session
+
+from model.clock import now
+from model.database import db, to_db_datetime, execute_many
+from model.user import Patient, MedicationIntake, Symptom
+from model.rollups import fold_glucose_readings
+from model.alert_rules import glucose_values_payload
+from model.summary import rebuild_patient_summaries, summary_data_changed
+from model.operations import (
+    classify_glucose_reading, create_alert, check_medication_compliance, check_and_clear_compliance_alerts
+)
+
+# Same bounds as the manual glucose form
+MIN_GLUCOSE_VALUE = 30
+MAX_GLUCOSE_VALUE = 600
+
+# Only readings this recent are evaluated for doctor alerts (as for single readings)
+ALERT_WINDOW_HOURS = 24
+
+_TRUE_STRINGS = {'1', 'true', 'yes', 'y', 'before', 'before_meal', 'pre'}
+_FALSE_STRINGS = {'0', 'false', 'no', 'n', 'after', 'after_meal', 'post'}
+
+SYMPTOM_SEVERITIES = ('mild', 'moderate', 'severe')
+
+# Per-connection staging table: the primary key drops duplicates inside a batch
+_STAGING_TABLE = (
+    'CREATE TEMP TABLE IF NOT EXISTS "glucose_ingest" ('
+    '"measurement_time" INTEGER PRIMARY KEY, "value" REAL NOT NULL, "is_before_meal" INTEGER NOT NULL, '
+    '"notes" TEXT NOT NULL, "is_new" INTEGER NOT NULL DEFAULT 1)'
+)
+
+
+def _parse_time(value):
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(str(value).strip().replace('Z', '+00:00'))
+    if value.tzinfo is not None:
+        # Stored times are naive local time, like the ones stamped by add_glucose_reading
+        value = value.astimezone().replace(tzinfo=None)
+    return value
+
+
+def _parse_meal(value):
+    if value is None or value == '':
+        return True
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in _TRUE_STRINGS:
+        return True
+    if text in _FALSE_STRINGS:
+        return False
+    raise ValueError(f"Invalid meal timing: {value!r}")
+
+
+def _parse_reading(reading):
+    """(measurement_time, value, is_before_meal, notes) row for the staging table"""
+    value = float(reading['value'])
+    if not MIN_GLUCOSE_VALUE <= value <= MAX_GLUCOSE_VALUE:
+        raise ValueError(f"Glucose value out of range: {value}")
+    measurement_time = _parse_time(reading['measurement_time'])
+    return (to_db_datetime(measurement_time), value, int(_parse_meal(reading.get('is_before_meal'))),
+            reading.get('notes') or '')
+
+
+def parse_glucose_csv(text):
+    """Reading dicts from a meter/CGM CSV export (measurement_time, value[, is_before_meal, notes])"""
+    return list(csv.DictReader(io.StringIO(text.lstrip('\ufeff')), skipinitialspace=True))
+
+
+@db_session
+def ingest_glucose_readings(patient_id, readings, evaluate_alerts=True):
+    """Bulk-insert readings with their original timestamps in one transaction
+
+    Readings are dicts with 'measurement_time', 'value' and optionally 'is_before_meal'
+    and 'notes'. Readings already stored for the same (patient, measurement_time) are
+    skipped, so re-uploading an overlapping export is harmless. Rollups and the summary
+    row are updated once per batch and the glucose alerts are evaluated once over it.
+    """
+    patient = Patient.get(id=patient_id)
+    if not patient:
+        print(f"Patient with id {patient_id} not found")
+        return None
+
+    result = {'received': 0, 'inserted': 0, 'duplicates': 0, 'rejected': 0}
+    rows = []
+    for reading in readings:
+        result['received'] += 1
+        try:
+            rows.append(_parse_reading(reading))
+        except (KeyError, TypeError, ValueError):
+            result['rejected'] += 1
+    if not rows:
+        return result
+
+    params = {'patient_id': patient.id}
+    db.execute(_STAGING_TABLE)
+    db.execute('DELETE FROM temp."glucose_ingest"')
+    execute_many('INSERT OR IGNORE INTO temp."glucose_ingest" '
+                 '("measurement_time", "value", "is_before_meal", "notes") VALUES (?, ?, ?, ?)', rows)
+
+    # Readings the patient already has (index on patient, measurement_time)
+    db.execute(
+        'UPDATE temp."glucose_ingest" SET "is_new" = 0 WHERE "measurement_time" IN ('
+        'SELECT g."measurement_time" FROM "GlucoseReading" g WHERE g."patient" = $patient_id '
+        'AND g."measurement_time" BETWEEN (SELECT MIN("measurement_time") FROM temp."glucose_ingest") '
+        'AND (SELECT MAX("measurement_time") FROM temp."glucose_ingest"))',
+        params
+    )
+    cursor = db.execute(
+        'INSERT INTO "GlucoseReading" ("patient", "value", "measurement_time", "is_before_meal", "notes") '
+        'SELECT $patient_id, "value", "measurement_time", "is_before_meal", "notes" '
+        'FROM temp."glucose_ingest" WHERE "is_new" ORDER BY "measurement_time"',
+        params
+    )
+    result['inserted'] = cursor.rowcount
+    result['duplicates'] = result['received'] - result['rejected'] - result['inserted']
+
+    if result['inserted']:
+        # Rollups and summary in the same transaction: a failure rolls the whole batch back
+        fold_glucose_readings(
+            '(SELECT $patient_id AS "patient", "measurement_time", "value", "is_before_meal" '
+            'FROM temp."glucose_ingest" WHERE "is_new")',
+            params
+        )
+        rebuild_patient_summaries(patient.id)
+
+        if evaluate_alerts:
+            _alert_on_batch(patient, params)
+
+    db.execute('DELETE FROM temp."glucose_ingest"')
+    return result
+
+
+def _alert_on_batch(patient, params):
+    """One critical and one elevated doctor alert at most per batch, then one compliance check"""
+    since = to_db_datetime(now() - timedelta(hours=ALERT_WINDOW_HOURS))
+    recent = db.select(
+        'SELECT "measurement_time", "value", "is_before_meal" FROM temp."glucose_ingest" '
+        'WHERE "is_new" AND "measurement_time" >= $since ORDER BY "measurement_time"',
+        dict(params, since=since)
+    )
+    critical, high = [], []
+    for measurement_time, value, is_before_meal in recent:
+        level = classify_glucose_reading(value, bool(is_before_meal))
+        if level == 'critical':
+            critical.append((measurement_time, value))
+        elif level == 'high':
+            high.append((measurement_time, value))
+
+    if patient.assigned_doctor:
+        if critical:
+            create_alert(patient.id, 'glucose_critical', None, 'high', patient.assigned_doctor.id,
+                         rule='glucose_critical_upload',
+                         payload=glucose_values_payload([value for _, value in critical],
+                                                        [measurement_time for measurement_time, _ in critical]))
+        if high:
+            create_alert(patient.id, 'glucose_elevated', None, 'medium', patient.assigned_doctor.id,
+                         rule='glucose_elevated_readings',
+                         payload=glucose_values_payload([value for _, value in high]))
+
+    check_medication_compliance(patient.id)
+
+
+@db_session
+def ingest_medication_intakes(patient_id, intakes):
+    """Record a batch of intakes ({therapy_id, dose_taken, intake_time, notes}) for one patient
+
+    An intake already recorded for the same therapy and time is skipped. Compliance is
+    re-checked once for the whole batch.
+    """
+    patient = Patient.get(id=patient_id)
+    if not patient:
+        print(f"Patient with id {patient_id} not found")
+        return None
+
+    result = {'received': 0, 'inserted': 0, 'duplicates': 0, 'rejected': 0}
+    therapies = {therapy.id: therapy for therapy in patient.therapies}
+    seen = set()
+    for intake in intakes:
+        result['received'] += 1
+        try:
+            therapy = therapies[int(intake['therapy_id'])]
+            dose_taken = float(intake['dose_taken'])
+            intake_time = _parse_time(intake['intake_time']) if intake.get('intake_time') else now()
+            if dose_taken <= 0:
+                raise ValueError(f"Invalid dose: {dose_taken}")
+        except (KeyError, TypeError, ValueError):
+            result['rejected'] += 1
+            continue
+        if (therapy.id, intake_time) in seen or MedicationIntake.exists(therapy=therapy, intake_time=intake_time):
+            result['duplicates'] += 1
+            continue
+        seen.add((therapy.id, intake_time))
+        MedicationIntake(patient=patient, therapy=therapy, intake_time=intake_time,
+                         dose_taken=dose_taken, notes=intake.get('notes') or '')
+        result['inserted'] += 1
+
+    if result['inserted']:
+        summary_data_changed(patient.id)
+        check_medication_compliance(patient.id)
+        check_and_clear_compliance_alerts(patient.id)
+    return result
+
+
+@db_session
+def ingest_symptoms(patient_id, symptoms):
+    """Record a batch of symptoms ({name, description, severity, start_date}) for one patient"""
+    patient = Patient.get(id=patient_id)
+    if not patient:
+        print(f"Patient with id {patient_id} not found")
+        return None
+
+    result = {'received': 0, 'inserted': 0, 'duplicates': 0, 'rejected': 0}
+    for symptom in symptoms:
+        result['received'] += 1
+        try:
+            name = str(symptom['name']).strip()
+            severity = symptom.get('severity') or None
+            start_date = _parse_time(symptom['start_date']) if symptom.get('start_date') else now()
+            if not name or (severity is not None and severity not in SYMPTOM_SEVERITIES):
+                raise ValueError(f"Invalid symptom: {symptom!r}")
+        except (KeyError, TypeError, ValueError):
+            result['rejected'] += 1
+            continue
+        if Symptom.exists(patient=patient, name=name, start_date=start_date):
+            result['duplicates'] += 1
+            continue
+        Symptom(patient=patient, name=name, description=symptom.get('description') or '',
+                start_date=start_date, severity=severity or '')
+        result['inserted'] += 1
+    if result['inserted']:
+        summary_data_changed(patient.id)
+    return result
+
+
+@db_session
+def ingest_device_batch(patient_id, payload):
+    """Glucose readings, intakes and symptoms of one device submission, in one transaction"""
+    return {
+        'glucose_readings': ingest_glucose_readings(patient_id, payload.get('glucose_readings') or []),
+        'medication_intakes': ingest_medication_intakes(patient_id, payload.get('medication_intakes') or []),
+        'symptoms': ingest_symptoms(patient_id, payload.get('symptoms') or []),
+    }
+
+'''
+    Questo file (ingest.py) gestisce il caricamento massivo delle letture di glicemia
+    (esportazioni di glucometri e sensori CGM) con gli orari originali: scarta i duplicati
+    su (paziente, orario), inserisce tutto in una transazione e valuta gli alert una volta sola.
+    Registra inoltre in blocco assunzioni di farmaci e sintomi inviati dai dispositivi.
+'''
@@ -0,0 +1,163 @@
+# model/invalidation.py
+import os
+import sqlite3
+import threading
+from datetime import timedelta
+from pathlib import Path
+from pony.orm import db_session, delete
+
+from model.cache import evict_changed_patients
+from model.clock import now
+from model.database import get_db_path
+from model.user import DataChange
+
+# Seconds between two polls of the database for other processes' writes; 0 turns the watcher off
+CACHE_WATCH_INTERVAL = 1.0
+# Seconds a change-log row is kept (purged by the scheduler's housekeeping)
+DATA_CHANGE_RETENTION = 3600
+
+_lock = threading.Lock()
+_watcher = None
+
+
+class DataChangeWatcher:
+    """Follows the DataChange log of a database file on a read-only connection of its own
+
+    PRAGMA data_version only moves when another connection commits, so an idle poll is one
+    pragma and no table read. Rows are read by id from the last one seen; a gap (rows purged
+    before this watcher read them) evicts every patient.
+    """
+
+    def __init__(self, path):
+        uri = Path(path).resolve().as_uri() + '?mode=ro'
+        self.connection = sqlite3.connect(uri, uri=True, isolation_level=None, check_same_thread=False)
+        self.data_version = self.connection.execute('PRAGMA data_version').fetchone()[0]
+        self.last_id = self.connection.execute('SELECT COALESCE(MAX("id"), 0) FROM "DataChange"').fetchone()[0]
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def poll(self):
+        """Evict this process's cached reads of the patients changed since the last poll; returns their ids"""
+        data_version = self.connection.execute('PRAGMA data_version').fetchone()[0]
+        if data_version == self.data_version:
+            return []
+        self.data_version = data_version
+        rows = self.connection.execute('SELECT "id", "patient_id" FROM "DataChange" WHERE "id" > ? ORDER BY "id"',
+                                       (self.last_id,)).fetchall()
+        if not rows:
+            return []
+        patient_ids = [patient_id for _, patient_id in rows]
+        if rows[0][0] != self.last_id + 1:
+            patient_ids.append(None)
+        self.last_id = rows[-1][0]
+        evict_changed_patients(patient_ids)
+        return patient_ids
+
+    def run(self, interval):
+        while not self.stop_event.wait(interval):
+            try:
+                self.poll()
+            except Exception as e:
+                # Nothing is known about what changed: drop it all and try again next time
+                print(f"Cache invalidation watcher error: {e}")
+                evict_changed_patients([None])
+
+    def start(self, interval):
+        self.thread = threading.Thread(target=self.run, args=(interval,), name='cache-invalidation', daemon=True)
+        self.thread.start()
+
+    def is_alive(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join()
+        self.connection.close()
+
+
+def invalidation_watcher_running():
+    """Whether this process follows other processes' writes; the watcher starts on first use
+
+    Only a live thread counts: if it died, what this process knows is dropped and a new
+    watcher starts.
+    """
+    global _watcher, CACHE_WATCH_INTERVAL
+    watcher = _watcher
+    if watcher is not None and watcher.is_alive():
+        return True
+    path = get_db_path()
+    if not CACHE_WATCH_INTERVAL or path in (None, ':memory:'):
+        return False
+    with _lock:
+        if _watcher is not None and not _watcher.is_alive():
+            print("Cache invalidation watcher stopped unexpectedly, restarting it")
+            _watcher = None
+            evict_changed_patients([None])
+        if _watcher is None:
+            try:
+                watcher = DataChangeWatcher(path)
+            except sqlite3.Error as e:
+                print(f"Cache invalidation watcher disabled: {e}")
+                CACHE_WATCH_INTERVAL = 0
+                return False
+            watcher.start(CACHE_WATCH_INTERVAL)
+            _watcher = watcher
+    return True
+
+
+def stop_invalidation_watcher():
+    """Stop this process's watcher; cached reads query the data version again"""
+    global _watcher
+    with _lock:
+        watcher, _watcher = _watcher, None
+    if watcher is not None:
+        watcher.stop()
+        evict_changed_patients([None])
+
+
+def configure_invalidation_watcher(interval=None, retention=None):
+    """Change the watcher settings (a running watcher is stopped and restarts on the next cached read)"""
+    global CACHE_WATCH_INTERVAL, DATA_CHANGE_RETENTION
+    stop_invalidation_watcher()
+    if interval is not None:
+        CACHE_WATCH_INTERVAL = max(0.0, float(interval))
+    if retention is not None:
+        DATA_CHANGE_RETENTION = max(1, int(retention))
+
+
+def configure_invalidation_watcher_from_settings(settings):
+    """Apply the CACHE_WATCH_* settings of a config dict (off without the read cache or a database file)"""
+    watch = settings['READ_CACHE_ENABLED'] and settings['DATABASE_PATH'] != ':memory:'
+    configure_invalidation_watcher(
+        interval=settings['CACHE_WATCH_INTERVAL'] if watch else 0,
+        retention=settings['DATA_CHANGE_RETENTION']
+    )
+
+
+@db_session
+def purge_data_changes():
+    """Drop change-log rows older than the retention; returns the number of rows removed
+
+    Ids are AUTOINCREMENT, never reused: a watcher that fell behind the purge sees a gap.
+    """
+    cutoff = now() - timedelta(seconds=DATA_CHANGE_RETENTION)
+    return delete(c for c in DataChange if c.changed_at < cutoff)
+
+
+def _forget_watcher_after_fork():
+    """The parent's watcher thread does not exist in the child: it starts its own on first use"""
+    global _watcher, _lock
+    _watcher = None
+    _lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_forget_watcher_after_fork)
+
+'''
+    Questo file (invalidation.py) tiene aggiornata la cache delle letture quando scrivono altri
+    processi (worker, scheduler): un thread interroga PRAGMA data_version su una connessione
+    propria e, quando cambia, legge dal registro DataChange i pazienti modificati ed elimina solo
+    le loro voci, senza bisogno di un message broker.
+'''
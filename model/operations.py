@@ -1,329 +1,23 @@
 # model/operations.py
 from pony.orm import db_session, select, delete, commit, count, desc
-from werkzeug.security import generate_password_hash
 from datetime import date, datetime, timedelta
 
 from model.user import User, Patient, Doctor, GlucoseReading, Symptom, Therapy, MedicationIntake, Alert
+from model.clock import now
+from model.security import hash_password, login_slot
+from model.seed import seed_demo_data
+from model.rollups import record_glucose_reading
+from model.summary import (
+    summary_reading_added, summary_therapies_changed, summary_alerts_changed, summary_data_changed
+)
+from model.storage_format import AlertType, to_epoch
+from model.cache import cached_patient_read
+from model.alert_rules import glucose_values_payload
 
 # Database initialization
-@db_session
 def initialize_db():
-
-    # here we create our dummy data
-    if User.select().count() == 0:
-        # Create multiple doctors
-        dr_smith_user = User(username='dr_smith', password_hash=generate_password_hash('doctorpass'), role='doctor')
-        dr_smith = Doctor(user=dr_smith_user)
-
-        dr_johnson_user = User(username='dr_johnson', password_hash=generate_password_hash('doctorpass'), role='doctor')
-        dr_johnson = Doctor(user=dr_johnson_user)
-
-        dr_garcia_user = User(username='dr_garcia', password_hash=generate_password_hash('doctorpass'), role='doctor')
-        dr_garcia = Doctor(user=dr_garcia_user)
-
-        # Create multiple patients with different conditions
-        # Patient 1: Well-controlled diabetes
-        patient1_user = User(username='patient1', password_hash=generate_password_hash('patientpass'), role='patient')
-        patient1 = Patient(user=patient1_user, assigned_doctor=dr_smith)
-
-        # Patient 2: Poorly controlled diabetes with alerts
-        patient2_user = User(username='mario_rossi', password_hash=generate_password_hash('patientpass'), role='patient')
-        patient2 = Patient(user=patient2_user, assigned_doctor=dr_smith)
-
-        # Patient 3: Newly diagnosed
-        patient3_user = User(username='anna_verdi', password_hash=generate_password_hash('patientpass'), role='patient')
-        patient3 = Patient(user=patient3_user, assigned_doctor=dr_johnson)
-
-        # Patient 4: Type 1 diabetes with insulin
-        patient4_user = User(username='luca_bianchi', password_hash=generate_password_hash('patientpass'), role='patient')
-        patient4 = Patient(user=patient4_user, assigned_doctor=dr_garcia)
-
-        # Patient 5: Gestational diabetes
-        patient5_user = User(username='giulia_ferrari', password_hash=generate_password_hash('patientpass'), role='patient')
-        patient5 = Patient(user=patient5_user, assigned_doctor=dr_johnson)
-
-        # Create comprehensive therapies for each patient
-        # Patient 1 therapies (well-controlled)
-        Therapy(
-            patient=patient1,
-            doctor=dr_smith,
-            drug_name="Metformin",
-            daily_doses=2,
-            dose_amount=500,
-            dose_unit="mg",
-            instructions="Take with meals, morning and evening",
-            start_date=datetime.now() - timedelta(days=90)
-        )
-
-        # Patient 2 therapies (multiple medications)
-        Therapy(
-            patient=patient2,
-            doctor=dr_smith,
-            drug_name="Metformin",
-            daily_doses=2,
-            dose_amount=1000,
-            dose_unit="mg",
-            instructions="Take with breakfast and dinner",
-            start_date=datetime.now() - timedelta(days=180)
-        )
-
-        Therapy(
-            patient=patient2,
-            doctor=dr_smith,
-            drug_name="Glipizide",
-            daily_doses=2,
-            dose_amount=5,
-            dose_unit="mg",
-            instructions="Take 30 minutes before meals",
-            start_date=datetime.now() - timedelta(days=60)
-        )
-
-        # Patient 3 therapies (newly diagnosed - lifestyle + metformin)
-        Therapy(
-            patient=patient3,
-            doctor=dr_johnson,
-            drug_name="Metformin",
-            daily_doses=1,
-            dose_amount=500,
-            dose_unit="mg",
-            instructions="Take with dinner, increase to twice daily after 2 weeks",
-            start_date=datetime.now() - timedelta(days=14)
-        )
-
-        # Patient 4 therapies (Type 1 - insulin regimen)
-        Therapy(
-            patient=patient4,
-            doctor=dr_garcia,
-            drug_name="Insulin Glargine (Lantus)",
-            daily_doses=1,
-            dose_amount=20,
-            dose_unit="units",
-            instructions="Inject once daily at bedtime",
-            start_date=datetime.now() - timedelta(days=365)
-        )
-
-        Therapy(
-            patient=patient4,
-            doctor=dr_garcia,
-            drug_name="Insulin Lispro (Humalog)",
-            daily_doses=3,
-            dose_amount=8,
-            dose_unit="units",
-            instructions="Inject before each meal, adjust based on carb counting",
-            start_date=datetime.now() - timedelta(days=365)
-        )
-
-        # Patient 5 therapies (gestational diabetes)
-        Therapy(
-            patient=patient5,
-            doctor=dr_johnson,
-            drug_name="Insulin NPH",
-            daily_doses=2,
-            dose_amount=10,
-            dose_unit="units",
-            instructions="Morning and evening doses, monitor closely",
-            start_date=datetime.now() - timedelta(days=30)
-        )
-
-        # Create glucose readings with different patterns
-        # Patient 1: Good control (mostly normal readings)
-        for i in range(21):  # 3 weeks of data
-            day_offset = timedelta(days=i)
-            # Morning reading (before breakfast)
-            GlucoseReading(
-                patient=patient1,
-                value=85 + (i % 10) * 2,  # 85-105 range
-                measurement_time=datetime.now() - day_offset + timedelta(hours=7),
-                is_before_meal=True,
-                notes="Before breakfast" if i % 7 == 0 else ""
-            )
-            # Evening reading (after dinner)
-            GlucoseReading(
-                patient=patient1,
-                value=140 + (i % 8) * 3,  # 140-165 range
-                measurement_time=datetime.now() - day_offset + timedelta(hours=20),
-                is_before_meal=False,
-                notes="2 hours after dinner" if i % 7 == 0 else ""
-            )
-
-        # Patient 2: Poor control (high readings, some dangerous)
-        for i in range(14):  # 2 weeks of data
-            day_offset = timedelta(days=i)
-            # Morning reading (often high)
-            morning_value = 160 + (i % 15) * 4  # 160-220 range
-            GlucoseReading(
-                patient=patient2,
-                value=morning_value,
-                measurement_time=datetime.now() - day_offset + timedelta(hours=7),
-                is_before_meal=True,
-                notes="Feeling thirsty" if morning_value > 200 else ""
-            )
-            # Evening reading (very high)
-            evening_value = 200 + (i % 12) * 5  # 200-255 range
-            GlucoseReading(
-                patient=patient2,
-                value=evening_value,
-                measurement_time=datetime.now() - day_offset + timedelta(hours=20),
-                is_before_meal=False,
-                notes="Had large meal" if evening_value > 240 else ""
-            )
-
-        # Patient 3: Newly diagnosed (improving trend)
-        for i in range(14):  # 2 weeks since diagnosis
-            day_offset = timedelta(days=i)
-            # Improving trend from high to better controlled
-            trend_improvement = max(0, 30 - i * 2)  # Decreasing adjustment
-            morning_value = 140 + trend_improvement + (i % 5) * 2
-            GlucoseReading(
-                patient=patient3,
-                value=morning_value,
-                measurement_time=datetime.now() - day_offset + timedelta(hours=8),
-                is_before_meal=True,
-                notes="Learning to manage diet" if i < 3 else ""
-            )
-
-        # Patient 4: Type 1 with some variability
-        for i in range(30):  # 1 month of data
-            day_offset = timedelta(days=i)
-            # More variable readings typical of Type 1
-            morning_value = 90 + (i % 20) * 3  # 90-150 range
-            GlucoseReading(
-                patient=patient4,
-                value=morning_value,
-                measurement_time=datetime.now() - day_offset + timedelta(hours=7),
-                is_before_meal=True,
-                notes="Adjusted insulin dose" if morning_value > 140 else ""
-            )
-            # Post-meal readings
-            postmeal_value = 120 + (i % 25) * 4  # 120-220 range
-            GlucoseReading(
-                patient=patient4,
-                value=postmeal_value,
-                measurement_time=datetime.now() - day_offset + timedelta(hours=14),
-                is_before_meal=False,
-                notes="Carb counting: 45g" if i % 10 == 0 else ""
-            )
-
-        # Patient 5: Gestational diabetes (moderate control)
-        for i in range(30):  # 1 month of monitoring
-            day_offset = timedelta(days=i)
-            morning_value = 95 + (i % 12) * 2  # 95-120 range
-            GlucoseReading(
-                patient=patient5,
-                value=morning_value,
-                measurement_time=datetime.now() - day_offset + timedelta(hours=8),
-                is_before_meal=True,
-                notes="Pregnancy week " + str(28 + i//7) if i % 7 == 0 else ""
-            )
-
-
-        # Add symptoms
-        # Patient 2: Multiple symptoms due to poor control
-        Symptom(
-            patient=patient2,
-            name="Excessive thirst",
-            description="Drinking water frequently throughout the day",
-            start_date=datetime.now() - timedelta(days=10),
-            severity="medium"
-        )
-        # Patient 2: Multiple symptoms due to poor control
-        Symptom(
-            patient=patient2,
-            name="Excessive thirst",
-            description="Drinking water frequently throughout the day",
-            start_date=datetime.now() - timedelta(days=10),
-            severity="medium"
-        )
-
-        Symptom(
-            patient=patient2,
-            name="Frequent urination",
-            description="Waking up multiple times at night",
-            start_date=datetime.now() - timedelta(days=8),
-            severity="medium"
-        )
-
-        Symptom(
-            patient=patient2,
-            name="Fatigue",
-            description="Feeling tired after meals",
-            start_date=datetime.now() - timedelta(days=5),
-            severity="high"
-        )
-
-        # Patient 3: Initial symptoms (improving)
-        Symptom(
-            patient=patient3,
-            name="Blurred vision",
-            description="Difficulty focusing, especially in the morning",
-            start_date=datetime.now() - timedelta(days=14),
-            severity="low"
-        )
-
-        # Patient 4: Hypoglycemia episode
-        Symptom(
-            patient=patient4,
-            name="Hypoglycemia",
-            description="Shakiness and sweating after exercise",
-            start_date=datetime.now() - timedelta(days=3),
-            severity="high"
-        )
-
-        # Create alerts based on the data
-        # High glucose alerts for Patient 2
-        Alert(
-            patient=patient2,
-            doctor=dr_smith,
-            alert_type='glucose_high',
-            message="Glucose level 245 mg/dL after meal - immediate attention needed",
-            severity='high',
-            created_at=datetime.now() - timedelta(hours=6),
-            is_read=False
-        )
-
-        Alert(
-            patient=patient2,
-            doctor=dr_smith,
-            alert_type='compliance_issue',
-            message="Patient missed 3 medication doses this week",
-            severity='medium',
-            created_at=datetime.now() - timedelta(days=1),
-            is_read=False
-        )
-
-        # Hypoglycemia alert for Patient 4
-        Alert(
-            patient=patient4,
-            doctor=dr_garcia,
-            alert_type='glucose_low',
-            message="Patient reported hypoglycemia episode after exercise",
-            severity='high',
-            created_at=datetime.now() - timedelta(days=3),
-            is_read=True,
-            resolved_at=datetime.now() - timedelta(days=2)
-        )
-
-        # Follow-up alert for Patient 3
-        Alert(
-            patient=patient3,
-            doctor=dr_johnson,
-            alert_type='follow_up',
-            message="2-week follow-up due for newly diagnosed patient",
-            severity='low',
-            created_at=datetime.now() - timedelta(hours=12),
-            is_read=False
-        )
-
-        # Pregnancy monitoring alert for Patient 5
-        Alert(
-            patient=patient5,
-            doctor=dr_johnson,
-            alert_type='pregnancy_monitoring',
-            message="Weekly glucose monitoring due for gestational diabetes",
-            severity='medium',
-            created_at=datetime.now() - timedelta(hours=24),
-            is_read=False
-        )
+    """Seed the demo dataset (fixture with precomputed hashes, bulk insert) if the database is empty"""
+    return seed_demo_data()
 
 # User management functions
 @db_session
@@ -349,24 +43,30 @@ def add_user(username, password, role='patient'):
 
     user = User(
         username=username,
-        password_hash=generate_password_hash(password),
+        password_hash=hash_password(password),
         role=role
     )
 
     # Create corresponding Patient or Doctor record
     if role == 'patient':
-        Patient(user=user)
+        patient = Patient(user=user)
+        patient.flush()
+        # Summary row from the start, so the patient's data version exists before the first write
+        summary_data_changed(patient.id)
     elif role == 'doctor':
         Doctor(user=user)
 
     return True
 
 @db_session
-def validate_user(username, password):
-    """Validate user credentials"""
+def validate_user(username, password, client_ip=None):
+    """Validate user credentials (raises PasswordPoolBusy when login concurrency caps are hit)"""
     user = User.get(username=username)
-    if user and user.check_password(password):
-        return user
+    if not user:
+        return None
+    with login_slot(account=username, client_ip=client_ip):
+        if user.check_password(password):
+            return user
     return None
 
 @db_session
@@ -416,7 +116,8 @@ def update_patient_info(patient_id, risk_factors=None, medical_history=None, com
             patient.comorbidities = comorbidities
         if notes is not None:
             patient.notes = notes
-        
+
+        summary_data_changed(patient.id)
         return True
     except Exception as e:
         print(f"Error updating patient info: {e}")
@@ -430,14 +131,21 @@ def add_glucose_reading(patient_id, value, is_before_meal, notes=None):
     if not patient:
         return False
 
+    measurement_time = now()
     GlucoseReading(
         patient=patient,
         value=value,
-        measurement_time=datetime.now(),
+        measurement_time=measurement_time,
         is_before_meal=is_before_meal,
         notes=notes or ""
     )
 
+    # Keep the hourly/daily rollups in step: same transaction, a failure rolls the reading back
+    record_glucose_reading(patient.id, value, measurement_time, is_before_meal)
+
+    # Latest reading and weekly average of the dashboard header (reads the rollups above)
+    summary_reading_added(patient.id, value, measurement_time)
+
     # Check glucose thresholds and create alerts for doctor
     check_glucose_thresholds_and_alert(patient_id)
     
@@ -453,7 +161,7 @@ def get_patient_glucose_readings(patient_id, days=30):
     if not patient:
         return []
 
-    since_date = datetime.now() - timedelta(days=days)
+    since_date = now() - timedelta(days=days)
 
     # Use simple iteration to avoid Pony ORM decompiler issues
     readings = []
@@ -483,13 +191,29 @@ def add_therapy(patient_id, doctor_id, drug_name, daily_doses, dose_amount, dose
         dose_amount=dose_amount,
         dose_unit=dose_unit,
         instructions=instructions,
-        start_date=datetime.now()
+        start_date=now()
     )
+    summary_therapies_changed(patient.id, 1)
     return True
 
+def therapy_dict(therapy):
+    """Plain-data copy of a Therapy (cached reads never hold entities)"""
+    return {
+        'id': therapy.id,
+        'drug_name': therapy.drug_name,
+        'daily_doses': therapy.daily_doses,
+        'dose_amount': therapy.dose_amount,
+        'dose_unit': therapy.dose_unit,
+        'instructions': therapy.instructions,
+        'start_date': therapy.start_date,
+        'end_date': therapy.end_date,
+        'is_active': therapy.is_active,
+    }
+
+@cached_patient_read()
 @db_session
 def get_patient_active_therapies(patient_id):
-    """Get all active therapies for a patient"""
+    """Get all active therapies for a patient (therapy dicts, cached per data version)"""
     patient = Patient[patient_id]
     if not patient:
         return []
@@ -498,7 +222,7 @@ def get_patient_active_therapies(patient_id):
     active_therapies = []
     for therapy in patient.therapies:
         if therapy.is_active:
-            active_therapies.append(therapy)
+            active_therapies.append(therapy_dict(therapy))
 
     return active_therapies
 
@@ -514,7 +238,7 @@ def record_medication_intake(patient_id, therapy_id, dose_taken, notes=None, int
 
     # Use provided datetime or current time
     if intake_datetime is None:
-        intake_datetime = datetime.now()
+        intake_datetime = now()
 
     MedicationIntake(
         patient=patient,
@@ -523,6 +247,7 @@ def record_medication_intake(patient_id, therapy_id, dose_taken, notes=None, int
         dose_taken=dose_taken,
         notes=notes or ""
     )
+    summary_data_changed(patient.id)
 
     # Check medication compliance after recording intake
     check_medication_compliance(patient_id)
@@ -541,9 +266,10 @@ def add_symptom(patient_id, name, description=None, severity=None):
         patient=patient,
         name=name,
         description=description,
-        start_date=datetime.now(),
+        start_date=now(),
         severity=severity
     )
+    summary_data_changed(patient.id)
     return True
 
 # Alert functions
@@ -554,16 +280,17 @@ def alert_exists_recent(patient_id, alert_type, doctor_id=None, hours=24):
     if not patient:
         return False
     
-    since_time = datetime.now() - timedelta(hours=hours)
+    since_time = now() - timedelta(hours=hours)
     
     # Split the complex query into simpler parts to avoid decompilation issues
     recent_alerts = select(a for a in patient.alerts 
-                          if a.alert_type == alert_type 
-                          and a.created_at >= since_time
+                          if a.created_at >= since_time
                           and not a.is_read)[:]
     
-    # Filter by doctor separately to avoid complex query conditions
+    # Alert types are stored as codes: filter type and doctor in Python
     for alert in recent_alerts:
+        if alert.alert_type != alert_type:
+            continue
         if doctor_id:
             if alert.doctor and alert.doctor.id == doctor_id:
                 return True
@@ -574,8 +301,12 @@ def alert_exists_recent(patient_id, alert_type, doctor_id=None, hours=24):
     return False
 
 @db_session
-def create_alert(patient_id, alert_type, message, severity='medium', doctor_id=None):
-    """Create an alert for glucose levels or medication compliance"""
+def create_alert(patient_id, alert_type, message, severity='medium', doctor_id=None, rule='', payload=None):
+    """Create an alert for glucose levels or medication compliance
+
+    Alerts raised by a rule (model/alert_rules.py) pass message=None with the rule name and
+    its payload; the text is rendered when the alert is displayed (alert_text()).
+    """
     try:
         patient = Patient.get(id=patient_id)
         if not patient:
@@ -592,17 +323,22 @@ def create_alert(patient_id, alert_type, message, severity='medium', doctor_id=N
             patient=patient,
             doctor=doctor,
             alert_type=alert_type,
-            message=message,
+            message=message or '',
+            rule=rule,
+            payload=payload or {},
             severity=severity,
-            created_at=datetime.now()
+            created_at=now()
         )
-        return True
     except Exception as e:
         print(f"Error creating alert: {e}")
         return False
 
+    # Outside the catch-all: if the counter cannot follow, the alert is rolled back with it
+    summary_alerts_changed(patient.id, 1)
+    return True
+
 @db_session
-def create_doctor_alert(doctor_id, patient_id, alert_type, message, severity='medium'):
+def create_doctor_alert(doctor_id, patient_id, alert_type, message, severity='medium', rule='', payload=None):
     """Create an alert primarily for a doctor about a patient"""
     try:
         doctor = Doctor.get(id=doctor_id)
@@ -620,24 +356,29 @@ def create_doctor_alert(doctor_id, patient_id, alert_type, message, severity='me
             patient=patient,
             doctor=doctor,
             alert_type=alert_type,
-            message=message,
+            message=message or '',
+            rule=rule,
+            payload=payload or {},
             severity=severity,
-            created_at=datetime.now()
+            created_at=now()
         )
-        return True
     except Exception as e:
         print(f"Error creating doctor alert: {e}")
         return False
 
+    # Outside the catch-all: if the counter cannot follow, the alert is rolled back with it
+    summary_alerts_changed(patient.id, 1)
+    return True
+
 @db_session
 def get_unread_alerts(doctor_id=None, patient_id=None):
     """Get unread alerts for a doctor or patient, ordered by creation date (most recent first)"""
     if doctor_id:
         doctor = Doctor[doctor_id]
-        return select(a for a in doctor.alerts if not a.is_read)[:]
+        return select(a for a in doctor.alerts if not a.is_read).order_by(lambda a: (desc(a.created_at), desc(a.id)))[:]
     elif patient_id:
         patient = Patient[patient_id]
-        return select(a for a in patient.alerts if not a.is_read)[:]
+        return select(a for a in patient.alerts if not a.is_read).order_by(lambda a: (desc(a.created_at), desc(a.id)))[:]
     return []
 
 # Alert checking functions
@@ -649,11 +390,10 @@ def check_glucose_alerts(patient_id):
         return
 
     # Get recent glucose readings (last 24 hours)
-    recent_readings = []
-    cutoff_time = datetime.now() - timedelta(hours=24)
-    for reading in patient.glucose_readings:
-        if reading.measurement_time >= cutoff_time:
-            recent_readings.append(reading)
+    cutoff_time = now() - timedelta(hours=24)
+    recent_readings = select(
+        r for r in GlucoseReading if r.patient == patient and r.measurement_time >= cutoff_time
+    )[:]
 
     for reading in recent_readings:
         if reading.is_before_meal and (reading.value < 80 or reading.value > 130):
@@ -661,18 +401,22 @@ def check_glucose_alerts(patient_id):
             create_alert(
                 patient_id,
                 'glucose_abnormal',
-                f"Glucose level {reading.value} mg/dL before meal (normal: 80-130 mg/dL)",
+                None,
                 severity,
-                patient.assigned_doctor.id if patient.assigned_doctor else None
+                patient.assigned_doctor.id if patient.assigned_doctor else None,
+                rule='glucose_before_meal',
+                payload={'value': reading.value}
             )
         elif not reading.is_before_meal and reading.value > 180:
             severity = 'high' if reading.value > 250 else 'medium'
             create_alert(
                 patient_id,
                 'glucose_abnormal',
-                f"Glucose level {reading.value} mg/dL after meal (should be <180 mg/dL)",
+                None,
                 severity,
-                patient.assigned_doctor.id if patient.assigned_doctor else None
+                patient.assigned_doctor.id if patient.assigned_doctor else None,
+                rule='glucose_after_meal',
+                payload={'value': reading.value}
             )
 
 # Medication compliance functions
@@ -685,17 +429,20 @@ def check_medication_compliance(patient_id):
             return
 
         # Get all active therapies for the patient
-        active_therapies = []
-        for therapy in patient.therapies:
-            if therapy.is_active:
-                active_therapies.append(therapy)
+        active_therapies = select(t for t in Therapy if t.patient == patient and t.is_active)[:]
 
         if not active_therapies:
             return
 
-        current_date = datetime.now().date()
+        current_date = now().date()
+        window_start = datetime.combine(current_date - timedelta(days=2), datetime.min.time())
 
         for therapy in active_therapies:
+            # Intakes of the last 3 days, one query per therapy rather than its whole history
+            intake_dates = [mi.intake_time.date() for mi in select(
+                mi for mi in MedicationIntake if mi.therapy == therapy and mi.intake_time >= window_start
+            )]
+
             # Check last 3 days for each therapy
             missing_days = 0
             consecutive_missing_days = 0
@@ -707,10 +454,7 @@ def check_medication_compliance(patient_id):
                 expected_intakes = therapy.daily_doses
 
                 # Get actual intakes for this day
-                actual_intakes = 0
-                for mi in therapy.medication_intakes:
-                    if mi.intake_time.date() == check_date:
-                        actual_intakes += 1
+                actual_intakes = intake_dates.count(check_date)
 
                 # Check if patient is missing doses for this day
                 if actual_intakes < expected_intakes:
@@ -726,8 +470,10 @@ def check_medication_compliance(patient_id):
                 create_alert(
                     patient_id,
                     'medication_compliance',
-                    f"You haven't recorded taking {therapy.drug_name} for {consecutive_missing_days} consecutive days. Please remember to take your medication as prescribed.",
-                    'high'
+                    None,
+                    'high',
+                    rule='missed_doses',
+                    payload={'therapy': therapy.id, 'days': consecutive_missing_days}
                 )
 
                 if patient.assigned_doctor:
@@ -735,8 +481,10 @@ def check_medication_compliance(patient_id):
                         patient.assigned_doctor.id,
                         patient_id,
                         'patient_non_compliance',
-                        f"Patient {patient.user.username} has not recorded taking {therapy.drug_name} for {consecutive_missing_days} consecutive days.",
-                        'high'
+                        None,
+                        'high',
+                        rule='patient_missed_doses',
+                        payload={'therapy': therapy.id, 'days': consecutive_missing_days}
                     )
 
             elif missing_days >= 2:
@@ -744,13 +492,20 @@ def check_medication_compliance(patient_id):
                 create_alert(
                     patient_id,
                     'medication_reminder',
-                    f"Reminder: Please remember to record your {therapy.drug_name} intake. You've missed recording for {missing_days} days in the last 3 days.",
-                    'medium'
+                    None,
+                    'medium',
+                    rule='dose_reminder',
+                    payload={'therapy': therapy.id, 'days': missing_days}
                 )
     except Exception as e:
         print(f"Error checking compliance for patient {patient_id}: {e}")
         return
 
+@db_session
+def get_patient_ids():
+    """Ids of all patients, for sweeps that check one patient per write job"""
+    return list(select(p.id for p in Patient))
+
 @db_session
 def check_all_patients_compliance():
     """Check medication compliance for all patients - to be called periodically"""
@@ -774,9 +529,10 @@ def check_all_patients_compliance():
         else:
             raise
 
+@cached_patient_read(key=lambda patient_id, days=7: (days, now().date()))
 @db_session
 def get_therapy_compliance_status(patient_id, days=7):
-    """Get detailed compliance status for a patient's therapies over specified days"""
+    """Get detailed compliance status for a patient's therapies over specified days (cached per data version and day)"""
     patient = Patient[patient_id]
     if not patient:
         return []
@@ -789,7 +545,7 @@ def get_therapy_compliance_status(patient_id, days=7):
 
     compliance_data = []
 
-    current_date = datetime.now().date()
+    current_date = now().date()
 
     for therapy in active_therapies:
         total_expected = 0
@@ -816,7 +572,7 @@ def get_therapy_compliance_status(patient_id, days=7):
         compliance_percentage = (total_actual / total_expected * 100) if total_expected > 0 else 0
 
         compliance_data.append({
-            'therapy': therapy,
+            'therapy': therapy_dict(therapy),
             'compliance_percentage': round(compliance_percentage, 1),
             'total_expected': total_expected,
             'total_actual': total_actual,
@@ -826,6 +582,16 @@ def get_therapy_compliance_status(patient_id, days=7):
 
     return compliance_data
 
+def classify_glucose_reading(value, is_before_meal):
+    """Doctor alert level of one reading: 'critical', 'high' or None"""
+    # Critical thresholds (immediate attention)
+    if (is_before_meal and (value < 60 or value > 200)) or (not is_before_meal and value > 300):
+        return 'critical'
+    # High concern thresholds
+    if (is_before_meal and (value < 70 or value > 160)) or (not is_before_meal and value > 220):
+        return 'high'
+    return None
+
 @db_session
 def check_glucose_thresholds_and_alert(patient_id):
     """Enhanced glucose alert system with different severity levels for doctors"""
@@ -834,49 +600,55 @@ def check_glucose_thresholds_and_alert(patient_id):
         return
 
     # Get recent glucose readings (last 24 hours)
-    recent_readings = []
-    cutoff_time = datetime.now() - timedelta(hours=24)
-    for reading in patient.glucose_readings:
-        if reading.measurement_time >= cutoff_time:
-            recent_readings.append(reading)
+    cutoff_time = now() - timedelta(hours=24)
+    recent_readings = select(
+        r for r in GlucoseReading if r.patient == patient and r.measurement_time >= cutoff_time
+    )[:]
 
     critical_readings = []
     high_readings = []
 
     for reading in recent_readings:
-        # Critical thresholds (immediate attention)
-        if (reading.is_before_meal and (reading.value < 60 or reading.value > 200)) or \
-           (not reading.is_before_meal and reading.value > 300):
+        level = classify_glucose_reading(reading.value, reading.is_before_meal)
+        if level == 'critical':
             critical_readings.append(reading)
-
-        # High concern thresholds
-        elif (reading.is_before_meal and (reading.value < 70 or reading.value > 160)) or \
-             (not reading.is_before_meal and reading.value > 220):
+        elif level == 'high':
             high_readings.append(reading)
 
     # Create alerts for doctor with different severity
     if critical_readings and patient.assigned_doctor:
         for reading in critical_readings:
-            meal_status = "before meal" if reading.is_before_meal else "after meal"
             create_alert(
                 patient_id,
                 'glucose_critical',
-                f"CRITICAL: Patient {patient.user.username} glucose {reading.value} mg/dL {meal_status} at {reading.measurement_time.strftime('%H:%M')}",
+                None,
                 'high',
-                patient.assigned_doctor.id
+                patient.assigned_doctor.id,
+                rule='glucose_critical_reading',
+                payload={'value': reading.value, 'meal': 'before' if reading.is_before_meal else 'after',
+                         'at': to_epoch(reading.measurement_time)}
             )
 
     if high_readings and patient.assigned_doctor:
         # Summarize high readings in one alert to avoid spam
-        reading_summary = ", ".join([f"{r.value} mg/dL" for r in high_readings])
         create_alert(
             patient_id,
             'glucose_elevated',
-            f"Patient {patient.user.username} has elevated glucose readings in last 24h: {reading_summary}",
+            None,
             'medium',
-            patient.assigned_doctor.id
+            patient.assigned_doctor.id,
+            rule='glucose_elevated_readings',
+            payload=glucose_values_payload([r.value for r in high_readings])
         )
 
+def _unresolved_alerts(alert_types, patient_id=None):
+    """Unresolved alerts of the given types (of one patient), compared against the stored codes in SQL"""
+    codes = ', '.join(str(AlertType.code(alert_type)) for alert_type in alert_types)
+    sql = f'SELECT * FROM "Alert" WHERE "resolved_at" IS NULL AND "alert_type" IN ({codes})'
+    if patient_id is None:
+        return Alert.select_by_sql(sql)
+    return Alert.select_by_sql(sql + ' AND "patient" = $patient_id', {'patient_id': patient_id})
+
 @db_session
 def clear_compliance_alerts_for_patient(patient_id):
     """
@@ -889,25 +661,28 @@ def clear_compliance_alerts_for_patient(patient_id):
             return False
 
         # Find all unresolved compliance alerts for this patient
-        compliance_alerts = []
-        for alert in Alert.select():
-            if (alert.patient == patient and
-                alert.alert_type in ['compliance_issue', 'medication_missed'] and
-                alert.resolved_at is None):
-                compliance_alerts.append(alert)
+        compliance_alerts = _unresolved_alerts(['compliance_issue', 'medication_missed'], patient.id)
 
         # Risolvi tutti gli alert di compliance
+        unread_cleared = 0
         for alert in compliance_alerts:
-            alert.resolved_at = datetime.now()
+            if not alert.is_read:
+                unread_cleared += 1
+            alert.resolved_at = now()
             alert.is_read = True
         
         print(f"Cleared {len(compliance_alerts)} compliance alerts for patient {patient.user.username}")
-        return True
 
     except Exception as e:
         print(f" Error clearing compliance alerts: {e}")
         return False
 
+    if unread_cleared:
+        summary_alerts_changed(patient.id, -unread_cleared)
+    elif compliance_alerts:
+        summary_data_changed(patient.id)
+    return True
+
 @db_session
 def check_and_clear_compliance_alerts(patient_id):
     """
@@ -920,12 +695,10 @@ def check_and_clear_compliance_alerts(patient_id):
             return False
 
         # Check if patient is now compliant (has taken medications in last 2 days)
-        recent_intakes = 0
-        cutoff_time = datetime.now() - timedelta(days=2)
-        for mi in MedicationIntake.select():
-            if (mi.therapy.patient == patient and
-                mi.intake_time >= cutoff_time):
-                recent_intakes += 1
+        cutoff_time = now() - timedelta(days=2)
+        recent_intakes = select(
+            mi for mi in MedicationIntake if mi.therapy.patient == patient and mi.intake_time >= cutoff_time
+        ).count()
 
         # Se ha preso farmaci di recente, rimuovi gli alert di compliance
         if recent_intakes > 0:
@@ -953,59 +726,37 @@ def clear_all_compliance_alerts():
             'medication_missed'
         ]
         
-        # Get all alerts and filter manually to avoid complex Pony ORM queries
-        # Use a fresh query each time to avoid transaction conflicts
+        # Only the unresolved ones, filtered in SQL: the sweep does not read every alert
+        compliance_alerts = _unresolved_alerts(compliance_alert_types)
+
         cleared_count = 0
-        
-        # Process alerts in small batches to avoid long-running transactions
-        batch_size = 10
-        while True:
-            batch_cleared = 0
-            
-            # Get a fresh batch of unresolved compliance alerts
-            try:
-                alerts_batch = []
-                for alert in Alert.select():
-                    if (alert.resolved_at is None and 
-                        alert.alert_type in compliance_alert_types):
-                        alerts_batch.append(alert)
-                        if len(alerts_batch) >= batch_size:
-                            break
-                
-                if not alerts_batch:
-                    break  # No more alerts to process
-                
-                # Update this batch
-                for alert in alerts_batch:
-                    try:
-                        # Check if alert is still unresolved (avoid race conditions)
-                        if alert.resolved_at is None:
-                            alert.resolved_at = datetime.now()
-                            alert.is_read = True
-                            batch_cleared += 1
-                    except Exception:
-                        # Skip this alert if there's a transaction conflict
-                        continue
-                
-                cleared_count += batch_cleared
-                
-                # If we processed less than batch_size, we're done
-                if len(alerts_batch) < batch_size:
-                    break
-                    
-            except Exception as e:
-                # If there's any transaction error, just break and report what we cleared
-                print(f"Transaction conflict during alert clearing: {e}")
-                break
+        unread_cleared = {}
+        resolved_patients = set()
+        for alert in compliance_alerts:
+            patient_id = alert.patient.id
+            resolved_patients.add(patient_id)
+            if not alert.is_read:
+                unread_cleared[patient_id] = unread_cleared.get(patient_id, 0) + 1
+            alert.resolved_at = now()
+            alert.is_read = True
+            cleared_count += 1
         
         if cleared_count > 0:
             print(f"Cleared {cleared_count} existing compliance alerts before generating new ones")
-        return cleared_count
         
     except Exception as e:
         print(f"Error clearing all compliance alerts: {e}")
         return 0
 
+    # Keep the unread counters of the patient summaries in step (both bump the data version);
+    # a failure here propagates and rolls the sweep back instead of leaving them off
+    for patient_id in resolved_patients:
+        if patient_id in unread_cleared:
+            summary_alerts_changed(patient_id, -unread_cleared[patient_id])
+        else:
+            summary_data_changed(patient_id)
+    return cleared_count
+
 '''
     Questo file (operations.py) contiene tutte le operazioni del database per il sistema.
     Include funzioni per gestire utenti, pazienti, dottori, letture della glicemia,
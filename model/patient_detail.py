@@ -0,0 +1,149 @@
+# model/patient_detail.py
+from datetime import timedelta
+from pony.orm import db_session
+
+from model.clock import now
+from model.database import db, to_db_datetime, from_db_datetime
+from model.rollups import TARGET_RANGES, day_bucket, get_glucose_series
+from model.cache import cached_patient_read
+from model.downsampling import downsample, envelope
+
+# Glucose chart ranges in days; up to RAW_CHART_MAX_DAYS the chart plots single readings,
+# longer ranges plot hourly rollups (average line, min/max band), and every series is downsampled
+# to CHART_TARGET_POINTS
+CHART_RANGES = (7, 30, 90, 365)
+CHART_DEFAULT_DAYS = 30
+RAW_CHART_MAX_DAYS = 30
+CHART_TARGET_POINTS = 500
+
+# Windows of the doctor's patient view (whole days, today included)
+COMPLIANCE_DAYS = 7
+RECENT_READINGS_DAYS = 7
+RECENT_READINGS_LIMIT = 10
+
+
+def _compliance(patient_id, today):
+    """Active therapies with the share of expected doses taken in the last COMPLIANCE_DAYS days"""
+    since = today - timedelta(days=COMPLIANCE_DAYS - 1)
+    rows = db.select(
+        'SELECT t."id", t."drug_name", t."dose_amount", t."dose_unit", t."daily_doses", '
+        '(SELECT COUNT(*) FROM "MedicationIntake" mi WHERE mi."therapy" = t."id" '
+        'AND mi."intake_time" >= $since AND mi."intake_time" < $until) '
+        'FROM "Therapy" t WHERE t."patient" = $patient_id AND t."is_active" ORDER BY t."id"',
+        {'patient_id': patient_id, 'since': to_db_datetime(since),
+         'until': to_db_datetime(today + timedelta(days=1))}
+    )
+    therapies = []
+    for therapy_id, drug_name, dose_amount, dose_unit, daily_doses, taken in rows:
+        expected = daily_doses * COMPLIANCE_DAYS
+        therapies.append({
+            'id': therapy_id,
+            'drug_name': drug_name,
+            'dose_amount': dose_amount,
+            'dose_unit': dose_unit,
+            'daily_doses': daily_doses,
+            'compliance_percentage': round(taken / expected * 100, 1) if expected > 0 else 0,
+        })
+    return therapies
+
+
+def _recent_readings(patient_id, today):
+    """Latest readings of the last RECENT_READINGS_DAYS days, most recent first"""
+    rows = db.select(
+        'SELECT "measurement_time", "value", "is_before_meal" FROM "GlucoseReading" '
+        'WHERE "patient" = $patient_id AND "measurement_time" >= $since '
+        'ORDER BY "measurement_time" DESC, "id" DESC LIMIT $limit',
+        {'patient_id': patient_id, 'limit': RECENT_READINGS_LIMIT,
+         'since': to_db_datetime(today - timedelta(days=RECENT_READINGS_DAYS - 1))}
+    )
+    return [{'measurement_time': from_db_datetime(measurement_time), 'value': value,
+             'is_before_meal': bool(is_before_meal)}
+            for measurement_time, value, is_before_meal in rows]
+
+
+def _chart_points(patient_id, days, until):
+    """(time, value) points per meal timing, oldest first, and the (time, min, max) bands
+
+    Readings have no band (None). Hourly buckets give their average as the point and their
+    min and max as the band: the rollups do not record when within the hour those happened.
+    """
+    points = {True: [], False: []}
+    if days <= RAW_CHART_MAX_DAYS:
+        rows = db.select(
+            'SELECT "measurement_time", "value", "is_before_meal" FROM "GlucoseReading" '
+            'WHERE "patient" = $patient_id AND "measurement_time" >= $since '
+            'ORDER BY "measurement_time", "id"',
+            {'patient_id': patient_id, 'since': to_db_datetime(until - timedelta(days=days))}
+        )
+        for measurement_time, value, is_before_meal in rows:
+            points[bool(is_before_meal)].append((from_db_datetime(measurement_time), value))
+        return points, None
+    bands = {True: [], False: []}
+    for bucket in get_glucose_series(patient_id, days=days, granularity='hour', until=until):
+        points[bucket['is_before_meal']].append((bucket['bucket_start'], bucket['average']))
+        bands[bucket['is_before_meal']].append((bucket['bucket_start'], bucket['min'], bucket['max']))
+    return points, bands
+
+
+@cached_patient_read(key=lambda patient_id, days=CHART_DEFAULT_DAYS: (int(days), day_bucket(now())))
+@db_session
+def get_glucose_chart(patient_id, days=CHART_DEFAULT_DAYS):
+    """Glucose chart of the last `days` days (one of CHART_RANGES), one series per meal timing
+
+    Each series is downsampled to at most CHART_TARGET_POINTS points (LTTB), keeping the readings
+    outside its target range, so the range picks the resolution: minutes for a week, hours
+    for a year. 'total' is the number of points before downsampling. Hourly series also have
+    a 'band' of (time, min, max) rows, reduced to the same budget; it is None for readings.
+    """
+    days = int(days)
+    if days not in CHART_RANGES:
+        raise ValueError(f"Unsupported chart range: {days} days")
+    points, bands = _chart_points(int(patient_id), days, now())
+    series = []
+    for is_before_meal in (True, False):
+        low, high = TARGET_RANGES[is_before_meal]
+        series.append({
+            'is_before_meal': is_before_meal,
+            'points': downsample(points[is_before_meal], CHART_TARGET_POINTS, low, high),
+            'band': envelope(bands[is_before_meal], CHART_TARGET_POINTS) if bands else None,
+            'total': len(points[is_before_meal]),
+        })
+    return {'days': days, 'readings': days <= RAW_CHART_MAX_DAYS, 'series': series}
+
+
+@cached_patient_read(key=lambda patient_id: day_bucket(now()))
+@db_session
+def get_patient_detail(patient_id):
+    """Everything the doctor's patient view shows, as plain data; None for an unknown patient
+
+    Profile, therapy compliance, the glucose chart (default range) and recent readings are
+    read with one query each. The bundle is cached per (patient, data version, day): any write to the
+    patient's data bumps the version, so a cached bundle is reused only while it is current.
+    """
+    patient_id = int(patient_id)
+    today = day_bucket(now())
+    rows = db.select(
+        'SELECT u."username", p."risk_factors", p."medical_history", p."comorbidities" '
+        'FROM "Patient" p JOIN "User" u ON u."id" = p."user" WHERE p."id" = $patient_id',
+        {'patient_id': patient_id}
+    )
+    if not rows:
+        return None
+    username, risk_factors, medical_history, comorbidities = rows[0]
+    return {
+        'patient_id': patient_id,
+        'username': username,
+        'risk_factors': risk_factors or '',
+        'medical_history': medical_history or '',
+        'comorbidities': comorbidities or '',
+        'therapies': _compliance(patient_id, today),
+        'glucose_chart': get_glucose_chart(patient_id),
+        'recent_readings': _recent_readings(patient_id, today),
+    }
+
+'''
+    Questo file (patient_detail.py) raccoglie in un unico pacchetto di dati semplici tutto ciò che
+    mostra la scheda paziente del medico: anagrafica, aderenza alle terapie, grafico della glicemia
+    (ridotto a un numero fisso di punti per l'intervallo scelto) e ultime letture. Il pacchetto è letto con poche query e tenuto in cache per
+    paziente e versione dei dati, quindi viene ricalcolato solo dopo una modifica.
+'''
@@ -0,0 +1,197 @@
+# model/query_log.py
+import os
+import re
+import sys
+import threading
+from collections import deque
+from datetime import datetime
+from time import perf_counter
+
+# Queries slower than this are recorded in the slow-query log (milliseconds)
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_MS', '100'))
+
+# Bounds for the in-memory log and for the per-fingerprint duration samples
+SLOW_QUERY_LOG_SIZE = 500
+FINGERPRINT_SAMPLE_SIZE = 1000
+
+_lock = threading.Lock()
+_slow_queries = deque(maxlen=SLOW_QUERY_LOG_SIZE)
+_fingerprints = {}
+_fingerprint_cache = {}
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_VALUES_LIST = re.compile(r"\bVALUES\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+class _FingerprintStats:
+    """Aggregated timings for one normalized SQL statement"""
+
+    def __init__(self, fingerprint, sql):
+        self.fingerprint = fingerprint
+        self.example_sql = sql
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.slow_count = 0
+        self.samples = deque(maxlen=FINGERPRINT_SAMPLE_SIZE)
+
+    def add(self, duration_ms, is_slow):
+        self.count += 1
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+        if is_slow:
+            self.slow_count += 1
+        self.samples.append(duration_ms)
+
+    def p95(self):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def as_dict(self):
+        return {
+            'fingerprint': self.fingerprint,
+            'example_sql': self.example_sql,
+            'count': self.count,
+            'total_ms': round(self.total_ms, 3),
+            'avg_ms': round(self.total_ms / self.count, 3) if self.count else 0.0,
+            'p95_ms': round(self.p95(), 3),
+            'max_ms': round(self.max_ms, 3),
+            'slow_count': self.slow_count
+        }
+
+
+def fingerprint_sql(sql):
+    """Normalize a SQL statement so that queries differing only in literals share a key"""
+    fingerprint = _fingerprint_cache.get(sql)
+    if fingerprint is not None:
+        return fingerprint
+
+    normalized = _STRING_LITERAL.sub('?', sql)
+    normalized = _NUMBER_LITERAL.sub('?', normalized)
+    normalized = _IN_LIST.sub('IN (?...)', normalized)
+    normalized = _VALUES_LIST.sub('VALUES (?...)', normalized)
+    normalized = _WHITESPACE.sub(' ', normalized).strip()
+
+    # Pony generates a bounded set of statements, so the cache stays small
+    if len(_fingerprint_cache) < 10000:
+        _fingerprint_cache[sql] = normalized
+    return normalized
+
+
+def _calling_operation():
+    """Return 'module.function' of the nearest application frame that issued the query"""
+    fallback = None
+    frame = sys._getframe(2)
+    while frame is not None:
+        module = frame.f_globals.get('__name__', '')
+        if module != __name__ and not module.startswith('pony'):
+            if module.startswith(('model.', 'controller.', 'scheduler')):
+                return f"{module}.{frame.f_code.co_name}"
+            if fallback is None:
+                fallback = f"{module}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return fallback
+
+
+def _format_arguments(arguments, limit=200):
+    if arguments is None:
+        return None
+    text = repr(arguments)
+    return text if len(text) <= limit else text[:limit] + '...'
+
+
+def record_query(sql, arguments, duration_ms):
+    """Record one executed statement in the aggregate view and, if slow, in the slow log"""
+    is_slow = duration_ms >= SLOW_QUERY_THRESHOLD_MS
+    fingerprint = fingerprint_sql(sql)
+
+    with _lock:
+        stats = _fingerprints.get(fingerprint)
+        if stats is None:
+            stats = _fingerprints[fingerprint] = _FingerprintStats(fingerprint, sql)
+        stats.add(duration_ms, is_slow)
+
+    if is_slow:
+        entry = {
+            'timestamp': datetime.now(),
+            'duration_ms': round(duration_ms, 3),
+            'sql': sql,
+            'arguments': _format_arguments(arguments),
+            'operation': _calling_operation(),
+            'fingerprint': fingerprint
+        }
+        with _lock:
+            _slow_queries.append(entry)
+        print(f"[SlowQuery] {entry['duration_ms']}ms in {entry['operation'] or 'unknown'}: "
+              f"{_WHITESPACE.sub(' ', sql)[:300]} -- args={entry['arguments']}")
+
+
+def install_query_log(database, threshold_ms=None):
+    """Wrap the Pony database so that every executed statement is timed
+
+    threshold_ms sets the slow-query threshold for the whole process; None keeps the current one.
+    """
+    global SLOW_QUERY_THRESHOLD_MS
+    if threshold_ms is not None:
+        SLOW_QUERY_THRESHOLD_MS = float(threshold_ms)
+
+    if getattr(database, '_query_log_installed', False):
+        return
+
+    original_exec_sql = database._exec_sql
+
+    def timed_exec_sql(sql, arguments=None, returning_id=False, start_transaction=False):
+        start = perf_counter()
+        try:
+            return original_exec_sql(sql, arguments, returning_id, start_transaction)
+        finally:
+            record_query(sql, arguments, (perf_counter() - start) * 1000)
+
+    database._exec_sql = timed_exec_sql
+    database._query_log_installed = True
+
+
+def get_slow_queries(limit=None):
+    """Return the most recent slow queries, newest first"""
+    with _lock:
+        entries = list(_slow_queries)
+    entries.reverse()
+    return entries[:limit] if limit else entries
+
+
+def get_query_fingerprints(order_by='total_ms', limit=None):
+    """Return per-fingerprint aggregates (count, total time, p95) sorted by the given field"""
+    with _lock:
+        rows = [stats.as_dict() for stats in _fingerprints.values()]
+    rows.sort(key=lambda row: row[order_by], reverse=True)
+    return rows[:limit] if limit else rows
+
+
+def format_query_report(limit=20):
+    """Human-readable report of the most expensive statements"""
+    lines = [f"{'count':>8} {'total ms':>12} {'p95 ms':>10} {'max ms':>10}  statement"]
+    for row in get_query_fingerprints(limit=limit):
+        lines.append(
+            f"{row['count']:>8} {row['total_ms']:>12.1f} {row['p95_ms']:>10.2f} "
+            f"{row['max_ms']:>10.2f}  {row['fingerprint'][:160]}"
+        )
+    return "\n".join(lines)
+
+
+def reset_query_log():
+    """Clear the slow-query log and the fingerprint aggregates"""
+    with _lock:
+        _slow_queries.clear()
+        _fingerprints.clear()
+
+'''
+    Questo file (query_log.py) registra le query SQL generate da Pony ORM.
+    Misura la durata di ogni istruzione, salva le query lente (testo, parametri,
+    durata e operazione chiamante) e aggrega i tempi per impronta normalizzata.
+'''
@@ -0,0 +1,208 @@
+# model/reads.py
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from time import perf_counter
+from pony.orm import db_session
+from pony.orm import core as pony_core
+from pony.orm.dbproviders.sqlite import SQLitePool
+
+from model.database import db, get_db_path, storage_connection_pragmas
+
+# Read pool settings: dashboard reads run on read-only connections (WAL lets them proceed while
+# the writer commits). Disabled = reads use the thread's normal Pony connection, as for ':memory:'.
+READ_POOL_ENABLED = True
+READ_POOL_SIZE = 4
+READ_POOL_TIMEOUT = 2.0  # seconds waiting for a free connection before reading on the primary one
+
+_pool = None
+_lock = threading.Lock()
+_local = threading.local()
+
+_stats_lock = threading.Lock()
+_stats = {'opened': 0, 'acquired': 0, 'waited': 0, 'fallbacks': 0, 'dropped': 0, 'wait_ms_total': 0.0}
+
+
+class _ReadPool:
+    """Bounded set of read-only SQLite connections shared by the request threads"""
+
+    def __init__(self, path, size):
+        self.uri = f"{Path(os.path.abspath(path)).as_uri()}?mode=ro"
+        self.size = size
+        self.idle = queue.LifoQueue()
+        self.opened = 0
+        self.lock = threading.Lock()
+
+    def _open(self):
+        # Pony's own SQLite pool opens it, so Pony's SQL functions and foreign keys are set up
+        opener = SQLitePool(False, self.uri, True, uri=True, check_same_thread=False)
+        opener._connect()
+        connection = opener.con
+        cursor = connection.cursor()
+        for name, value in storage_connection_pragmas().items():
+            if name not in ('auto_vacuum', 'journal_mode'):  # stored in the file; cannot be set read-only
+                cursor.execute(f'PRAGMA {name} = {value}')
+        cursor.execute('PRAGMA query_only = ON')
+        with _stats_lock:
+            _stats['opened'] += 1
+        return connection
+
+    def acquire(self, timeout):
+        """A connection, or None when all of them stay busy for `timeout` seconds"""
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self.lock:
+            if self.opened < self.size:
+                self.opened += 1
+                try:
+                    return self._open()
+                except Exception:
+                    self.opened -= 1
+                    raise
+        start = perf_counter()
+        try:
+            connection = self.idle.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        with _stats_lock:
+            _stats['waited'] += 1
+            _stats['wait_ms_total'] += (perf_counter() - start) * 1000
+        return connection
+
+    def release(self, connection):
+        self.idle.put(connection)
+
+    def discard(self):
+        """A connection was closed by Pony after an error: let a new one be opened"""
+        with self.lock:
+            self.opened -= 1
+        with _stats_lock:
+            _stats['dropped'] += 1
+
+    def close(self):
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def configure_read_pool(enabled=None, size=None, timeout=None):
+    """Change the read pool settings (idle connections are closed; busy ones finish first)"""
+    global READ_POOL_ENABLED, READ_POOL_SIZE, READ_POOL_TIMEOUT, _pool
+    with _lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+        if enabled is not None:
+            READ_POOL_ENABLED = bool(enabled)
+        if size is not None:
+            READ_POOL_SIZE = max(1, int(size))
+        if timeout is not None:
+            READ_POOL_TIMEOUT = float(timeout)
+
+
+def configure_read_pool_from_settings(settings):
+    """Apply the READ_POOL_* settings of a config dict (the pool is bypassed for ':memory:' databases)"""
+    configure_read_pool(
+        enabled=settings['READ_POOL_ENABLED'] and settings['DATABASE_PATH'] != ':memory:',
+        size=settings['READ_POOL_SIZE'],
+        timeout=settings['READ_POOL_TIMEOUT']
+    )
+
+
+def _get_pool():
+    """The pool of this process, created on first use; None when reads use the primary connection"""
+    global _pool
+    path = get_db_path()
+    if not READ_POOL_ENABLED or path in (None, ':memory:'):
+        return None
+    with _lock:
+        if _pool is None:
+            _pool = _ReadPool(path, READ_POOL_SIZE)
+        return _pool
+
+
+def _forget_pool_after_fork():
+    """SQLite connections must not cross fork: the child opens its own"""
+    global _pool, _lock
+    _pool = None
+    _lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_forget_pool_after_fork)
+
+
+def in_read_only_session():
+    """True inside a read_session() running on a read-only connection"""
+    return getattr(_local, 'read_only', False)
+
+
+@contextmanager
+def read_session(read_your_writes=False):
+    """db_session on a read-only pooled connection; usable as a decorator: @read_session()
+
+    read_your_writes=True reads on the thread's primary connection instead, for the callback
+    that has just written (an inline write is only visible to its own session until commit).
+    Nested in an open db_session, the outer session is used as is.
+    """
+    pool = None
+    if not read_your_writes and pony_core.local.db_session is None:
+        pool = _get_pool()
+    connection = pool.acquire(READ_POOL_TIMEOUT) if pool is not None else None
+    if connection is None:
+        if pool is not None:
+            with _stats_lock:
+                _stats['fallbacks'] += 1
+        with db_session:
+            yield
+        return
+
+    with _stats_lock:
+        _stats['acquired'] += 1
+    # Pony keeps one connection per thread: lend it the read-only one for this session
+    thread_pool = db.provider.pool
+    saved = thread_pool.con, getattr(thread_pool, 'pid', None)  # no pid before the first connection
+    thread_pool.con, thread_pool.pid = connection, os.getpid()
+    _local.read_only = True
+    try:
+        with db_session:
+            yield
+    finally:
+        _local.read_only = False
+        healthy = thread_pool.con is connection
+        thread_pool.con, thread_pool.pid = saved
+        if healthy:
+            pool.release(connection)
+        else:
+            pool.discard()
+
+
+def get_read_pool_stats():
+    """Counters of the read pool (connections opened, sessions served, waits and fallbacks)"""
+    with _stats_lock:
+        stats = dict(_stats)
+    pool = _pool
+    stats['enabled'] = pool is not None or (READ_POOL_ENABLED and get_db_path() not in (None, ':memory:'))
+    stats['size'] = READ_POOL_SIZE
+    stats['idle'] = pool.idle.qsize() if pool is not None else 0
+    waited = stats['waited']
+    stats['avg_wait_ms'] = round(stats.pop('wait_ms_total') / waited, 2) if waited else 0.0
+    return stats
+
+
+def reset_read_pool_stats():
+    with _stats_lock:
+        for name in _stats:
+            _stats[name] = 0.0 if name == 'wait_ms_total' else 0
+
+'''
+    Questo file (reads.py) gestisce il pool di connessioni SQLite in sola lettura usato dalle
+    dashboard: le letture dei callback girano su queste connessioni in parallelo al thread di
+    scrittura (WAL), mentre read_your_writes=True rilegge sulla connessione principale dopo una scrittura.
+'''
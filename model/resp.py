@@ -0,0 +1,120 @@
+# model/resp.py
+import socket
+from urllib.parse import urlparse
+
+
+class RespError(Exception):
+    """Error reply of a Redis-protocol server"""
+
+
+def parse_redis_url(url):
+    """Connection arguments of a redis://[:password@]host[:port][/db] URL"""
+    parsed = urlparse(url)
+    if parsed.scheme not in ('redis', ''):
+        raise ValueError(f"Unsupported cache URL: {url!r}")
+    return {
+        'host': parsed.hostname or '127.0.0.1',
+        'port': parsed.port or 6379,
+        'db': int(parsed.path.strip('/') or 0),
+        'password': parsed.password,
+    }
+
+
+class RespClient:
+    """Minimal Redis-protocol (RESP2) client: one blocking connection, not thread safe
+
+    Enough for a cache (strings, sets, expiry, SCAN); any server speaking the protocol
+    (Redis, Valkey, KeyDB, a test stand-in) works.
+    """
+
+    def __init__(self, host='127.0.0.1', port=6379, db=0, password=None, timeout=1.0):
+        self.address = (host, port)
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self._sock = None
+        self._file = None
+
+    def _connect(self):
+        self._sock = socket.create_connection(self.address, timeout=self.timeout)
+        self._file = self._sock.makefile('rb')
+        if self.password:
+            self._call([('AUTH', self.password)])
+        if self.db:
+            self._call([('SELECT', self.db)])
+
+    def close(self):
+        if self._sock is not None:
+            try:
+                self._file.close()
+                self._sock.close()
+            finally:
+                self._sock = self._file = None
+
+    def execute(self, *args):
+        """Send one command and return its reply"""
+        return self.pipeline([args])[0]
+
+    def pipeline(self, commands):
+        """Send several commands in one write and return their replies in order
+
+        A connection that broke since its last use is reopened once; a server that refuses a
+        new connection fails at once. Error replies raise RespError after all replies have been
+        read, so the connection stays usable.
+        """
+        for attempt in (0, 1):
+            reused = self._sock is not None
+            try:
+                if not reused:
+                    self._connect()
+                return self._call(commands)
+            except OSError:
+                self.close()
+                if attempt or not reused:
+                    raise
+
+    def _call(self, commands):
+        self._sock.sendall(b''.join(_encode(command) for command in commands))
+        replies = [self._read_reply() for _ in commands]
+        for reply in replies:
+            if isinstance(reply, RespError):
+                raise reply
+        return replies
+
+    def _read_reply(self):
+        line = self._file.readline()
+        if not line.endswith(b'\r\n'):
+            raise ConnectionError("Connection closed by the cache server")
+        kind, body = line[:1], line[1:-2]
+        if kind == b'+':
+            return body.decode()
+        if kind == b'-':
+            return RespError(body.decode())
+        if kind == b':':
+            return int(body)
+        if kind == b'$':
+            length = int(body)
+            if length < 0:
+                return None
+            data = self._file.read(length + 2)
+            return data[:-2]
+        if kind == b'*':
+            length = int(body)
+            if length < 0:
+                return None
+            return [self._read_reply() for _ in range(length)]
+        raise ConnectionError(f"Unexpected reply from the cache server: {line!r}")
+
+
+def _encode(command):
+    parts = [arg if isinstance(arg, bytes) else str(arg).encode() for arg in command]
+    out = [b'*%d\r\n' % len(parts)]
+    for part in parts:
+        out.append(b'$%d\r\n%s\r\n' % (len(part), part))
+    return b''.join(out)
+
+'''
+    Questo file (resp.py) contiene un client minimo per il protocollo Redis (RESP2), usato dalla
+    cache condivisa tra i processi: comandi singoli o in pipeline su una connessione, riaperta
+    una volta se cade, senza dipendenze esterne.
+'''
@@ -0,0 +1,103 @@
+# model/retention.py
+from datetime import timedelta
+from pony.orm import db_session
+
+from model.clock import now
+from model.database import db, to_db_datetime
+from model.writer import submit_write
+
+# Read alerts resolved (or, if never resolved, created) this many days ago move to AlertArchive
+ALERT_RETENTION_DAYS = 30
+# Alerts moved per write transaction, so request writes are not held up behind the job
+ALERT_ARCHIVE_BATCH_SIZE = 500
+# Free pages returned to the file system per run (0 = all of them)
+VACUUM_MAX_PAGES = 0
+
+_ARCHIVE_COLUMNS = ('"id", "patient_id", "doctor_id", "alert_type", "message", "rule", "payload", '
+                    '"severity", "created_at", "resolved_at", "archived_at"')
+_ALERT_COLUMNS = ('"id", "patient", "doctor", "alert_type", "message", "rule", "payload", '
+                  '"severity", "created_at", "resolved_at", $archived_at')
+
+
+def configure_retention(days=None, batch_size=None, vacuum_max_pages=None):
+    """Change the retention settings used by run_alert_retention()"""
+    global ALERT_RETENTION_DAYS, ALERT_ARCHIVE_BATCH_SIZE, VACUUM_MAX_PAGES
+    if days is not None:
+        ALERT_RETENTION_DAYS = max(0, int(days))
+    if batch_size is not None:
+        ALERT_ARCHIVE_BATCH_SIZE = max(1, int(batch_size))
+    if vacuum_max_pages is not None:
+        VACUUM_MAX_PAGES = max(0, int(vacuum_max_pages))
+
+
+def configure_retention_from_settings(settings):
+    """Apply the ALERT_RETENTION_* settings of a config dict"""
+    configure_retention(
+        days=settings['ALERT_RETENTION_DAYS'],
+        batch_size=settings['ALERT_ARCHIVE_BATCH_SIZE'],
+        vacuum_max_pages=settings['ALERT_VACUUM_MAX_PAGES']
+    )
+
+
+@db_session
+def archive_alert_batch(cutoff, limit):
+    """Move up to `limit` read alerts older than `cutoff` to AlertArchive; returns the number moved
+
+    Unread alerts always stay in Alert, so the unread counters of the summaries do not change.
+    """
+    ids = db.select('SELECT "id" FROM "Alert" WHERE "is_read" AND COALESCE("resolved_at", "created_at") < $cutoff '
+                    'ORDER BY "id" LIMIT $limit', {'cutoff': to_db_datetime(cutoff), 'limit': limit})
+    if not ids:
+        return 0
+    id_list = ', '.join(str(int(alert_id)) for alert_id in ids)
+    db.execute(f'INSERT INTO "AlertArchive" ({_ARCHIVE_COLUMNS}) '
+               f'SELECT {_ALERT_COLUMNS} FROM "Alert" WHERE "id" IN ({id_list})',
+               {'archived_at': to_db_datetime(now())})
+    db.execute(f'DELETE FROM "Alert" WHERE "id" IN ({id_list})')
+    return len(ids)
+
+
+@db_session
+def incremental_vacuum(max_pages=0):
+    """Return free pages to the file system; returns (bytes reclaimed, bytes still free)
+
+    Only files created with auto_vacuum = INCREMENTAL (every storage profile sets it on new
+    files) can shrink this way; older files keep their free pages for reuse until a VACUUM.
+    """
+    page_size = db.execute('PRAGMA page_size').fetchone()[0]
+    before = db.execute('PRAGMA page_count').fetchone()[0]
+    if db.execute('PRAGMA auto_vacuum').fetchone()[0] == 2:  # INCREMENTAL
+        free = db.execute('PRAGMA freelist_count').fetchone()[0]
+        pages = min(free, max_pages) if max_pages else free
+        # Python's sqlite3 steps a statement without result columns only once: one page per call
+        cursor = db.get_connection().cursor()
+        for _ in range(pages):
+            cursor.execute('PRAGMA incremental_vacuum(1)')
+    after = db.execute('PRAGMA page_count').fetchone()[0]
+    free = db.execute('PRAGMA freelist_count').fetchone()[0]
+    return (before - after) * page_size, free * page_size
+
+
+def run_alert_retention(days=None):
+    """Archive old read alerts in batches through the single writer, then vacuum incrementally
+
+    Returns {'moved', 'batches', 'reclaimed_bytes', 'free_bytes'}.
+    """
+    days = ALERT_RETENTION_DAYS if days is None else days
+    cutoff = now() - timedelta(days=days)
+    moved = batches = 0
+    while True:
+        count = submit_write(archive_alert_batch, cutoff, ALERT_ARCHIVE_BATCH_SIZE).result()
+        moved += count
+        if count:
+            batches += 1
+        if count < ALERT_ARCHIVE_BATCH_SIZE:
+            break
+    reclaimed, free = submit_write(incremental_vacuum, VACUUM_MAX_PAGES).result()
+    return {'moved': moved, 'batches': batches, 'reclaimed_bytes': reclaimed, 'free_bytes': free}
+
+'''
+    Questo file (retention.py) gestisce la conservazione degli alert: gli alert letti e più vecchi
+    del periodo configurato vengono spostati a blocchi nella tabella AlertArchive tramite il thread
+    di scrittura, poi le pagine libere vengono restituite al file con incremental_vacuum.
+'''
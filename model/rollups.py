@@ -0,0 +1,250 @@
+# model/rollups.py
+import math
+from datetime import timedelta
+from pony.orm import db_session
+
+from model.clock import now
+from model.database import db, to_db_datetime, from_db_datetime
+from model.cache import cached_patient_read
+
+# Target ranges in mg/dL by meal timing (same limits as the glucose alerts)
+TARGET_RANGES = {
+    True: (80, 130),   # before meal
+    False: (70, 180),  # after meal
+}
+
+# Windows longer than this read the daily table for whole days
+HOURLY_CHART_MAX_DAYS = 7
+
+_ROLLUP_TABLES = {
+    'hour': 'GlucoseHourlyRollup',
+    'day': 'GlucoseDailyRollup',
+}
+
+_COLUMNS = ('"patient", "bucket_start", "is_before_meal", "reading_count", "value_sum", "value_sum_sq", '
+            '"value_min", "value_max", "below_range", "in_range", "above_range"')
+_STAT_COLUMNS = _COLUMNS.split(', ', 3)[3]
+
+# Bucket length in seconds (datetimes are stored as epoch seconds, see storage_format.py)
+_BUCKET_SECONDS = {
+    'GlucoseHourlyRollup': 3600,
+    'GlucoseDailyRollup': 86400,
+}
+
+
+def hour_bucket(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def day_bucket(moment):
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def classify_reading(value, is_before_meal):
+    """Return (below, in, above) range counters for one reading"""
+    low, high = TARGET_RANGES[bool(is_before_meal)]
+    if value < low:
+        return 1, 0, 0
+    if value > high:
+        return 0, 0, 1
+    return 0, 1, 0
+
+
+def _upsert_sql(table, source=None):
+    """Upsert of one reading (VALUES) or of pre-grouped buckets (`source` SELECT) into a rollup table"""
+    source = source or 'VALUES ($patient_id, $bucket, $before, 1, $value, $value_sq, $value, $value, $below, $inside, $above)'
+    return (
+        f'INSERT INTO "{table}" ({_COLUMNS}) {source} '
+        'ON CONFLICT ("patient", "bucket_start", "is_before_meal") DO UPDATE SET '
+        '"reading_count" = "reading_count" + excluded."reading_count", '
+        '"value_sum" = "value_sum" + excluded."value_sum", '
+        '"value_sum_sq" = "value_sum_sq" + excluded."value_sum_sq", '
+        '"value_min" = MIN("value_min", excluded."value_min"), '
+        '"value_max" = MAX("value_max", excluded."value_max"), '
+        '"below_range" = "below_range" + excluded."below_range", '
+        '"in_range" = "in_range" + excluded."in_range", '
+        '"above_range" = "above_range" + excluded."above_range"'
+    )
+
+
+@db_session
+def record_glucose_reading(patient_id, value, measurement_time, is_before_meal):
+    """Fold one new reading into its hourly and daily buckets (one upsert per table)"""
+    below, inside, above = classify_reading(value, is_before_meal)
+    params = {
+        'patient_id': int(patient_id),
+        'before': int(bool(is_before_meal)),
+        'value': float(value),
+        'value_sq': float(value) * float(value),
+        'below': below,
+        'inside': inside,
+        'above': above,
+    }
+    for table, bucket in (('GlucoseHourlyRollup', hour_bucket(measurement_time)),
+                          ('GlucoseDailyRollup', day_bucket(measurement_time))):
+        params['bucket'] = to_db_datetime(bucket)
+        db.execute(_upsert_sql(table), params)
+
+
+def _range_case(column, low_or_high):
+    """SQL counter matching classify_reading for the meal-dependent target range"""
+    before_low, before_high = TARGET_RANGES[True]
+    after_low, after_high = TARGET_RANGES[False]
+    if low_or_high == 'below':
+        return (f'SUM(CASE WHEN {column} < (CASE WHEN "is_before_meal" THEN {before_low} ELSE {after_low} END) '
+                'THEN 1 ELSE 0 END)')
+    if low_or_high == 'above':
+        return (f'SUM(CASE WHEN {column} > (CASE WHEN "is_before_meal" THEN {before_high} ELSE {after_high} END) '
+                'THEN 1 ELSE 0 END)')
+    return (f'SUM(CASE WHEN {column} BETWEEN (CASE WHEN "is_before_meal" THEN {before_low} ELSE {after_low} END) '
+            f'AND (CASE WHEN "is_before_meal" THEN {before_high} ELSE {after_high} END) THEN 1 ELSE 0 END)')
+
+
+@db_session
+def rebuild_glucose_rollups(patient_id=None):
+    """Recompute the rollups from the raw readings (backfill / repair); returns bucket counts"""
+    where = 'WHERE "patient" = $patient_id' if patient_id is not None else ''
+    params = {'patient_id': patient_id}
+
+    for table in _ROLLUP_TABLES.values():
+        db.execute(f'DELETE FROM "{table}" {where}', params)
+
+    below, inside, above = (_range_case('"value"', kind) for kind in ('below', 'in', 'above'))
+    db.execute(
+        f'INSERT INTO "GlucoseHourlyRollup" ({_COLUMNS}) '
+        'SELECT "patient", "measurement_time" - "measurement_time" % 3600 AS "bucket", "is_before_meal", '
+        'COUNT(*), SUM("value"), SUM("value" * "value"), MIN("value"), MAX("value"), '
+        f'{below}, {inside}, {above} '
+        f'FROM "GlucoseReading" {where} '
+        'GROUP BY "patient", "bucket", "is_before_meal"',
+        params
+    )
+    db.execute(
+        f'INSERT INTO "GlucoseDailyRollup" ({_COLUMNS}) '
+        'SELECT "patient", "bucket_start" - "bucket_start" % 86400 AS "bucket", "is_before_meal", '
+        'SUM("reading_count"), SUM("value_sum"), SUM("value_sum_sq"), MIN("value_min"), MAX("value_max"), '
+        'SUM("below_range"), SUM("in_range"), SUM("above_range") '
+        f'FROM "GlucoseHourlyRollup" {where} '
+        'GROUP BY "patient", "bucket", "is_before_meal"',
+        params
+    )
+
+    return {
+        granularity: db.select(f'SELECT COUNT(*) FROM "{table}" {where}', params)[0]
+        for granularity, table in _ROLLUP_TABLES.items()
+    }
+
+
+@db_session
+def fold_glucose_readings(source, params=None):
+    """Add a batch of new readings to the rollups with one grouped upsert per table
+
+    `source` is a FROM clause yielding "patient", "measurement_time", "value" and
+    "is_before_meal" columns for readings that are not counted in the rollups yet.
+    """
+    below, inside, above = (_range_case('"value"', kind) for kind in ('below', 'in', 'above'))
+    for table, seconds in _BUCKET_SECONDS.items():
+        # WHERE 1 keeps SQLite from parsing ON CONFLICT as a join constraint
+        db.execute(_upsert_sql(table, (
+            f'SELECT "patient", "measurement_time" - "measurement_time" % {seconds} AS "bucket", "is_before_meal", '
+            'COUNT(*), SUM("value"), SUM("value" * "value"), MIN("value"), MAX("value"), '
+            f'{below}, {inside}, {above} '
+            f'FROM {source} WHERE 1 '
+            'GROUP BY "patient", "bucket", "is_before_meal"'
+        )), params or {})
+
+
+def _meal_filter(before_meal):
+    if before_meal is None:
+        return ''
+    return f' AND "is_before_meal" = {int(bool(before_meal))}'
+
+
+def _window_key(patient_id, days=7, before_meal=None, until=None):
+    """The stats only depend on the hour the window ends in (its start is `days` earlier)"""
+    return days, before_meal, hour_bucket(until or now())
+
+
+@cached_patient_read(key=_window_key)
+@db_session
+def get_glucose_window_stats(patient_id, days=7, before_meal=None, until=None):
+    """Aggregate stats for the N days up to `until` from rollups (hour granularity at both ends)
+
+    The window runs from the hour `days` before `until` to the end of the hour of `until`.
+    Whole days come from the daily table and the partial first and last days from the hourly
+    one, so the cost is O(days + 48) rows whatever the number of readings.
+    """
+    until = until or now()
+    end = hour_bucket(until) + timedelta(hours=1)
+    since = end - timedelta(days=days, hours=1)
+    first_full_day = day_bucket(since)
+    if first_full_day < since:
+        first_full_day += timedelta(days=1)
+    last_full_day = max(day_bucket(end), first_full_day)  # whole days end here, hours follow up to `end`
+
+    meal = _meal_filter(before_meal)
+    params = {'patient_id': patient_id, 'since': to_db_datetime(since), 'first_day': to_db_datetime(first_full_day),
+              'last_day': to_db_datetime(last_full_day), 'end': to_db_datetime(end)}
+    row = db.select(
+        'SELECT SUM("reading_count"), SUM("value_sum"), SUM("value_sum_sq"), MIN("value_min"), MAX("value_max"), '
+        'SUM("below_range"), SUM("in_range"), SUM("above_range") FROM ('
+        f'SELECT {_STAT_COLUMNS} FROM "GlucoseHourlyRollup" WHERE "patient" = $patient_id{meal} '
+        'AND ("bucket_start" >= $since AND "bucket_start" < $first_day '
+        'OR "bucket_start" >= $last_day AND "bucket_start" < $end) '
+        'UNION ALL '
+        f'SELECT {_STAT_COLUMNS} FROM "GlucoseDailyRollup" WHERE "patient" = $patient_id{meal} '
+        'AND "bucket_start" >= $first_day AND "bucket_start" < $last_day)',
+        params
+    )[0]
+
+    count = row[0] or 0
+    if not count:
+        return None
+    average = row[1] / count
+    variance = max(0.0, row[2] / count - average * average)
+    return {
+        'count': count,
+        'average': round(average, 1),
+        'std_dev': round(math.sqrt(variance), 1),
+        'min': row[3],
+        'max': row[4],
+        'below_range': row[5],
+        'in_range': row[6],
+        'above_range': row[7],
+        'time_in_range_pct': round(100.0 * row[6] / count, 1),
+    }
+
+
+@db_session
+def get_glucose_series(patient_id, days=30, granularity=None, until=None):
+    """Per-bucket series for charts: one row per bucket and meal timing, oldest first"""
+    until = until or now()
+    if granularity is None:
+        granularity = 'hour' if days <= HOURLY_CHART_MAX_DAYS else 'day'
+    bucket = hour_bucket if granularity == 'hour' else day_bucket
+    since = bucket(until - timedelta(days=days))
+
+    rows = db.select(
+        'SELECT "bucket_start", "is_before_meal", "reading_count", "value_sum", "value_min", "value_max" '
+        f'FROM "{_ROLLUP_TABLES[granularity]}" '
+        'WHERE "patient" = $patient_id AND "bucket_start" >= $since '
+        'ORDER BY "bucket_start", "is_before_meal" DESC',
+        {'patient_id': patient_id, 'since': to_db_datetime(since)}
+    )
+    return [
+        {
+            'bucket_start': from_db_datetime(bucket_start),
+            'is_before_meal': bool(is_before_meal),
+            'count': count,
+            'average': round(value_sum / count, 1),
+            'min': value_min,
+            'max': value_max,
+        }
+        for bucket_start, is_before_meal, count, value_sum, value_min, value_max in rows
+    ]
+
+'''
+    Questo file (rollups.py) mantiene le tabelle di aggregazione orarie e giornaliere della glicemia.
+    Ogni nuova lettura aggiorna i bucket con un upsert; rebuild_glucose_rollups() ricostruisce
+    le tabelle dai dati grezzi, e medie e grafici su finestre lunghe leggono O(giorni) righe.
+'''
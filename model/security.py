@@ -0,0 +1,237 @@
+# model/security.py
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from contextlib import contextmanager
+from time import perf_counter
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# Cheap hashing for throw-away databases (tests, simulations). Never use it in production.
+FAST_HASH_METHOD = 'pbkdf2:sha256:1000'
+
+# None means werkzeug's default method and cost
+_hash_method = None
+
+# Password worker pool settings (workers=0 hashes inline in the calling thread)
+PASSWORD_POOL_WORKERS = 2
+PASSWORD_POOL_MAX_PENDING = 16
+PASSWORD_POOL_TIMEOUT = 10.0
+LOGIN_MAX_CONCURRENT_PER_ACCOUNT = 2
+LOGIN_MAX_CONCURRENT_PER_IP = 4
+
+_pool = None
+_pool_lock = threading.Lock()
+_pending = threading.BoundedSemaphore(PASSWORD_POOL_MAX_PENDING)
+
+_slots_lock = threading.Lock()
+_account_slots = {}
+_ip_slots = {}
+
+_stats_lock = threading.Lock()
+_stats = {'submitted': 0, 'completed': 0, 'rejected': 0, 'throttled': 0, 'timed_out': 0, 'in_flight': 0,
+          'max_in_flight': 0}
+_latency_samples = deque(maxlen=1000)
+_compute_samples = deque(maxlen=1000)
+
+
+class PasswordPoolBusy(Exception):
+    """Raised when the hashing queue is full or a login exceeds its concurrency cap"""
+
+
+def set_password_hash_method(method):
+    """Select the werkzeug hashing method for new passwords (None restores the default)"""
+    global _hash_method
+    _hash_method = method or None
+
+
+def get_password_hash_method():
+    return _hash_method
+
+
+def configure_password_pool(workers=None, max_pending=None, timeout=None,
+                            max_per_account=None, max_per_ip=None):
+    """Resize the password pool and the login concurrency caps (existing pool is shut down)"""
+    global PASSWORD_POOL_WORKERS, PASSWORD_POOL_MAX_PENDING, PASSWORD_POOL_TIMEOUT
+    global LOGIN_MAX_CONCURRENT_PER_ACCOUNT, LOGIN_MAX_CONCURRENT_PER_IP, _pending
+
+    shutdown_password_pool()
+    if workers is not None:
+        PASSWORD_POOL_WORKERS = int(workers)
+    if max_pending is not None:
+        PASSWORD_POOL_MAX_PENDING = int(max_pending)
+    if timeout is not None:
+        PASSWORD_POOL_TIMEOUT = float(timeout)
+    if max_per_account is not None:
+        LOGIN_MAX_CONCURRENT_PER_ACCOUNT = int(max_per_account)
+    if max_per_ip is not None:
+        LOGIN_MAX_CONCURRENT_PER_IP = int(max_per_ip)
+    _pending = threading.BoundedSemaphore(PASSWORD_POOL_MAX_PENDING)
+
+
+def _get_pool():
+    """Create the process pool on first use (so pre-forked workers each get their own)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+            _pool = ProcessPoolExecutor(max_workers=PASSWORD_POOL_WORKERS, mp_context=context)
+        return _pool
+
+
+def _forget_pool_after_fork():
+    """A forked child must not reuse the parent's executor (its manager thread does not survive fork)"""
+    global _pool, _pool_lock
+    _pool = None
+    _pool_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_forget_pool_after_fork)
+
+
+def shutdown_password_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def _timed_call(func, args):
+    """Runs inside the worker process: returns the result and the compute time"""
+    start = perf_counter()
+    result = func(*args)
+    return result, (perf_counter() - start) * 1000
+
+
+def _hash_with_method(password, method):
+    if method:
+        return generate_password_hash(password, method=method)
+    return generate_password_hash(password)
+
+
+def _run_in_pool(func, *args):
+    """Run a CPU-bound password function off the callback thread, bounded by the queue limit"""
+    if PASSWORD_POOL_WORKERS <= 0:
+        return func(*args)
+
+    pending = _pending
+    if not pending.acquire(blocking=False):
+        with _stats_lock:
+            _stats['rejected'] += 1
+        raise PasswordPoolBusy("Password queue is full")
+
+    def done(_future=None):
+        # The slot stays taken until the worker is done, even when the caller gave up waiting
+        with _stats_lock:
+            _stats['in_flight'] -= 1
+        pending.release()
+
+    start = perf_counter()
+    with _stats_lock:
+        _stats['submitted'] += 1
+        _stats['in_flight'] += 1
+        _stats['max_in_flight'] = max(_stats['max_in_flight'], _stats['in_flight'])
+    try:
+        future = _get_pool().submit(_timed_call, func, args)
+    except Exception:
+        done()
+        raise
+    future.add_done_callback(done)
+    try:
+        result, compute_ms = future.result(timeout=PASSWORD_POOL_TIMEOUT)
+    except FutureTimeout:
+        with _stats_lock:
+            _stats['timed_out'] += 1
+        raise PasswordPoolBusy("Password check timed out")
+    with _stats_lock:
+        _stats['completed'] += 1
+        _latency_samples.append((perf_counter() - start) * 1000)
+        _compute_samples.append(compute_ms)
+    return result
+
+
+def hash_password(password):
+    """Hash a password with the configured method in the worker pool"""
+    return _run_in_pool(_hash_with_method, password, _hash_method)
+
+
+def verify_password(password_hash, password):
+    """Check a password against any stored werkzeug hash, whatever its method"""
+    return _run_in_pool(check_password_hash, password_hash, password)
+
+
+def _take_slot(slots, key, limit):
+    if key is None:
+        return True
+    if slots.get(key, 0) >= limit:
+        return False
+    slots[key] = slots.get(key, 0) + 1
+    return True
+
+
+def _release_slot(slots, key):
+    if key is None:
+        return
+    remaining = slots.get(key, 0) - 1
+    if remaining > 0:
+        slots[key] = remaining
+    else:
+        slots.pop(key, None)
+
+
+@contextmanager
+def login_slot(account=None, client_ip=None):
+    """Cap concurrent password checks per account and per client IP during login storms"""
+    with _slots_lock:
+        if not _take_slot(_account_slots, account, LOGIN_MAX_CONCURRENT_PER_ACCOUNT):
+            allowed = False
+        elif not _take_slot(_ip_slots, client_ip, LOGIN_MAX_CONCURRENT_PER_IP):
+            _release_slot(_account_slots, account)
+            allowed = False
+        else:
+            allowed = True
+    if not allowed:
+        with _stats_lock:
+            _stats['throttled'] += 1
+        raise PasswordPoolBusy("Too many concurrent login attempts")
+    try:
+        yield
+    finally:
+        with _slots_lock:
+            _release_slot(_account_slots, account)
+            _release_slot(_ip_slots, client_ip)
+
+
+def _percentile(samples, fraction):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def get_password_pool_stats():
+    """Counters and timings (queue + compute latency) of the password pool"""
+    with _stats_lock:
+        stats = dict(_stats)
+        latency = list(_latency_samples)
+        compute = list(_compute_samples)
+    stats.update({
+        'workers': PASSWORD_POOL_WORKERS,
+        'max_pending': PASSWORD_POOL_MAX_PENDING,
+        'latency_avg_ms': round(sum(latency) / len(latency), 2) if latency else 0.0,
+        'latency_p95_ms': round(_percentile(latency, 0.95), 2),
+        'compute_avg_ms': round(sum(compute) / len(compute), 2) if compute else 0.0,
+        'queue_wait_avg_ms': round((sum(latency) - sum(compute)) / len(latency), 2) if latency else 0.0
+    })
+    return stats
+
+'''
+    Questo file (security.py) centralizza hashing e verifica delle password.
+    Le operazioni PBKDF2/scrypt girano in un pool di processi limitato, con coda massima,
+    limiti di concorrenza per account e per IP e metriche sui tempi; permette anche di
+    scegliere un metodo a costo ridotto per database temporanei di test.
+'''
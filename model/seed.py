@@ -0,0 +1,103 @@
+# model/seed.py
+import json
+import os
+from datetime import timedelta
+from pony.orm import db_session
+
+from model.database import execute_many, to_db_datetime
+from model.storage_format import UserRole, AlertType, AlertSeverity, SymptomSeverity, AlertRule
+from model.user import User
+from model.clock import now
+from model.rollups import rebuild_glucose_rollups
+from model.summary import rebuild_patient_summaries
+
+# Demo dataset with precomputed password hashes and relative timestamps
+DEMO_FIXTURE_PATH = os.path.join(os.path.dirname(__file__), 'fixtures', 'demo_data.json')
+
+
+def load_fixture(path=None):
+    """Read a seed fixture file"""
+    with open(path or DEMO_FIXTURE_PATH, encoding='utf-8') as fixture_file:
+        return json.load(fixture_file)
+
+
+@db_session
+def seed_demo_data(path=None):
+    """Bulk-insert the demo dataset in a single transaction if the database has no users"""
+    if User.select().count() > 0:
+        return False
+
+    data = load_fixture(path)
+    base_time = now()
+
+    def at(offset_hours):
+        if offset_hours is None:
+            return None
+        return to_db_datetime(base_time + timedelta(hours=offset_hours))
+
+    # Ids follow the fixture order, so foreign keys are known without lookups
+    user_ids = {user['username']: index for index, user in enumerate(data['users'], start=1)}
+    doctor_ids = {}
+    for user in data['users']:
+        if user['role'] == 'doctor':
+            doctor_ids[user['username']] = len(doctor_ids) + 1
+    patient_ids = {patient['username']: index for index, patient in enumerate(data['patients'], start=1)}
+
+    execute_many(
+        'INSERT INTO "User" ("id", "username", "password_hash", "is_active", "role") VALUES (?, ?, ?, ?, ?)',
+        [(user_ids[u['username']], u['username'], u['password_hash'], 1, UserRole.code(u['role'])) for u in data['users']]
+    )
+    execute_many(
+        'INSERT INTO "Doctor" ("id", "user") VALUES (?, ?)',
+        [(doctor_id, user_ids[username]) for username, doctor_id in doctor_ids.items()]
+    )
+    execute_many(
+        'INSERT INTO "Patient" ("id", "user", "assigned_doctor", "risk_factors", "medical_history", '
+        '"comorbidities", "notes") VALUES (?, ?, ?, ?, ?, ?, ?)',
+        [(patient_ids[p['username']], user_ids[p['username']], doctor_ids.get(p.get('doctor')),
+          p.get('risk_factors', ''), p.get('medical_history', ''), p.get('comorbidities', ''), p.get('notes', ''))
+         for p in data['patients']]
+    )
+    execute_many(
+        'INSERT INTO "Therapy" ("patient", "doctor", "drug_name", "daily_doses", "dose_amount", "dose_unit", '
+        '"instructions", "start_date", "end_date", "is_active") VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        [(patient_ids[t['patient']], doctor_ids[t['doctor']], t['drug_name'], t['daily_doses'],
+          float(t['dose_amount']), t['dose_unit'], t.get('instructions') or '', at(t['start_offset_hours']),
+          at(t.get('end_offset_hours')), int(t.get('is_active', True)))
+         for t in data['therapies']]
+    )
+
+    columns = data['glucose_readings']['columns']
+    readings = [dict(zip(columns, row)) for row in data['glucose_readings']['rows']]
+    execute_many(
+        'INSERT INTO "GlucoseReading" ("patient", "value", "measurement_time", "is_before_meal", "notes") '
+        'VALUES (?, ?, ?, ?, ?)',
+        [(patient_ids[r['patient']], float(r['value']), at(r['offset_hours']), int(r['is_before_meal']), r['notes'] or '')
+         for r in readings]
+    )
+    execute_many(
+        'INSERT INTO "Symptom" ("patient", "name", "description", "start_date", "end_date", "severity") '
+        'VALUES (?, ?, ?, ?, ?, ?)',
+        [(patient_ids[s['patient']], s['name'], s.get('description') or '', at(s['start_offset_hours']),
+          at(s.get('end_offset_hours')), SymptomSeverity.code(s.get('severity') or ''))
+         for s in data['symptoms']]
+    )
+    execute_many(
+        'INSERT INTO "Alert" ("patient", "doctor", "alert_type", "message", "rule", "payload", "severity", '
+        '"created_at", "is_read", "resolved_at") VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        [(patient_ids[a['patient']], doctor_ids.get(a.get('doctor')), AlertType.code(a['alert_type']),
+          a['message'], AlertRule.code(''), '{}', AlertSeverity.code(a['severity']),
+          at(a['created_offset_hours']), int(a.get('is_read', False)), at(a.get('resolved_offset_hours')))
+         for a in data['alerts']]
+    )
+
+    # Bulk-inserted rows bypass the incremental path: derive the rollups and summaries once
+    rebuild_glucose_rollups()
+    rebuild_patient_summaries()
+    return True
+
+'''
+    Questo file (seed.py) carica i dati demo da un file fixture (model/fixtures/demo_data.json).
+    Gli hash delle password sono precalcolati e tutte le righe vengono inserite in blocco
+    con executemany in un'unica transazione, così il primo avvio e i DB di test sono veloci.
+'''
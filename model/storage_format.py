@@ -0,0 +1,301 @@
+# model/storage_format.py
+import re
+from datetime import datetime, timedelta
+from pony.orm import db_session
+from pony.orm import dbapiprovider
+from pony.orm.dbproviders.sqlite import SQLiteDatetimeConverter
+from pony.orm.sqltranslation import AttrMonad, CmpMonad, StringAttrMonad, StringConstMonad, StringParamMonad
+
+# On-disk format, kept in PRAGMA user_version (0 = text datetimes and string codes)
+STORAGE_FORMAT_VERSION = 1
+
+# Datetimes are naive local wall-clock times: they are stored as whole seconds since
+# 1970-01-01 00:00 of the same clock, so day and hour buckets are plain integer arithmetic
+EPOCH = datetime(1970, 1, 1)
+_SECOND = timedelta(seconds=1)
+
+
+def to_epoch(value):
+    """Naive datetime -> integer seconds since EPOCH (sub-second precision is dropped)"""
+    return (value - EPOCH) // _SECOND
+
+
+def from_epoch(value):
+    """Integer seconds -> datetime; text written before the migration is parsed as well"""
+    if value is None or isinstance(value, datetime):
+        return value
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return EPOCH + timedelta(seconds=value)
+
+
+class CodedStr(str):
+    """String attribute stored as the index of its value in CODES (a one-byte integer)
+
+    CODES is append-only: a stored code must keep its meaning. Pony queries see the strings
+    (CodedTranslator); raw SQL compares the column against code().
+    """
+    CODES = ()
+
+    @classmethod
+    def code(cls, value):
+        try:
+            return cls.CODES.index(value)
+        except ValueError:
+            raise ValueError(f"{value!r} is not a valid {cls.__name__} (expected one of {cls.CODES})") from None
+
+    @classmethod
+    def value_of(cls, code):
+        return cls.CODES[code]
+
+
+class UserRole(CodedStr):
+    CODES = ('patient', 'doctor')
+
+
+class AlertType(CodedStr):
+    CODES = (
+        'glucose_high', 'glucose_low', 'glucose_abnormal', 'glucose_critical', 'glucose_elevated',
+        'medication_missed', 'medication_reminder', 'medication_compliance', 'compliance_issue',
+        'patient_non_compliance', 'follow_up', 'pregnancy_monitoring',
+    )
+
+
+class AlertSeverity(CodedStr):
+    CODES = ('low', 'medium', 'high')
+
+
+class SymptomSeverity(CodedStr):
+    # '' = not given; the dashboard uses mild/moderate/severe, older data low/medium/high
+    CODES = ('', 'mild', 'moderate', 'severe', 'low', 'medium', 'high')
+
+
+class AlertRule(CodedStr):
+    # '' = free-text alert (message column); the others are rendered by model/alert_rules.py
+    CODES = (
+        '', 'glucose_before_meal', 'glucose_after_meal', 'glucose_critical_reading', 'glucose_elevated_readings',
+        'glucose_critical_upload', 'missed_doses', 'patient_missed_doses', 'dose_reminder',
+    )
+
+
+class EpochDatetimeConverter(SQLiteDatetimeConverter):
+    """datetime <-> INTEGER seconds (to_epoch); values are truncated to whole seconds"""
+
+    def init(self, kwargs):
+        kwargs.setdefault('precision', 0)
+        SQLiteDatetimeConverter.init(self, kwargs)
+
+    def sql_type(self):
+        return 'INTEGER'
+
+    def py2sql(self, val):
+        return to_epoch(val)
+
+    def sql2py(self, val):
+        return from_epoch(val)
+
+
+class CodedStrConverter(dbapiprovider.Converter):
+    """CodedStr <-> INTEGER code; unknown values are rejected on assignment"""
+
+    def validate(self, val, obj=None):
+        if not isinstance(val, str):
+            raise TypeError(f"Value type for attribute {self.attr} must be str. Got: {type(val)!r}")
+        self.py_type.code(val)
+        return str(val)
+
+    def py2sql(self, val):
+        return self.py_type.code(val)
+
+    def sql2py(self, val):
+        return self.py_type.value_of(val) if isinstance(val, int) else val
+
+    def sql_type(self):
+        return 'INTEGER'
+
+
+class _CodeConstMonad(StringConstMonad):
+    """String constant of a query written to SQL as its code"""
+
+    def __init__(self, value, code):
+        StringConstMonad.__init__(self, value)
+        self.code = code
+
+    def getsql(self, sqlquery=None):
+        return [['VALUE', self.code]]
+
+
+class CodedAttrMonad(StringAttrMonad):
+    """CodedStr attribute in a Pony query
+
+    Pony picks a parameter's converter by its Python type (str), so the codes are handled
+    here: == and != against a string constant or parameter compare the column with the code
+    (an unknown value raises ValueError); any other use reads the column decoded to its
+    string in SQL, so projections, `in` and ordering see the same values as the Python API.
+    """
+    decoded = True
+
+    def getsql(self, sqlquery=None):
+        column_sql = StringAttrMonad.getsql(self, sqlquery)
+        if not self.decoded:
+            return column_sql
+        cases = [[['VALUE', code], ['VALUE', value]] for code, value in enumerate(self.attr.py_type.CODES)]
+        return [['CASE', column_sql[0], cases, None]]
+
+    def cmp(self, op, monad2):
+        if op not in ('==', '!=') or not isinstance(monad2, (StringConstMonad, StringParamMonad)):
+            return StringAttrMonad.cmp(self, op, monad2)
+        column = CodedAttrMonad(self.parent, self.attr)
+        column.decoded = False
+        if isinstance(monad2, StringParamMonad):
+            monad2.converter = self.attr.converters[0]  # CodedStrConverter.py2sql: value -> code
+        else:
+            monad2 = _CodeConstMonad(monad2.value, self.attr.py_type.code(monad2.value))
+        return CmpMonad(op, column, monad2)
+
+
+class CodedTranslator:
+    """Translator mixin turning CodedStr attributes into CodedAttrMonad"""
+
+    def postAttribute(self, node):
+        monad = super().postAttribute(node)
+        if isinstance(monad, AttrMonad) and not isinstance(monad, CodedAttrMonad):
+            py_type = monad.attr.py_type
+            if isinstance(py_type, type) and issubclass(py_type, CodedStr):
+                return CodedAttrMonad(monad.parent, monad.attr)
+        return monad
+
+
+def install_storage_format(database):
+    """Use the integer encodings for every datetime and CodedStr attribute
+
+    Called between bind() and generate_mapping(); query parameters of type datetime are
+    converted the same way, so Pony range conditions keep working on the integer columns,
+    and CodedTranslator does the same for the CodedStr attributes.
+    """
+    provider = database.provider
+    provider.converter_classes = ([(CodedStr, CodedStrConverter), (datetime, EpochDatetimeConverter)]
+                                  + list(provider.converter_classes))
+    if not issubclass(provider.translator_cls, CodedTranslator):
+        base = provider.translator_cls
+        provider.translator_cls = type(f'Coded{base.__name__}', (CodedTranslator, base), {})
+
+
+def _migration_expression(column, py_type):
+    """SQL turning a version-0 value of the column into its integer encoding"""
+    if issubclass(py_type, CodedStr):
+        cases = ' '.join(f"WHEN '{value}' THEN {code}" for code, value in enumerate(py_type.CODES))
+        return f'CASE WHEN typeof("{column}") = \'text\' THEN CASE "{column}" {cases} END ELSE "{column}" END'
+    return (f'CASE WHEN typeof("{column}") = \'text\' '
+            f'THEN CAST(strftime(\'%s\', "{column}") AS INTEGER) ELSE "{column}" END')
+
+
+def _encoded_columns(entity):
+    """{column: py_type} of the entity's datetime and CodedStr columns"""
+    columns = {}
+    for attr in entity._new_attrs_:
+        if attr.is_collection or len(attr.columns) != 1:
+            continue
+        if isinstance(attr.py_type, type) and issubclass(attr.py_type, (datetime, CodedStr)):
+            columns[attr.columns[0]] = attr.py_type
+    return columns
+
+
+def _check_codes(database, table, column, py_type):
+    unknown = [row[0] for row in database.execute(
+        f'SELECT DISTINCT "{column}" FROM "{table}" WHERE typeof("{column}") = \'text\'').fetchall()
+        if row[0] not in py_type.CODES]
+    if unknown:
+        raise ValueError(f'{table}.{column} has values without a code in {py_type.__name__}: {unknown}; '
+                         f'append them to {py_type.__name__}.CODES before migrating')
+
+
+def _rebuild_table(database, table, columns):
+    """Copy the table into one declaring the columns INTEGER (TEXT affinity would keep codes as text)"""
+    create_sql = database.execute(
+        f"SELECT sql FROM sqlite_master WHERE type = 'table' AND name = '{table}'").fetchone()[0]
+    index_sql = [row[0] for row in database.execute(
+        f"SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = '{table}' AND sql IS NOT NULL"
+    ).fetchall()]
+    names = [row[1] for row in database.execute(f'PRAGMA table_info("{table}")').fetchall()]
+
+    new_table = f'{table}__migrating'
+    new_sql = create_sql.replace(f'"{table}"', f'"{new_table}"', 1)
+    for column in columns:
+        new_sql = re.sub(rf'("{re.escape(column)}")\s+[A-Z]+(\(\d+\))?', r'\1 INTEGER', new_sql, count=1)
+    select_list = ', '.join(_migration_expression(name, columns[name]) if name in columns else f'"{name}"'
+                            for name in names)
+    column_list = ', '.join(f'"{name}"' for name in names)
+
+    database.execute(new_sql)
+    database.execute(f'INSERT INTO "{new_table}" ({column_list}) SELECT {select_list} FROM "{table}"')
+    database.execute(f'DROP TABLE "{table}"')
+    database.execute(f'ALTER TABLE "{new_table}" RENAME TO "{table}"')
+    for sql in index_sql:
+        database.execute(sql)
+
+
+# Value given to existing rows by add_missing_columns() for a NOT NULL column
+_ADDED_COLUMN_DEFAULTS = {'INTEGER': '0', 'REAL': '0', 'TEXT': "''", 'JSON': "'{}'"}
+
+
+def add_missing_columns(database):
+    """ALTER TABLE ... ADD COLUMN for Optional attributes added to an entity after its table was created
+
+    Called after generate_mapping(check_tables=False). Required attributes have no value
+    for existing rows, so a missing Required column is an error.
+    """
+    with db_session(ddl=True):
+        for entity in database.entities.values():
+            table = database.schema.tables[entity._table_]
+            existing = {row[1] for row in database.execute(f'PRAGMA table_info("{table.name}")').fetchall()}
+            for column in table.column_list:
+                if column.name in existing:
+                    continue
+                if column.is_pk or column.is_unique or any(attr.is_required for attr in entity._new_attrs_
+                                                           if column.name in attr.columns):
+                    raise ValueError(f'{table.name}.{column.name} cannot be added to existing rows')
+                definition = column.get_sql()
+                if column.is_not_null and column.sql_default in (None, True, False):
+                    definition += f' DEFAULT {_ADDED_COLUMN_DEFAULTS[column.sql_type]}'
+                database.execute(f'ALTER TABLE "{table.name}" ADD COLUMN {definition}')
+
+
+def migrate_storage_format(database):
+    """Convert a version-0 database in place (one transaction); returns True when it ran
+
+    Datetime columns are converted with UPDATE (their DATETIME affinity stores integers as
+    such); tables with coded columns are rebuilt so that the codes get INTEGER affinity.
+    """
+    with db_session:
+        version = database.execute('PRAGMA user_version').fetchone()[0]
+    if version >= STORAGE_FORMAT_VERSION:
+        return False
+
+    # ddl=True: foreign keys are off while tables are rebuilt
+    with db_session(ddl=True):
+        for entity in database.entities.values():
+            table = entity._table_
+            columns = _encoded_columns(entity)
+            if not columns:
+                continue
+            declared = {row[1]: row[2] for row in database.execute(f'PRAGMA table_info("{table}")').fetchall()}
+            coded = [column for column, py_type in columns.items() if issubclass(py_type, CodedStr)]
+            for column in coded:
+                _check_codes(database, table, column, columns[column])
+            if any(declared.get(column) != 'INTEGER' for column in coded):
+                _rebuild_table(database, table, columns)
+                continue
+            for column, py_type in columns.items():
+                database.execute(f'UPDATE "{table}" SET "{column}" = {_migration_expression(column, py_type)} '
+                                 f'WHERE typeof("{column}") = \'text\'')
+        database.execute(f'PRAGMA user_version = {STORAGE_FORMAT_VERSION}')
+    return True
+
+'''
+    Questo file (storage_format.py) definisce il formato compatto di archiviazione: date e ore come
+    secondi interi dall'epoca e valori enumerati (ruolo, tipo, gravità e regola degli alert, gravità
+    dei sintomi) come piccoli codici interi. L'API Python, query Pony comprese, continua a restituire
+    datetime e stringhe; migrate_storage_format() converte una sola volta i database scritti con il
+    formato testuale e add_missing_columns() aggiunge ai file esistenti le colonne facoltative introdotte dopo.
+'''
@@ -0,0 +1,205 @@
+# model/summary.py
+from datetime import timedelta
+from pony.orm import db_session
+
+from model.clock import now
+from model.database import db, to_db_datetime, from_db_datetime
+from model.rollups import day_bucket
+from model.cache import invalidate_patient_reads, clear_read_cache
+
+# Length of the rolling window behind the weekly average (calendar days, today included)
+WEEK_DAYS = 7
+
+_COLUMNS = ('"latest_value", "latest_time", "week_start", "week_sum", "week_count", '
+            '"active_therapy_count", "unread_alert_count"')
+
+
+def week_start_for(moment):
+    """Midnight of the first day of the 7-day window ending on the day of `moment`"""
+    return day_bucket(moment) - timedelta(days=WEEK_DAYS - 1)
+
+
+# Summary fields of every patient, recomputed from the source tables
+_SUMMARY_FIELDS = (
+    'p."id", '
+    '(SELECT g."value" FROM "GlucoseReading" g WHERE g."patient" = p."id" '
+    'ORDER BY g."measurement_time" DESC, g."id" DESC LIMIT 1), '
+    '(SELECT MAX(g."measurement_time") FROM "GlucoseReading" g WHERE g."patient" = p."id"), '
+    '$week_start, '
+    '(SELECT COALESCE(SUM(d."value_sum"), 0) FROM "GlucoseDailyRollup" d '
+    'WHERE d."patient" = p."id" AND d."bucket_start" >= $week_start), '
+    '(SELECT COALESCE(SUM(d."reading_count"), 0) FROM "GlucoseDailyRollup" d '
+    'WHERE d."patient" = p."id" AND d."bucket_start" >= $week_start), '
+    '(SELECT COUNT(*) FROM "Therapy" t WHERE t."patient" = p."id" AND t."is_active"), '
+    '(SELECT COUNT(*) FROM "Alert" a WHERE a."patient" = p."id" AND NOT a."is_read")'
+)
+_SUMMARY_SELECT = f'SELECT {_SUMMARY_FIELDS} FROM "Patient" p'
+# A rebuilt row keeps counting versions from the row it replaces
+_NEXT_DATA_VERSION = ('COALESCE((SELECT s."data_version" FROM "PatientSummary" s '
+                      'WHERE s."patient" = p."id"), 0) + 1')
+
+
+@db_session
+def rebuild_patient_summaries(patient_id=None):
+    """Recompute summary rows from the source tables (all patients or one); returns the row count"""
+    where = 'WHERE p."id" = $patient_id' if patient_id is not None else ''
+    params = {'patient_id': patient_id, 'week_start': to_db_datetime(week_start_for(now()))}
+    db.execute(f'INSERT OR REPLACE INTO "PatientSummary" ("patient", {_COLUMNS}, "data_version") '
+               f'SELECT {_SUMMARY_FIELDS}, {_NEXT_DATA_VERSION} FROM "Patient" p {where}', params)
+    _log_data_change(patient_id)
+    if patient_id is not None:
+        invalidate_patient_reads(patient_id)
+    else:
+        clear_read_cache()
+    where = 'WHERE "patient" = $patient_id' if patient_id is not None else ''
+    return db.select(f'SELECT COUNT(*) FROM "PatientSummary" {where}', params)[0]
+
+
+def _log_data_change(patient_id):
+    """Append to the change log in the writing transaction; None stands for every patient
+
+    The other processes' invalidation watchers (model/invalidation.py) read it once the
+    transaction commits, to evict their cached reads of these patients.
+    """
+    db.execute('INSERT INTO "DataChange" ("patient_id", "changed_at") VALUES ($patient_id, $changed_at)',
+               {'patient_id': patient_id, 'changed_at': to_db_datetime(now())})
+
+
+def _update_summary(patient_id, assignments, params):
+    """Apply an in-place update and bump the data version; a patient without a row yet gets a full recount
+
+    Part of the writing transaction: a failure propagates and rolls the write back, so the
+    summary never drifts from the source tables.
+    """
+    patient_id = int(patient_id)
+    params = dict(params, patient_id=patient_id)
+    version = '"data_version" = COALESCE("data_version", 0) + 1'
+    assignments = f'{assignments}, {version}' if assignments else version
+    cursor = db.execute(f'UPDATE "PatientSummary" SET {assignments} WHERE "patient" = $patient_id', params)
+    if cursor.rowcount == 0:
+        # Pending changes are flushed before raw SQL, so the recount already includes them
+        rebuild_patient_summaries(patient_id)
+    else:
+        _log_data_change(patient_id)
+        invalidate_patient_reads(patient_id)
+
+
+@db_session
+def summary_reading_added(patient_id, value, measurement_time):
+    """Latest reading and the rolling week after a new reading (glucose rollups must be updated first)"""
+    week_start = week_start_for(measurement_time)
+    _update_summary(
+        patient_id,
+        '"latest_value" = CASE WHEN "latest_time" IS NULL OR "latest_time" <= $time '
+        'THEN $value ELSE "latest_value" END, '
+        '"latest_time" = CASE WHEN "latest_time" IS NULL OR "latest_time" <= $time '
+        'THEN $time ELSE "latest_time" END, '
+        # Same window: add the reading; the window moved: re-sum the 7 daily rollup buckets
+        '"week_sum" = CASE WHEN "week_start" = $week_start THEN "week_sum" + $value ELSE '
+        '(SELECT COALESCE(SUM("value_sum"), 0) FROM "GlucoseDailyRollup" '
+        'WHERE "patient" = $patient_id AND "bucket_start" >= $week_start) END, '
+        '"week_count" = CASE WHEN "week_start" = $week_start THEN "week_count" + 1 ELSE '
+        '(SELECT COALESCE(SUM("reading_count"), 0) FROM "GlucoseDailyRollup" '
+        'WHERE "patient" = $patient_id AND "bucket_start" >= $week_start) END, '
+        '"week_start" = $week_start',
+        {'value': float(value), 'time': to_db_datetime(measurement_time), 'week_start': to_db_datetime(week_start)}
+    )
+
+
+@db_session
+def summary_therapies_changed(patient_id, delta=1):
+    """Adjust the active therapy counter (+1 on prescription, -1 on deactivation)"""
+    _update_summary(patient_id, '"active_therapy_count" = MAX(0, "active_therapy_count" + $delta)',
+                    {'delta': delta})
+
+
+@db_session
+def summary_alerts_changed(patient_id, delta=1):
+    """Adjust the unread alert counter (+1 on creation, -n when alerts are read or resolved)"""
+    _update_summary(patient_id, '"unread_alert_count" = MAX(0, "unread_alert_count" + $delta)',
+                    {'delta': delta})
+
+
+@db_session
+def summary_data_changed(patient_id):
+    """Bump the data version after a change the counters do not track (intakes, profile)"""
+    _update_summary(patient_id, '', {})
+
+
+@db_session
+def get_patient_data_versions(patient_ids):
+    """{patient id: data version} in one primary-key read; patients without a summary row are left out
+
+    Every write path bumps the version in the writing transaction, so anything derived from a
+    patient's data stays valid exactly as long as the version it was computed at.
+    """
+    patient_ids = [int(patient_id) for patient_id in patient_ids]
+    if not patient_ids:
+        return {}
+    id_list = ', '.join(str(patient_id) for patient_id in patient_ids)
+    return dict(db.select(f'SELECT "patient", "data_version" FROM "PatientSummary" WHERE "patient" IN ({id_list})'))
+
+
+def get_patient_data_version(patient_id):
+    """Current data version of one patient; None until the summary row exists"""
+    return get_patient_data_versions([patient_id]).get(int(patient_id))
+
+
+def _week_from_rollups(patient_id, week_start):
+    row = db.select(
+        'SELECT COALESCE(SUM("value_sum"), 0), COALESCE(SUM("reading_count"), 0) FROM "GlucoseDailyRollup" '
+        'WHERE "patient" = $patient_id AND "bucket_start" >= $week_start',
+        {'patient_id': patient_id, 'week_start': to_db_datetime(week_start)}
+    )[0]
+    return row[0], row[1]
+
+
+def _summary_dict(row, current_week_start):
+    patient_id, latest_value, latest_time, week_start, week_sum, week_count, therapies, unread = row
+    if from_db_datetime(week_start) != current_week_start:
+        # No reading since the window moved: re-sum it from the daily rollups (read only)
+        week_sum, week_count = _week_from_rollups(patient_id, current_week_start)
+    return {
+        'patient_id': patient_id,
+        'latest_value': latest_value,
+        'latest_time': from_db_datetime(latest_time),
+        'week_count': week_count,
+        'week_average': round(week_sum / week_count, 1) if week_count else None,
+        'active_therapy_count': therapies,
+        'unread_alert_count': unread,
+    }
+
+
+@db_session
+def get_patient_summaries(patient_ids):
+    """Summary dicts keyed by patient id, read in one query (missing rows are computed on the fly)"""
+    patient_ids = [int(patient_id) for patient_id in patient_ids]
+    if not patient_ids:
+        return {}
+    id_list = ', '.join(str(patient_id) for patient_id in patient_ids)
+    query = f'SELECT "patient", {_COLUMNS} FROM "PatientSummary" WHERE "patient" IN ({id_list})'
+    rows = db.select(query)
+    if len(rows) < len(set(patient_ids)):
+        # Patients created before the summary table existed, or never written to since
+        # Reads never write: the row is stored by the patient's next write
+        missing = set(patient_ids) - {row[0] for row in rows}
+        missing_list = ', '.join(str(patient_id) for patient_id in missing)
+        rows += db.select(f'{_SUMMARY_SELECT} WHERE p."id" IN ({missing_list})',
+                          {'week_start': to_db_datetime(week_start_for(now()))})
+
+    current_week_start = week_start_for(now())
+    return {row[0]: _summary_dict(row, current_week_start) for row in rows}
+
+
+def get_patient_summary(patient_id):
+    """Dashboard header data for one patient (single-row read)"""
+    return get_patient_summaries([patient_id]).get(int(patient_id))
+
+'''
+    Questo file (summary.py) mantiene una riga di riepilogo per ogni paziente:
+    ultima lettura, somma e conteggio della settimana, terapie attive e alert non letti.
+    Le operazioni di scrittura la aggiornano nella stessa transazione, così l'intestazione
+    della dashboard e la tabella dei pazienti del medico leggono una sola riga per paziente.
+    La riga porta anche una versione dei dati, incrementata a ogni modifica, che le cache
+    usano per riconoscere i dati ancora validi.
+'''
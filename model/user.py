@@ -1,8 +1,9 @@
 # model/user.py
-from pony.orm import Required, Optional, PrimaryKey, Set
-from werkzeug.security import generate_password_hash, check_password_hash
+from pony.orm import Required, Optional, PrimaryKey, Set, Json, composite_key, composite_index
 from flask_login import UserMixin
 from .database import db
+from .security import verify_password
+from .storage_format import UserRole, AlertType, AlertSeverity, SymptomSeverity, AlertRule
 from datetime import datetime
 
 # Define the User entity
@@ -10,14 +11,16 @@ class User(db.Entity, UserMixin):
     username = Required(str, unique=True)
     password_hash = Required(str)
     is_active = Required(bool, default=True)
-    role = Required(str)  # 'patient', 'doctor'
+    role = Required(UserRole)  # 'patient', 'doctor' (stored as a code)
     
     # Relationships
     patient_profile = Optional('Patient', reverse='user')
     doctor_profile = Optional('Doctor', reverse='user')
+    idempotency_keys = Set('IdempotencyKey', reverse='user')
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        # Runs in the password worker pool, not in the callback thread
+        return verify_password(self.password_hash, password)
 
     def get_id(self):
         return str(self.id)
@@ -43,6 +46,9 @@ class Patient(db.Entity):
     medication_intakes = Set('MedicationIntake', reverse='patient')
     therapies = Set('Therapy', reverse='patient')
     alerts = Set('Alert', reverse='patient')
+    glucose_hourly_rollups = Set('GlucoseHourlyRollup', reverse='patient')
+    glucose_daily_rollups = Set('GlucoseDailyRollup', reverse='patient')
+    summary = Optional('PatientSummary', reverse='patient')
 
 class Doctor(db.Entity):
     user = Required(User, reverse='doctor_profile')
@@ -56,6 +62,48 @@ class GlucoseReading(db.Entity):
     measurement_time = Required(datetime)
     is_before_meal = Required(bool)  # True if before meal, False if after
     notes = Optional(str)
+    composite_index(patient, measurement_time)  # time-range scans and ingestion dedupe
+
+# Pre-aggregated glucose statistics per patient, bucket and meal timing (maintained by model/rollups.py)
+class GlucoseHourlyRollup(db.Entity):
+    patient = Required(Patient, reverse='glucose_hourly_rollups')
+    bucket_start = Required(datetime)  # start of the hour
+    is_before_meal = Required(bool)
+    reading_count = Required(int, default=0)
+    value_sum = Required(float, default=0)
+    value_sum_sq = Required(float, default=0)
+    value_min = Required(float)
+    value_max = Required(float)
+    below_range = Required(int, default=0)  # readings under the target range
+    in_range = Required(int, default=0)
+    above_range = Required(int, default=0)
+    composite_key(patient, bucket_start, is_before_meal)
+
+class GlucoseDailyRollup(db.Entity):
+    patient = Required(Patient, reverse='glucose_daily_rollups')
+    bucket_start = Required(datetime)  # midnight of the day
+    is_before_meal = Required(bool)
+    reading_count = Required(int, default=0)
+    value_sum = Required(float, default=0)
+    value_sum_sq = Required(float, default=0)
+    value_min = Required(float)
+    value_max = Required(float)
+    below_range = Required(int, default=0)
+    in_range = Required(int, default=0)
+    above_range = Required(int, default=0)
+    composite_key(patient, bucket_start, is_before_meal)
+
+# Dashboard header counters, one row per patient (maintained by model/summary.py)
+class PatientSummary(db.Entity):
+    patient = PrimaryKey(Patient, reverse='summary')
+    latest_value = Optional(float)
+    latest_time = Optional(datetime)
+    week_start = Optional(datetime)  # midnight of the first day of the 7-day window
+    week_sum = Required(float, default=0)
+    week_count = Required(int, default=0)
+    active_therapy_count = Required(int, default=0)
+    unread_alert_count = Required(int, default=0)
+    data_version = Optional(int, default=0)  # +1 on every change to the patient's data
 
 class Symptom(db.Entity):
     patient = Required(Patient, reverse='symptoms')
@@ -63,7 +111,7 @@ class Symptom(db.Entity):
     description = Optional(str)
     start_date = Required(datetime)
     end_date = Optional(datetime)
-    severity = Optional(str)  # mild, moderate, severe
+    severity = Optional(SymptomSeverity)  # mild, moderate, severe
 
 class Therapy(db.Entity):
     patient = Required(Patient, reverse='therapies')
@@ -88,15 +136,55 @@ class MedicationIntake(db.Entity):
 class Alert(db.Entity):
     patient = Required(Patient, reverse='alerts')
     doctor = Optional(Doctor, reverse='alerts')
-    alert_type = Required(str)  # 'glucose_high', 'glucose_low', 'medication_missed', 'compliance_issue'
-    message = Required(str)
-    severity = Required(str)  # 'low', 'medium', 'high'
+    alert_type = Required(AlertType)  # 'glucose_high', 'glucose_low', 'medication_missed', 'compliance_issue'
+    message = Optional(str)  # free-text alerts only; rule alerts are rendered from rule + payload
+    rule = Optional(AlertRule)  # model/alert_rules.py, '' = free text
+    payload = Optional(Json)  # rule values: glucose values, therapy id, counts
+    severity = Required(AlertSeverity)  # 'low', 'medium', 'high'
     created_at = Required(datetime)
     is_read = Required(bool, default=False)
     resolved_at = Optional(datetime)
+    # Unread inboxes, newest first (model/inbox.py); the rowid orders alerts created in the same second
+    composite_index(patient, is_read, created_at)
+    composite_index(doctor, is_read, created_at)
+
+class AlertArchive(db.Entity):
+    """Read alert moved out of Alert by the retention job (model/retention.py)
+
+    Patient and doctor are plain ids, not relations: archived rows outlive deleted users.
+    """
+    id = PrimaryKey(int)  # id the alert had in Alert
+    patient_id = Required(int, index=True)
+    doctor_id = Optional(int)
+    alert_type = Required(AlertType)
+    message = Optional(str)
+    rule = Optional(AlertRule)
+    payload = Optional(Json)
+    severity = Required(AlertSeverity)
+    created_at = Required(datetime)
+    resolved_at = Optional(datetime)
+    archived_at = Required(datetime)
+
+class DataChange(db.Entity):
+    """Change log of patient data, read by the cache invalidation watchers of the other processes"""
+    id = PrimaryKey(int, auto=True)
+    patient_id = Optional(int)  # None: every patient (full summary rebuild)
+    changed_at = Required(datetime)
+
+class IdempotencyKey(db.Entity):
+    """Stored response of an API write, replayed when a client retries with the same key"""
+    user = Required(User, reverse='idempotency_keys')
+    key = Required(str)
+    request_hash = Required(str)  # sha256 of the request body
+    status_code = Required(int)
+    response_body = Required(str)  # JSON
+    created_at = Required(datetime)
+    composite_key(user, key)
 
 '''
     Questo file (user.py) definisce i modelli del database per gli utenti del sistema.
     Contiene le classi User (utente base), Patient (paziente) e Doctor (dottore) con 
     tutte le loro proprietà e relazioni per gestire il sistema di telemedicina diabetica.
+    Date e valori enumerati sono salvati come interi (vedi storage_format.py); gli alert generati
+    dalle regole salvano regola e dati strutturati, resi in testo da alert_rules.py.
 '''
\ No newline at end of file
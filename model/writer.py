@@ -0,0 +1,271 @@
+# model/writer.py
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from time import perf_counter
+from pony.orm import db_session
+
+# Write queue settings (enabled=False runs every write inline in the calling thread,
+# required for ':memory:' databases whose connection is private to one thread)
+WRITE_QUEUE_ENABLED = True
+WRITE_QUEUE_MAX_PENDING = 64
+WRITE_BATCH_MAX = 32
+WRITE_BATCH_WINDOW_MS = 2.0  # after the first job, wait this long for more to share the commit
+WRITE_TIMEOUT = 10.0
+WRITE_BUSY_RETRIES = 5  # "database is locked" (another process is writing): retry the whole batch
+WRITE_BUSY_BACKOFF = 0.05  # seconds, doubled at every retry
+
+_queue = None
+_thread = None
+_lock = threading.Lock()
+
+_stats_lock = threading.Lock()
+_stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'rejected': 0, 'batches': 0, 'max_batch': 0,
+          'busy_retries': 0, 'max_pending_seen': 0, 'timed_out': 0, 'cancelled': 0}
+_batch_samples = deque(maxlen=1000)  # (batch size, commit ms)
+_wait_samples = deque(maxlen=1000)  # ms between submit and the start of the batch
+
+_STOP = object()
+
+
+class WriteQueueFull(Exception):
+    """Raised when the write queue is saturated; the client should retry later"""
+
+
+class WriteStillRunning(Exception):
+    """Raised when a started write outlives WRITE_TIMEOUT: it may still commit, so it must not be resubmitted"""
+
+
+def configure_writer(enabled=None, max_pending=None, batch_max=None, timeout=None,
+                     batch_window_ms=None, busy_retries=None):
+    """Change the write queue settings (a running writer thread is drained and stopped first)"""
+    global WRITE_QUEUE_ENABLED, WRITE_QUEUE_MAX_PENDING, WRITE_BATCH_MAX, WRITE_TIMEOUT
+    global WRITE_BATCH_WINDOW_MS, WRITE_BUSY_RETRIES
+
+    stop_writer()
+    if enabled is not None:
+        WRITE_QUEUE_ENABLED = bool(enabled)
+    if max_pending is not None:
+        WRITE_QUEUE_MAX_PENDING = int(max_pending)
+    if batch_max is not None:
+        WRITE_BATCH_MAX = max(1, int(batch_max))
+    if timeout is not None:
+        WRITE_TIMEOUT = float(timeout)
+    if batch_window_ms is not None:
+        WRITE_BATCH_WINDOW_MS = max(0.0, float(batch_window_ms))
+    if busy_retries is not None:
+        WRITE_BUSY_RETRIES = max(0, int(busy_retries))
+
+
+def configure_writer_from_settings(settings):
+    """Apply the WRITE_* settings of a config dict (the queue is bypassed for ':memory:' databases)"""
+    configure_writer(
+        enabled=settings['WRITE_QUEUE_ENABLED'] and settings['DATABASE_PATH'] != ':memory:',
+        max_pending=settings['WRITE_QUEUE_MAX_PENDING'],
+        batch_max=settings['WRITE_BATCH_MAX'],
+        timeout=settings['WRITE_TIMEOUT'],
+        batch_window_ms=settings['WRITE_BATCH_WINDOW_MS'],
+        busy_retries=settings['WRITE_BUSY_RETRIES']
+    )
+
+
+def _get_queue():
+    """Start the writer thread on first use (so pre-forked workers each get their own)"""
+    global _queue, _thread
+    with _lock:
+        if _queue is None:
+            _queue = queue.Queue(maxsize=WRITE_QUEUE_MAX_PENDING)
+            _thread = threading.Thread(target=_writer_loop, args=(_queue,), name='db-writer', daemon=True)
+            _thread.start()
+        return _queue
+
+
+def _forget_writer_after_fork():
+    """The writer thread does not survive fork: the child starts its own on first write"""
+    global _queue, _thread, _lock
+    _queue = None
+    _thread = None
+    _lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_forget_writer_after_fork)
+
+
+def stop_writer(timeout=5.0):
+    """Let the writer finish the queued jobs, then stop it"""
+    global _queue, _thread
+    with _lock:
+        pending_queue, thread = _queue, _thread
+        _queue = _thread = None
+    if pending_queue is not None:
+        pending_queue.put(_STOP)
+        thread.join(timeout)
+
+
+def submit_write(func, *args, **kwargs):
+    """Queue a write job and return its Future; raises WriteQueueFull when the queue is saturated"""
+    future = Future()
+    job = (future, func, args, kwargs, perf_counter())
+    with _stats_lock:
+        _stats['submitted'] += 1
+    if not WRITE_QUEUE_ENABLED or threading.current_thread() is _thread:
+        # Inline mode, or a queued job submitting another write: run it in the caller's transaction
+        future.set_running_or_notify_cancel()
+        _commit([job])
+        return future
+    pending_queue = _get_queue()
+    try:
+        pending_queue.put_nowait(job)
+    except queue.Full:
+        with _stats_lock:
+            _stats['submitted'] -= 1
+            _stats['rejected'] += 1
+        raise WriteQueueFull("Write queue is full")
+    with _stats_lock:
+        _stats['max_pending_seen'] = max(_stats['max_pending_seen'], pending_queue.qsize())
+    return future
+
+
+def run_write(func, *args, **kwargs):
+    """Queue a write job and wait up to WRITE_TIMEOUT seconds for its result
+
+    A job still queued at the timeout is cancelled, so nothing is written and TimeoutError
+    (concurrent.futures) means a retry is safe; a job already running raises WriteStillRunning.
+    """
+    future = submit_write(func, *args, **kwargs)
+    try:
+        return future.result(timeout=WRITE_TIMEOUT)
+    except FutureTimeout:
+        with _stats_lock:
+            _stats['timed_out'] += 1
+        if future.cancel():
+            with _stats_lock:
+                _stats['cancelled'] += 1
+            raise
+        if future.done():
+            return future.result()
+        raise WriteStillRunning("Write started and is still being saved") from None
+
+
+def _writer_loop(jobs):
+    """Group the jobs arriving within WRITE_BATCH_WINDOW_MS (up to WRITE_BATCH_MAX) into one commit"""
+    while True:
+        item = jobs.get()
+        if item is _STOP:
+            return
+        batch, stopping = [item], False
+        deadline = perf_counter() + WRITE_BATCH_WINDOW_MS / 1000.0
+        while len(batch) < WRITE_BATCH_MAX:
+            try:
+                item = jobs.get(timeout=max(0.0, deadline - perf_counter()))
+            except queue.Empty:
+                break
+            if item is _STOP:
+                stopping = True
+                break
+            batch.append(item)
+        # Jobs cancelled by their caller before they started are skipped
+        batch = [job for job in batch if job[0].set_running_or_notify_cancel()]
+        if batch:
+            _commit(batch)
+        if stopping:
+            return
+
+
+def is_busy_error(exc):
+    """True for SQLite lock contention ("database is locked"), which is worth retrying"""
+    text = str(exc).lower()
+    return 'database is locked' in text or 'database is busy' in text
+
+
+def _run_batch(batch):
+    """One transaction for the whole batch; lock contention retries it with exponential backoff"""
+    for attempt in range(WRITE_BUSY_RETRIES + 1):
+        results = []
+        try:
+            with db_session:
+                for _, func, args, kwargs, _ in batch:
+                    results.append(func(*args, **kwargs))
+            return results
+        except Exception as e:
+            if attempt == WRITE_BUSY_RETRIES or not is_busy_error(e):
+                raise
+            with _stats_lock:
+                _stats['busy_retries'] += 1
+            time.sleep(WRITE_BUSY_BACKOFF * (2 ** attempt))
+
+
+def _commit(batch):
+    """Run the jobs in one db_session (one commit); if one fails, replay each in its own"""
+    start = perf_counter()
+    try:
+        results = _run_batch(batch)
+    except Exception as e:
+        if len(batch) > 1 and not is_busy_error(e):
+            # The whole transaction was rolled back: only the failing job should fail
+            for job in batch:
+                _commit([job])
+            return
+        for future, func, _, _, _ in batch:
+            print(f"Error in queued write {getattr(func, '__name__', func)}: {e}")
+            future.set_exception(e)
+        with _stats_lock:
+            _stats['failed'] += len(batch)
+        return
+
+    for (future, _, _, _, _), result in zip(batch, results):
+        future.set_result(result)
+    with _stats_lock:
+        _stats['completed'] += len(batch)
+        _stats['batches'] += 1
+        _stats['max_batch'] = max(_stats['max_batch'], len(batch))
+        _batch_samples.append((len(batch), (perf_counter() - start) * 1000))
+        _wait_samples.extend((start - submitted) * 1000 for _, _, _, _, submitted in batch)
+
+
+def _percentile(samples, fraction):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def get_writer_stats():
+    """Counters, queue depth, batch sizes, queue wait and commit latency of the write queue"""
+    with _stats_lock:
+        stats = dict(_stats)
+        sizes = [size for size, _ in _batch_samples]
+        commits = [ms for _, ms in _batch_samples]
+        waits = list(_wait_samples)
+    pending_queue = _queue
+    stats.update({
+        'enabled': WRITE_QUEUE_ENABLED,
+        'max_pending': WRITE_QUEUE_MAX_PENDING,
+        'pending': pending_queue.qsize() if pending_queue is not None else 0,
+        'avg_batch': round(sum(sizes) / len(sizes), 2) if sizes else 0.0,
+        'p95_batch': _percentile(sizes, 0.95),
+        'avg_commit_ms': round(sum(commits) / len(commits), 2) if commits else 0.0,
+        'p95_commit_ms': round(_percentile(commits, 0.95), 2),
+        'avg_wait_ms': round(sum(waits) / len(waits), 2) if waits else 0.0,
+        'p95_wait_ms': round(_percentile(waits, 0.95), 2)
+    })
+    return stats
+
+
+def reset_writer_stats():
+    with _stats_lock:
+        for name in _stats:
+            _stats[name] = 0
+        _batch_samples.clear()
+        _wait_samples.clear()
+
+'''
+    Questo file (writer.py) serializza le scritture su SQLite in un unico thread per processo:
+    i job che arrivano entro pochi millisecondi vengono raggruppati in un solo commit, i
+    conflitti di lock vengono ritentati con backoff e la coda ha una dimensione massima
+    (WriteQueueFull). Espone metriche su profondità della coda, batch e latenza dei commit.
+'''
@@ -1,50 +1,117 @@
 # mvc_app.py
+import os
+
 import dash
 import dash_bootstrap_components as dbc
 from flask_login import LoginManager
-import os
 from pony.orm import db_session
 
-# Import from restructured modules
-from model import get_user
-from view import get_app_layout
-from controller import register_callbacks
-from scheduler import start_scheduler
+from config import DevelopmentConfig, load_config
+
+def create_app(config=None):
+    """Application factory: build the Dash app, bind the database and opt into side effects"""
+    settings = load_config(config)
+
+    # Import from restructured modules (no database side effects at import time)
+    from model import configure_db, initialize_db, get_user
+    from model.security import set_password_hash_method, configure_password_pool
+    from model.writer import configure_writer_from_settings
+    from model.reads import configure_read_pool_from_settings
+    from model.cache import configure_read_cache_from_settings
+    from model.invalidation import configure_invalidation_watcher_from_settings
+    from model.retention import configure_retention_from_settings
+    from view import get_app_layout
+    from controller import register_callbacks
+    from controller.api import register_api
+
+    # Bind the database chosen by the configuration
+    configure_db(
+        filename=settings['DATABASE_PATH'],
+        provider=settings['DATABASE_PROVIDER'],
+        slow_query_ms=settings['SLOW_QUERY_MS'],
+        busy_timeout=settings['DATABASE_BUSY_TIMEOUT'],
+        profile=settings['DATABASE_PROFILE']
+    )
+
+    # Reduced hashing cost is only meant for ephemeral test databases
+    set_password_hash_method(settings['PASSWORD_HASH_METHOD'])
+
+    # Password hashing runs in a bounded process pool, created on first use
+    configure_password_pool(
+        workers=settings['PASSWORD_POOL_WORKERS'],
+        max_pending=settings['PASSWORD_POOL_MAX_PENDING'],
+        max_per_account=settings['LOGIN_MAX_CONCURRENT_PER_ACCOUNT'],
+        max_per_ip=settings['LOGIN_MAX_CONCURRENT_PER_IP']
+    )
 
-# Initialize the Dash app with Bootstrap styling
-app = dash.Dash(
-    __name__,
-    external_stylesheets=[dbc.themes.BOOTSTRAP],
-    suppress_callback_exceptions=True
-)
+    # Writes are group-committed by a single writer thread, created on first use
+    configure_writer_from_settings(settings)
 
-server = app.server
+    # Dashboard reads use a bounded pool of read-only connections, opened on first use
+    configure_read_pool_from_settings(settings)
 
-# Set a secure secret key for session management
-server.secret_key = os.environ.get('SECRET_KEY', 'your-secret-key-here-for-development')
+    # Per-patient reads are cached in process until the patient's data version changes
+    configure_read_cache_from_settings(settings)
+    # Other processes' writes evict it through the change log (watcher thread started on first use)
+    configure_invalidation_watcher_from_settings(settings)
 
-# Configure Flask-Login
-login_manager = LoginManager()
-login_manager.init_app(server)
-login_manager.login_view = '/login'
+    # Age and batch size of the scheduler's alert archival
+    configure_retention_from_settings(settings)
 
-@login_manager.user_loader
-@db_session
-def load_user(user_id):
-    return get_user(user_id)
+    # Seed the demo users and patients only when asked to
+    if settings['SEED_DEMO_DATA']:
+        initialize_db()
 
-app.layout = get_app_layout()
+    # Initialize the Dash app with Bootstrap styling
+    app = dash.Dash(
+        __name__,
+        external_stylesheets=[dbc.themes.BOOTSTRAP],
+        suppress_callback_exceptions=True
+    )
 
-register_callbacks(app)
+    server = app.server
+    server.config.update(settings)
 
-start_scheduler()  
+    # Set a secure secret key for session management
+    server.secret_key = settings['SECRET_KEY']
+
+    # Configure Flask-Login
+    login_manager = LoginManager()
+    login_manager.init_app(server)
+    login_manager.login_view = '/login'
+
+    @login_manager.user_loader
+    @db_session
+    def load_user(user_id):
+        return get_user(user_id)
+
+    app.layout = get_app_layout()
+
+    register_callbacks(app)
+
+    # JSON ingestion API for meters and phone apps
+    register_api(server)
+
+    # The compliance scheduler is opt-in so tools, tests and extra workers don't start it
+    if settings['START_SCHEDULER']:
+        from scheduler import start_scheduler
+        start_scheduler()
+
+    return app
 
 if __name__ == '__main__':
+    settings = load_config(DevelopmentConfig)
+    # The reloader runs this module in a watcher process and in the serving child:
+    # only the child (WERKZEUG_RUN_MAIN) starts the scheduler
+    settings['START_SCHEDULER'] = settings['START_SCHEDULER'] and os.environ.get('WERKZEUG_RUN_MAIN') == 'true'
+    app = create_app(settings)
     print("Starting Dash MVC Application...")
     print("Access the application at http://127.0.0.1:8050/")
     app.run(debug=True)
+    # Production: gunicorn -c gunicorn.conf.py (see wsgi.py)
 
 '''
     Questo file (mvc_app.py) è il punto di ingresso principale dell'applicazione.
-    Configura Dash, il database, l'autenticazione e avvia il server dell'app.
-'''
\ No newline at end of file
+    La factory create_app() configura Dash, il database, l'autenticazione e,
+    solo se richiesto, i dati demo e lo scheduler; l'import non ha effetti collaterali.
+'''
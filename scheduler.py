@@ -1,33 +1,90 @@
 # scheduler.py
-import time
 import threading
 import os
-from model import check_all_patients_compliance
-from datetime import datetime
+from model.operations import clear_all_compliance_alerts, check_medication_compliance, get_patient_ids
+from model.idempotency import purge_idempotency_keys
+from model.invalidation import purge_data_changes
+from model.retention import run_alert_retention
+from model.writer import submit_write
+from model.clock import now, sleep
+
+# Seconds between two compliance sweeps
+COMPLIANCE_CHECK_INTERVAL = 20
+
+# Seconds between two alert retention runs (archival + incremental vacuum)
+ALERT_RETENTION_INTERVAL = 3600
 
 # Global variable per controllare se lo scheduler è attivo
 _scheduler_running = False
 _scheduler_thread = None
 _scheduler_id = None
+_last_retention = None
 
 def run_compliance_check():
     """Esegue il controllo di compliance per tutti i pazienti"""
     global _scheduler_id
     scheduler_info = f"[Scheduler-{_scheduler_id}]" if _scheduler_id else ""
-    print(f"{scheduler_info}[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Running compliance check for all patients...")
+    print(f"{scheduler_info}[{now().strftime('%Y-%m-%d %H:%M:%S')}] Running compliance check for all patients...")
     try:
-        check_all_patients_compliance()
+        # Through the single writer, one job per step like the alert retention batches: request
+        # writes queued meanwhile are committed between patients, not after the whole sweep
+        submit_write(clear_all_compliance_alerts).result()
+        for patient_id in get_patient_ids():
+            submit_write(check_medication_compliance, patient_id).result()
         print(f"{scheduler_info}Compliance check completed successfully")
     except Exception as e:
         print(f"{scheduler_info}Error during compliance check: {e}")
 
-def _background_scheduler():
-    """Funzione per eseguire i controlli di compliance in background"""
+def run_housekeeping():
+    """Rimuove le chiavi di idempotenza scadute dell'API di acquisizione e il vecchio registro delle
+    modifiche e, ogni ora, archivia gli alert vecchi"""
+    try:
+        removed = submit_write(purge_idempotency_keys).result()
+        if removed:
+            print(f"Removed {removed} expired idempotency keys")
+        submit_write(purge_data_changes).result()
+    except Exception as e:
+        print(f"Error during housekeeping: {e}")
+    if _last_retention is None or (now() - _last_retention).total_seconds() >= ALERT_RETENTION_INTERVAL:
+        run_retention()
+
+def run_retention():
+    """Archivia gli alert letti più vecchi del periodo di conservazione e compatta il file"""
+    global _last_retention
+    _last_retention = now()
+    try:
+        report = run_alert_retention()
+        if report['moved'] or report['reclaimed_bytes']:
+            print(f"Archived {report['moved']} alerts in {report['batches']} batches, "
+                  f"reclaimed {report['reclaimed_bytes'] // 1024} KiB")
+    except Exception as e:
+        print(f"Error during alert retention: {e}")
+
+def run_scheduled_tasks():
+    """Un passaggio dello scheduler: controllo di compliance e manutenzione"""
+    run_compliance_check()
+    run_housekeeping()
+
+def _background_scheduler(until=None):
+    """Funzione per eseguire i controlli di compliance in background
+
+    Attende con l'orologio attivo (model/clock.py): con un SimulatedClock il tempo avanza
+    senza dormire. Con `until` si ferma quando l'orologio raggiunge quel momento.
+    """
     global _scheduler_running
-    while _scheduler_running:
-        run_compliance_check()
-        time.sleep(20)  # Check compliance every hour (3600 seconds)
-        
+    while _scheduler_running and (until is None or now() < until):
+        run_scheduled_tasks()
+        sleep(COMPLIANCE_CHECK_INTERVAL)
+
+def run_scheduler_until(until):
+    """Esegue lo scheduler in questo thread fino al momento `until` dell'orologio attivo (simulazioni)"""
+    global _scheduler_running
+    _scheduler_running = True
+    try:
+        _background_scheduler(until)
+    finally:
+        _scheduler_running = False
+
 def start_scheduler():
     """Avvia lo scheduler in background per controlli automatici di compliance"""
     global _scheduler_running, _scheduler_thread
@@ -51,6 +108,38 @@ def run_immediate_compliance_check():
     """Esegue immediatamente un controllo di compliance (per testing)"""
     run_compliance_check()
 
+def run_scheduler(config=None):
+    """Esegue lo scheduler in primo piano, come processo dedicato (server di produzione)"""
+    global _scheduler_running, _scheduler_id
+    from config import ProductionConfig, load_config
+    from model import configure_db
+    from model.writer import configure_writer_from_settings
+    from model.retention import configure_retention_from_settings
+    from model.invalidation import configure_invalidation_watcher
+
+    settings = load_config(config or ProductionConfig)
+    configure_db(
+        filename=settings['DATABASE_PATH'],
+        provider=settings['DATABASE_PROVIDER'],
+        slow_query_ms=settings['SLOW_QUERY_MS'],
+        busy_timeout=settings['DATABASE_BUSY_TIMEOUT'],
+        profile=settings['DATABASE_PROFILE']
+    )
+    configure_writer_from_settings(settings)
+    configure_retention_from_settings(settings)
+    configure_invalidation_watcher(retention=settings['DATA_CHANGE_RETENTION'])
+
+    _scheduler_id = os.getpid()
+    _scheduler_running = True
+    print(f"[Scheduler-{_scheduler_id}] Compliance scheduler running every {COMPLIANCE_CHECK_INTERVAL}s")
+    try:
+        _background_scheduler()
+    except KeyboardInterrupt:
+        stop_scheduler()
+
+if __name__ == '__main__':
+    run_scheduler()
+
 '''
     Questo file (scheduler.py) gestisce la pianificazione automatica dei controlli di compliance.
     Esegue verifiche periodiche per tutti i pazienti e genera alert appropriati.
@@ -13,8 +13,33 @@ from werkzeug.security import generate_password_hash
 # Add project root to Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from model import configure_db, db
+from model.security import set_password_hash_method, configure_password_pool, FAST_HASH_METHOD
+from model.writer import configure_writer
+from model.cache import clear_read_cache
 from model.user import User, Patient, Doctor, GlucoseReading, Therapy, MedicationIntake, Alert, Symptom
 
+# Bind the application entities to an in-memory database: no data/ file, no demo seeding
+configure_db(filename=':memory:')
+set_password_hash_method(FAST_HASH_METHOD)
+configure_password_pool(workers=0)
+# The in-memory connection belongs to this thread: queued writes run inline
+configure_writer(enabled=False)
+
+@pytest.fixture
+def empty_model_db():
+    """Svuota le tabelle del database in memoria dell'applicazione prima e dopo il test"""
+    def clear():
+        with db_session:
+            for table in ('DataChange', 'IdempotencyKey', 'AlertArchive', 'PatientSummary', 'GlucoseHourlyRollup', 'GlucoseDailyRollup', 'Alert', 'Symptom',
+                          'MedicationIntake', 'GlucoseReading', 'Therapy', 'Patient', 'Doctor', 'User'):
+                db.execute(f'DELETE FROM "{table}"')
+        # Ids and data versions start over: cached reads would match the new rows
+        clear_read_cache()
+    clear()
+    yield
+    clear()
+
 @pytest.fixture(scope="function")
 def test_db():
     """
@@ -0,0 +1,77 @@
+# tests/unit/test_alert_rules.py
+"""
+Test unitari per gli alert generati dalle regole (model/alert_rules.py).
+"""
+from datetime import datetime
+
+import pytest
+from pony.orm import db_session
+
+from model import (
+    db, add_user, add_therapy, create_alert, check_medication_compliance, get_user_by_username,
+    get_alert_inbox, alert_text, Alert
+)
+from model import clock
+from model.alert_rules import ALERT_TEMPLATES, render_alert_text
+from model.storage_format import AlertRule, to_epoch
+
+
+@pytest.fixture
+def rules_patient(empty_model_db):
+    """Paziente con medico assegnato, una terapia e orologio simulato"""
+    add_user('rules_doctor', 'secret', role='doctor')
+    add_user('rules_patient', 'secret', role='patient')
+    with db_session:
+        doctor = get_user_by_username('rules_doctor').doctor_profile
+        patient = get_user_by_username('rules_patient').patient_profile
+        patient.assigned_doctor = doctor
+        ids = patient.id, doctor.id
+    clock.set_clock(clock.SimulatedClock(datetime(2025, 6, 10, 12, 0)))
+    yield ids
+    clock.reset_clock()
+
+
+class TestAlertRules:
+    """Test per il salvataggio di regola e payload e per la resa del testo"""
+
+    def test_every_rule_has_a_template(self):
+        assert set(ALERT_TEMPLATES) == set(AlertRule.CODES[1:])
+
+    def test_render_formats_payload_fields(self):
+        text = render_alert_text('glucose_critical_reading',
+                                 {'value': 350.0, 'meal': 'after', 'at': to_epoch(datetime(2025, 6, 10, 14, 30))},
+                                 patient='mario')
+        assert text == "CRITICAL: Patient mario glucose 350.0 mg/dL after meal at 14:30"
+
+    def test_compliance_alerts_store_payload(self, rules_patient):
+        patient_id, doctor_id = rules_patient
+        add_therapy(patient_id, doctor_id, 'Metformin', 2, 500.0, 'mg', 'after meals')
+        check_medication_compliance(patient_id)
+
+        with db_session:
+            alerts = {a.rule: a for a in Alert.select()}
+            assert set(alerts) == {'missed_doses', 'patient_missed_doses'}
+            assert alerts['missed_doses'].message == ''
+            assert alerts['missed_doses'].payload['days'] == 3
+            assert alert_text(alerts['patient_missed_doses']) == \
+                "Patient rules_patient has not recorded taking Metformin for 3 consecutive days."
+            # Inbox rows come from one joined query, with the same text
+            rows, _ = get_alert_inbox(patient_id=patient_id)
+            assert {row['rule']: row['text'] for row in rows} == {rule: alert_text(a) for rule, a in alerts.items()}
+            assert {row['patient_username'] for row in rows} == {'rules_patient'}
+            assert all(alert_text(row) == row['text'] for row in rows)
+
+    def test_free_text_alert_keeps_message(self, rules_patient):
+        patient_id, _ = rules_patient
+        assert create_alert(patient_id, 'follow_up', 'Schedule a visit', 'low')
+        with db_session:
+            alert = Alert.select().first()
+            assert alert.rule == '' and alert_text(alert) == 'Schedule a visit'
+            assert db.select('SELECT "payload" FROM "Alert"') == ['{}']
+
+
+'''
+Questo file (test_alert_rules.py) verifica gli alert basati su regole: ogni regola ha un modello,
+il testo viene composto dal payload, i controlli di aderenza salvano terapia e giorni; gli alert
+a testo libero conservano il messaggio.
+'''
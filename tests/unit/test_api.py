@@ -0,0 +1,111 @@
+# tests/unit/test_api.py
+"""
+Test unitari per l'API JSON di acquisizione dai dispositivi (controller/api.py).
+"""
+import base64
+
+import pytest
+from pony.orm import db_session, count
+
+from config import TestingConfig
+from model import add_user, add_therapy, get_user_by_username, GlucoseReading, MedicationIntake, Symptom
+from model import writer
+
+
+@pytest.fixture(scope='module')
+def client():
+    from mvc_app import create_app
+    return create_app(TestingConfig).server.test_client()
+
+
+@pytest.fixture
+def api_patient(empty_model_db):
+    """Paziente con una terapia attiva; restituisce (header Basic, id terapia)"""
+    add_user('api_doctor', 'secret', role='doctor')
+    add_user('api_patient', 'secret', role='patient')
+    with db_session:
+        doctor = get_user_by_username('api_doctor').doctor_profile
+        patient = get_user_by_username('api_patient').patient_profile
+        patient.assigned_doctor = doctor
+        ids = patient.id, doctor.id
+    add_therapy(ids[0], ids[1], 'Metformin', 2, 500.0, 'mg', 'With meals')
+    with db_session:
+        therapy_id = get_user_by_username('api_patient').patient_profile.therapies.select().first().id
+    credentials = base64.b64encode(b'api_patient:secret').decode()
+    return {'Authorization': f'Basic {credentials}'}, therapy_id
+
+
+BATCH = {
+    'glucose_readings': [
+        {'measurement_time': '2025-06-09T07:00:00', 'value': 110, 'is_before_meal': True},
+        {'measurement_time': '2025-06-09T09:00:00', 'value': 165, 'is_before_meal': False},
+    ],
+    'symptoms': [{'name': 'fatigue', 'severity': 'mild', 'start_date': '2025-06-09T10:00:00'}],
+}
+
+
+class TestIngestEndpoint:
+    """Test per autenticazione, idempotenza e contropressione dell'endpoint"""
+
+    def test_requires_patient_credentials(self, client, api_patient):
+        assert client.post('/api/v1/ingest', json=BATCH).status_code == 401
+        bad = base64.b64encode(b'api_doctor:secret').decode()
+        assert client.post('/api/v1/ingest', json=BATCH, headers={'Authorization': f'Basic {bad}'}).status_code == 401
+
+    def test_idempotent_retry_is_replayed(self, client, api_patient):
+        headers, therapy_id = api_patient
+        batch = dict(BATCH, medication_intakes=[
+            {'therapy_id': therapy_id, 'dose_taken': 500, 'intake_time': '2025-06-09T08:00:00'}])
+        headers = dict(headers, **{'Idempotency-Key': 'upload-1'})
+
+        first = client.post('/api/v1/ingest', json=batch, headers=headers)
+        assert first.status_code == 201
+        assert first.get_json()['glucose_readings']['inserted'] == 2
+        assert first.get_json()['medication_intakes']['inserted'] == 1
+
+        retry = client.post('/api/v1/ingest', json=batch, headers=headers)
+        assert retry.status_code == 201
+        assert retry.headers['Idempotent-Replayed'] == 'true'
+        assert retry.get_json() == first.get_json()
+
+        # Same key, different body
+        assert client.post('/api/v1/ingest', json=BATCH, headers=headers).status_code == 422
+
+        with db_session:
+            assert count(g for g in GlucoseReading) == 2
+            assert count(m for m in MedicationIntake) == 1
+            assert count(s for s in Symptom) == 1
+
+    def test_rejects_malformed_payload(self, client, api_patient):
+        headers, _ = api_patient
+        assert client.post('/api/v1/ingest', json=[1, 2], headers=headers).status_code == 400
+        assert client.post('/api/v1/ingest', json={'glucose_readings': 'x'}, headers=headers).status_code == 400
+
+    def test_full_queue_returns_429(self, client, api_patient, monkeypatch):
+        headers, _ = api_patient
+
+        def full(*args, **kwargs):
+            raise writer.WriteQueueFull("Write queue is full")
+        monkeypatch.setattr('controller.api.run_write', full)
+
+        response = client.post('/api/v1/ingest', json=BATCH, headers=headers)
+        assert response.status_code == 429
+        assert response.headers['Retry-After'] == str(TestingConfig.WRITE_RETRY_AFTER)
+
+    def test_write_still_running_is_accepted(self, client, api_patient, monkeypatch):
+        headers, _ = api_patient
+
+        def still_running(*args, **kwargs):
+            raise writer.WriteStillRunning("Write started and is still being saved")
+        monkeypatch.setattr('controller.api.run_write', still_running)
+
+        # It may still commit: the client is told not to resend it rather than to retry
+        response = client.post('/api/v1/ingest', json=BATCH, headers=headers)
+        assert response.status_code == 202 and 'Retry-After' not in response.headers
+
+
+'''
+Questo file (test_api.py) verifica l'endpoint di acquisizione: credenziali del paziente,
+risposte ripetute con la stessa chiave di idempotenza senza righe duplicate, errore 429
+con Retry-After quando la coda di scrittura è piena e 202 quando la scrittura è ancora in corso.
+'''
@@ -0,0 +1,82 @@
+# tests/unit/test_cache.py
+"""
+Test unitari per la cache delle letture per paziente (model/cache.py).
+"""
+from datetime import datetime
+
+import pytest
+from pony.orm import db_session
+
+from model import (
+    add_user, add_therapy, add_glucose_reading, get_user_by_username, get_patient_active_therapies,
+    get_glucose_window_stats, get_read_cache_stats
+)
+from model import clock, cache
+
+
+@pytest.fixture
+def cache_patient(empty_model_db):
+    """Paziente con medico, statistiche della cache azzerate"""
+    add_user('cache_doctor', 'secret', role='doctor')
+    add_user('cache_patient', 'secret', role='patient')
+    with db_session:
+        doctor_id = get_user_by_username('cache_doctor').doctor_profile.id
+        patient_id = get_user_by_username('cache_patient').patient_profile.id
+    clock.set_clock(clock.SimulatedClock(datetime(2025, 6, 10, 8, 0)))
+    cache.reset_read_cache_stats()
+    yield patient_id, doctor_id
+    clock.reset_clock()
+    cache.configure_read_cache(enabled=True, size=1024, ttl=300)
+
+
+class TestLocalCache:
+    """Test per LRU e scadenza delle voci"""
+
+    def test_lru_eviction_and_ttl(self):
+        now = [0.0]
+        store = cache.LocalCache(maxsize=2, ttl=10, timer=lambda: now[0])
+        store.set(('read', 1, 1, ()), 'a')
+        store.set(('read', 2, 1, ()), 'b')
+        assert store.get(('read', 1, 1, ())) == (True, 'a')
+        store.set(('read', 3, 1, ()), 'c')  # patient 2 is the least recently used
+        assert store.get(('read', 2, 1, ()))[0] is False
+        now[0] = 11
+        assert store.get(('read', 1, 1, ()))[0] is False and len(store) == 1
+        assert store.invalidate_patient(3) == 1 and len(store) == 0
+
+
+class TestCachedPatientReads:
+    """Test per le letture in cache, invalidate dalle scritture"""
+
+    def test_reads_are_cached_until_a_write(self, cache_patient):
+        patient_id, doctor_id = cache_patient
+        add_therapy(patient_id, doctor_id, 'Metformin', 2, 500.0, 'mg', 'With meals')
+
+        first = get_patient_active_therapies(patient_id)
+        assert get_patient_active_therapies(patient_id) is first
+        # Plain data, usable outside any session
+        assert first[0]['drug_name'] == 'Metformin'
+
+        add_therapy(patient_id, doctor_id, 'Insulin', 1, 10.0, 'units', 'Before bed')
+        assert sorted(t['drug_name'] for t in get_patient_active_therapies(patient_id)) == ['Insulin', 'Metformin']
+
+        stats = get_read_cache_stats()
+        assert (stats['hits'], stats['misses'], stats['invalidations']) == (1, 2, 1)
+
+    def test_window_stats_follow_new_readings(self, cache_patient):
+        patient_id, _ = cache_patient
+        add_glucose_reading(patient_id, 100.0, True)
+        assert get_glucose_window_stats(patient_id)['count'] == 1
+        add_glucose_reading(patient_id, 140.0, True)
+        assert get_glucose_window_stats(patient_id)['average'] == 120.0
+
+        cache.configure_read_cache(enabled=False)
+        assert get_glucose_window_stats(patient_id)['count'] == 2
+        assert get_read_cache_stats()['bypassed'] == 1
+
+
+'''
+Questo file (test_cache.py) verifica la cache delle letture: evizione LRU, scadenza TTL,
+riuso dei valori finché la versione dei dati del paziente non cambia e invalidazione
+esplicita da parte delle scritture.
+'''
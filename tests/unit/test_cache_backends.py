@@ -0,0 +1,171 @@
+# tests/unit/test_cache_backends.py
+"""
+Test unitari per i backend della cache delle letture (model/cache.py, model/resp.py).
+Il backend Redis è provato contro un piccolo server locale che parla lo stesso protocollo.
+"""
+import fnmatch
+import pickle
+import socket
+import socketserver
+import threading
+from datetime import date, datetime
+
+import pytest
+from pony.orm import db_session
+
+from model import add_user, add_therapy, get_user_by_username, get_patient_active_therapies
+from model import cache
+from model.resp import RespClient, RespError, _encode
+
+
+class FakeRespHandler(socketserver.StreamRequestHandler):
+    """Sottoinsieme dei comandi Redis usati dalla cache, su un dizionario in memoria"""
+
+    def handle(self):
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            args = []
+            for _ in range(int(line[1:])):
+                length = int(self.rfile.readline()[1:])
+                args.append(self.rfile.read(length + 2)[:-2])
+            self.wfile.write(self.reply(args[0].decode().upper(), args[1:]))
+
+    def reply(self, command, args):
+        data = self.server.data
+        with self.server.lock:
+            if command in ('PING', 'SELECT', 'EXPIRE', 'AUTH'):
+                return b'+OK\r\n'
+            if command == 'SET':
+                data[args[0]] = args[1]
+                return b'+OK\r\n'
+            if command == 'GET':
+                value = data.get(args[0])
+                return b'$-1\r\n' if value is None else _bulk(value)
+            if command == 'SADD':
+                data.setdefault(args[0], set()).update(args[1:])
+                return b':1\r\n'
+            if command == 'SMEMBERS':
+                members = sorted(data.get(args[0], ()))
+                return b'*%d\r\n' % len(members) + b''.join(_bulk(m) for m in members)
+            if command == 'DEL':
+                removed = sum(data.pop(name, None) is not None for name in args)
+                return b':%d\r\n' % removed
+            if command == 'SCAN':
+                pattern = args[2].decode()
+                names = [n for n in data if fnmatch.fnmatchcase(n.decode(), pattern)]
+                return b'*2\r\n$1\r\n0\r\n*%d\r\n' % len(names) + b''.join(_bulk(n) for n in names)
+            return b'-ERR unknown command\r\n'
+
+
+def _bulk(value):
+    return b'$%d\r\n%s\r\n' % (len(value), value)
+
+
+@pytest.fixture
+def resp_server():
+    """Server RESP locale su una porta libera"""
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), FakeRespHandler)
+    server.daemon_threads = True
+    server.data, server.lock = {}, threading.Lock()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(params=['local', 'sqlite', 'redis'])
+def backend(request, tmp_path, resp_server):
+    """Ogni backend, con la stessa interfaccia"""
+    if request.param == 'redis':
+        url = f'redis://127.0.0.1:{resp_server.server_address[1]}/0'
+    else:
+        url = str(tmp_path / 'read_cache.sqlite')
+    return cache.create_cache_backend(request.param, url, size=100, ttl=60)
+
+
+class TestCacheBackends:
+    """Test per l'interfaccia comune dei backend"""
+
+    def test_get_set_invalidate_clear(self, backend):
+        key = ('model.operations.get_patient_active_therapies', 7, 3, ((), ()))
+        value = [{'drug_name': 'Metformin', 'start_date': datetime(2025, 6, 1)}]
+        assert backend.get(key) == (False, None)
+        backend.set(key, value)
+        backend.set(('other', 8, 1, ()), 'kept')
+        assert backend.get(key) == (True, value)
+
+        assert backend.invalidate_patient(7) == 1
+        assert backend.get(key)[0] is False and backend.get(('other', 8, 1, ()))[0] is True
+        backend.clear()
+        assert backend.get(('other', 8, 1, ()))[0] is False
+
+    def test_values_are_json_not_pickle(self, resp_server):
+        value = {'day': date(2025, 6, 1), 'points': [(datetime(2025, 6, 1, 8, 5), 110.0)], 'total': None}
+        assert cache.loads_value(cache.dumps_value(value)) == value
+        with pytest.raises(TypeError):
+            cache.dumps_value({'therapy': object()})
+
+        # A pickle planted in the shared server is a miss and an error, never unpickled
+        backend = cache.create_cache_backend('redis', f'redis://127.0.0.1:{resp_server.server_address[1]}/0', ttl=60)
+        key = ('read', 7, 1, ())
+        resp_server.data[(backend.prefix + cache._key_string(key)).encode()] = pickle.dumps(value)
+        cache.reset_read_cache_stats()
+        assert backend.get(key) == (False, None)
+        assert cache.get_read_cache_stats()['errors'] == 1
+
+    def test_unreachable_server_is_skipped_for_a_while(self):
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            port = probe.getsockname()[1]  # nothing listens here once closed
+        backend = cache.create_cache_backend('redis', f'redis://127.0.0.1:{port}/0', ttl=60)
+        cache.reset_read_cache_stats()
+        for _ in range(5):
+            assert backend.get(('read', 7, 1, ())) == (False, None)
+        stats = cache.get_read_cache_stats()
+        assert (stats['errors'], stats['unavailable']) == (1, 4)
+
+    def test_resp_client_errors_and_pipeline(self, resp_server):
+        client = RespClient(port=resp_server.server_address[1])
+        assert client.pipeline([('SET', 'a', b'1'), ('GET', 'a')]) == ['OK', b'1']
+        with pytest.raises(RespError):
+            client.execute('FLUSHALL')
+        assert client.execute('GET', 'missing') is None
+        assert _encode(('GET', 'a')) == b'*2\r\n$3\r\nGET\r\n$1\r\na\r\n'
+
+
+class TestSharedCache:
+    """Test per due processi che condividono la cache: la versione dei dati la mantiene corretta"""
+
+    def test_workers_see_each_others_writes(self, empty_model_db, tmp_path):
+        add_user('shared_doctor', 'secret', role='doctor')
+        add_user('shared_patient', 'secret', role='patient')
+        with db_session:
+            doctor_id = get_user_by_username('shared_doctor').doctor_profile.id
+            patient_id = get_user_by_username('shared_patient').patient_profile.id
+        path = str(tmp_path / 'shared.sqlite')
+        worker_a = cache.SQLiteCache(path, maxsize=100, ttl=60)
+        worker_b = cache.SQLiteCache(path, maxsize=100, ttl=60)
+        try:
+            cache._cache = worker_a
+            assert get_patient_active_therapies(patient_id) == []
+            cache._cache = worker_b
+            assert get_patient_active_therapies(patient_id) == []  # read from worker A's entry
+            assert cache.get_read_cache_stats()['size'] == 1
+
+            # A write in "worker A" bumps the version: worker B misses and reads the database
+            cache._cache = worker_a
+            add_therapy(patient_id, doctor_id, 'Metformin', 2, 500.0, 'mg', 'With meals')
+            cache._cache = worker_b
+            assert [t['drug_name'] for t in get_patient_active_therapies(patient_id)] == ['Metformin']
+        finally:
+            cache.configure_read_cache(backend='local', url='')
+
+
+'''
+Questo file (test_cache_backends.py) verifica i backend della cache (memoria, file SQLite,
+server Redis simulato): stessa interfaccia per lettura, scrittura e invalidazione, client
+RESP con pipeline ed errori, e due processi che condividono le voci restando aggiornati.
+'''
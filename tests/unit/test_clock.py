@@ -0,0 +1,65 @@
+# tests/unit/test_clock.py
+"""
+Test unitari per l'orologio iniettabile usato dalle operazioni (model/clock.py).
+"""
+from datetime import datetime, timedelta
+from unittest.mock import patch, MagicMock
+
+from model import clock
+
+
+class TestSimulatedClock:
+    """Test per l'orologio simulato"""
+
+    def teardown_method(self):
+        clock.reset_clock()
+
+    def test_advance_and_sleep(self):
+        sim = clock.SimulatedClock(datetime(2025, 1, 1, 8, 0))
+
+        sim.advance(hours=2)
+        sim.sleep(30)
+
+        assert sim.now() == datetime(2025, 1, 1, 10, 0, 30)
+
+    def test_operations_use_active_clock(self):
+        from model.operations import record_medication_intake
+
+        moment = datetime(2025, 3, 15, 9, 30)
+        clock.set_clock(clock.SimulatedClock(moment))
+
+        with patch('model.operations.Patient') as mock_patient, \
+             patch('model.operations.Therapy') as mock_therapy, \
+             patch('model.operations.MedicationIntake') as mock_intake, \
+             patch('model.operations.check_medication_compliance'):
+            mock_patient.__getitem__.return_value = MagicMock()
+            mock_therapy.__getitem__.return_value = MagicMock()
+
+            record_medication_intake(1, 1, 500.0)
+
+        assert mock_intake.call_args[1]['intake_time'] == moment
+
+    def test_reset_returns_to_wall_clock(self):
+        clock.set_clock(clock.SimulatedClock(datetime(2000, 1, 1)))
+        clock.reset_clock()
+
+        assert abs(clock.now() - datetime.now()) < timedelta(seconds=5)
+
+    def test_scheduler_sleeps_on_active_clock(self):
+        import scheduler
+
+        start = datetime(2025, 1, 1, 8, 0)
+        sim = clock.SimulatedClock(start)
+        clock.set_clock(sim)
+
+        with patch('scheduler.run_scheduled_tasks') as mock_tasks, \
+             patch('scheduler.COMPLIANCE_CHECK_INTERVAL', 600):
+            scheduler.run_scheduler_until(start + timedelta(hours=1))
+
+        # One pass every 10 simulated minutes, without waiting in real time
+        assert mock_tasks.call_count == 6
+        assert sim.now() == start + timedelta(hours=1)
+
+'''
+Questo file (test_clock.py) verifica l'orologio simulato e il suo uso nelle operazioni e nello scheduler.
+'''
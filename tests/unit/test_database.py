@@ -0,0 +1,35 @@
+# tests/unit/test_database.py
+"""
+Test unitari per i profili di archiviazione SQLite (model/database.py).
+"""
+import pytest
+
+from model.database import storage_pragmas, get_storage_settings, STORAGE_PROFILES
+
+
+class TestStorageProfiles:
+    """Test per la scelta dei PRAGMA applicati a ogni connessione"""
+
+    def test_default_profile_is_balanced(self):
+        assert storage_pragmas() == STORAGE_PROFILES['balanced']
+        assert storage_pragmas('sqlite-defaults') == {}
+
+    def test_busy_timeout_override_in_seconds(self):
+        assert storage_pragmas('durable', busy_timeout=2.5)['busy_timeout'] == 2500
+        assert STORAGE_PROFILES['durable']['busy_timeout'] == 5000
+
+    def test_unknown_profile_is_rejected(self):
+        with pytest.raises(ValueError):
+            storage_pragmas('fast')
+
+    def test_pragmas_applied_to_connection(self):
+        settings = get_storage_settings()
+        assert settings['synchronous'] == 1      # NORMAL
+        assert settings['temp_store'] == 2       # MEMORY
+        assert settings['cache_size'] == -65536
+
+
+'''
+Questo file (test_database.py) verifica i profili di archiviazione: profilo predefinito,
+sostituzione del busy_timeout, rifiuto dei nomi sconosciuti e PRAGMA effettivi sulla connessione.
+'''
@@ -0,0 +1,46 @@
+# tests/unit/test_downsampling.py
+"""
+Test unitari per la riduzione delle serie dei grafici (model/downsampling.py).
+"""
+from datetime import datetime, timedelta
+
+from model.downsampling import lttb, downsample, envelope
+
+
+class TestDownsampling:
+    """Test per LTTB e la conservazione degli estremi fuori intervallo"""
+
+    def test_lttb_keeps_endpoints_and_peaks(self):
+        points = [(x, 100 + (60 if x == 500 else 0)) for x in range(1000)]
+        sampled = lttb(points, 50)
+        assert len(sampled) == 50
+        assert sampled[0] == points[0] and sampled[-1] == points[-1]
+        assert (500, 160) in sampled
+        assert lttb(points[:10], 50) == points[:10]
+
+    def test_out_of_range_extremes_survive(self):
+        start = datetime(2025, 6, 1)
+        values = [100 + (i % 7) for i in range(2000)]
+        values[10], values[11], values[1500] = 50, 55, 260
+        points = [(start + timedelta(minutes=5 * i), v) for i, v in enumerate(values)]
+
+        sampled = downsample(points, 20, low=70, high=180)
+        kept = [v for _, v in sampled]
+        assert 50 in kept and 260 in kept
+        assert len(sampled) <= 20
+        assert [t for t, _ in sampled] == sorted(t for t, _ in sampled)
+
+    def test_envelope_keeps_lowest_and_highest(self):
+        rows = [(i, 90 - (50 if i == 333 else 0), 120 + (150 if i == 777 else 0)) for i in range(1000)]
+        band = envelope(rows, 10)
+        assert len(band) == 10 and band[0][0] == 0
+        assert min(low for _, low, _ in band) == 40 and max(high for _, _, high in band) == 270
+        assert envelope(rows[:5], 10) == rows[:5]
+
+
+'''
+Questo file (test_downsampling.py) verifica la riduzione delle serie: LTTB conserva primo e
+ultimo punto e i picchi della curva, i valori fuori dall'intervallo obiettivo restano
+anche quando la serie viene ridotta di molto, senza superare il numero di punti richiesto,
+e la banda minimo/massimo conserva i suoi estremi.
+'''
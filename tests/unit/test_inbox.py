@@ -0,0 +1,118 @@
+# tests/unit/test_inbox.py
+"""
+Test unitari per la casella degli alert a pagine (model/inbox.py).
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from pony.orm import db_session
+
+from model import (
+    add_user, create_alert, get_user_by_username, get_alert_inbox, acknowledge_alerts, get_patient_summary,
+    get_doctor_alert_counts, Alert, Doctor, Patient
+)
+from model import clock
+
+NOW = datetime(2025, 6, 10, 12, 0)
+
+
+@pytest.fixture
+def inbox_owner(empty_model_db):
+    """Medico con un paziente e 7 alert: due nello stesso secondo, uno letto"""
+    add_user('inbox_doctor', 'secret', role='doctor')
+    add_user('inbox_patient', 'secret', role='patient')
+    with db_session:
+        doctor_id = get_user_by_username('inbox_doctor').doctor_profile.id
+        patient_id = get_user_by_username('inbox_patient').patient_profile.id
+    for minutes, severity in [(0, 'high'), (0, 'low'), (5, 'medium'), (10, 'high'), (15, 'low'), (20, 'medium')]:
+        clock.set_clock(clock.SimulatedClock(NOW - timedelta(minutes=minutes)))
+        create_alert(patient_id, 'follow_up', f'{severity} {minutes}', severity, doctor_id)
+    create_alert(patient_id, 'follow_up', 'read', 'high', doctor_id)
+    with db_session:
+        read_id = Alert.select().order_by(Alert.id.desc()).first().id
+    acknowledge_alerts(patient_id=patient_id, alert_ids=[read_id])
+    yield doctor_id, patient_id
+    clock.reset_clock()
+
+
+class TestAlertInbox:
+    """Test per ordine, filtri e cursori della casella degli alert"""
+
+    def test_doctor_dashboard_counts(self, inbox_owner):
+        doctor_id, patient_id = inbox_owner
+        assert get_doctor_alert_counts(doctor_id) == {'high_priority': 2, 'compliance_patients': 0}
+
+        with db_session:
+            Patient[patient_id].assigned_doctor = Doctor[doctor_id]
+        create_alert(patient_id, 'medication_compliance', 'Missed doses', 'medium', None)
+        assert get_doctor_alert_counts(doctor_id) == {'high_priority': 2, 'compliance_patients': 1}
+
+    def test_pages_follow_newest_first_order(self, inbox_owner):
+        doctor_id, _ = inbox_owner
+        seen, cursor = [], None
+        while True:
+            with db_session:
+                alerts, cursor = get_alert_inbox(doctor_id=doctor_id, cursor=cursor, limit=2)
+                seen.extend(a['message'] for a in alerts)
+            if cursor is None:
+                break
+        # Same second: the later id comes first
+        assert seen == ['low 0', 'high 0', 'medium 5', 'high 10', 'low 15', 'medium 20']
+
+    def test_severity_filter(self, inbox_owner):
+        _, patient_id = inbox_owner
+        with db_session:
+            alerts, cursor = get_alert_inbox(patient_id=patient_id, severities=('medium', 'high'), limit=3)
+            assert [a['message'] for a in alerts] == ['high 0', 'medium 5', 'high 10']
+            alerts, cursor = get_alert_inbox(patient_id=patient_id, severities=('medium', 'high'), cursor=cursor)
+            assert [a['message'] for a in alerts] == ['medium 20'] and cursor is None
+
+    def test_malformed_cursor_is_rejected(self, inbox_owner):
+        doctor_id, _ = inbox_owner
+        with pytest.raises(ValueError):
+            get_alert_inbox(doctor_id=doctor_id, cursor='latest')
+
+
+class TestAcknowledgeAlerts:
+    """Test per la lettura in blocco degli alert e i contatori dei riepiloghi"""
+
+    def test_acknowledge_by_ids_is_scoped_to_owner(self, inbox_owner):
+        doctor_id, patient_id = inbox_owner
+        add_user('other_doctor', 'secret', role='doctor')
+        with db_session:
+            other_id = get_user_by_username('other_doctor').doctor_profile.id
+            alerts, _ = get_alert_inbox(doctor_id=doctor_id, limit=2)
+            ids = [a['id'] for a in alerts]
+        assert get_patient_summary(patient_id)['unread_alert_count'] == 6
+
+        assert acknowledge_alerts(doctor_id=other_id, alert_ids=ids) == 0
+        assert acknowledge_alerts(doctor_id=doctor_id, alert_ids=ids) == 2
+        assert acknowledge_alerts(doctor_id=doctor_id, alert_ids=ids) == 0
+        assert get_patient_summary(patient_id)['unread_alert_count'] == 4
+
+    def test_acknowledge_by_filter_and_resolve(self, inbox_owner):
+        _, patient_id = inbox_owner
+        clock.set_clock(clock.SimulatedClock(NOW))
+        create_alert(patient_id, 'glucose_high', 'High glucose', 'high')
+
+        acknowledged = acknowledge_alerts(patient_id=patient_id, alert_types=['follow_up'],
+                                          before=NOW - timedelta(minutes=1), resolve=True)
+
+        assert acknowledged == 4
+        with db_session:
+            unread = sorted(a.message for a in Alert.select() if not a.is_read)
+            assert unread == ['High glucose', 'high 0', 'low 0']
+            assert all(a.resolved_at == NOW for a in Alert.select() if a.message in ('medium 5', 'low 15'))
+        assert get_patient_summary(patient_id)['unread_alert_count'] == 3
+
+    def test_owner_is_required(self, inbox_owner):
+        with pytest.raises(ValueError):
+            acknowledge_alerts(alert_ids=[1])
+
+
+'''
+Questo file (test_inbox.py) verifica la casella degli alert: pagine dal più recente con i
+cursori (data, id) anche per alert creati nello stesso secondo, filtro per gravità e
+rifiuto dei cursori non validi; la lettura in blocco per id o per filtro resta limitata al
+proprietario e mantiene coerente il contatore degli alert non letti.
+'''
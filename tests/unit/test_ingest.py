@@ -0,0 +1,105 @@
+# tests/unit/test_ingest.py
+"""
+Test unitari per il caricamento massivo delle letture di glicemia (model/ingest.py).
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from pony.orm import db_session, select, count
+
+from model import (
+    db, add_user, get_user_by_username, ingest_glucose_readings, parse_glucose_csv,
+    rebuild_glucose_rollups, get_patient_summary, alert_text, GlucoseReading, Alert
+)
+from model import clock
+
+
+@pytest.fixture
+def ingest_patient(empty_model_db):
+    """Paziente con medico assegnato e orologio simulato"""
+    add_user('ingest_doctor', 'secret', role='doctor')
+    add_user('ingest_patient', 'secret', role='patient')
+    with db_session:
+        patient = get_user_by_username('ingest_patient').patient_profile
+        patient.assigned_doctor = get_user_by_username('ingest_doctor').doctor_profile
+        patient_id = patient.id
+    clock.set_clock(clock.SimulatedClock(datetime(2025, 6, 10, 12, 0)))
+    yield patient_id
+    clock.reset_clock()
+
+
+def rollup_rows():
+    columns = ('"patient", "bucket_start", "is_before_meal", "reading_count", "value_sum", "value_sum_sq", '
+               '"value_min", "value_max", "below_range", "in_range", "above_range"')
+    with db_session:
+        return [sorted(db.select(f'SELECT {columns} FROM "{table}"'))
+                for table in ('GlucoseHourlyRollup', 'GlucoseDailyRollup')]
+
+
+class TestIngestGlucoseReadings:
+    """Test per l'inserimento in blocco con deduplicazione"""
+
+    def test_batch_is_deduplicated_and_keeps_timestamps(self, ingest_patient):
+        start = datetime(2025, 6, 8, 0, 0)
+        readings = [{'measurement_time': start + timedelta(minutes=5 * i), 'value': 100 + i % 50,
+                     'is_before_meal': i % 2 == 0} for i in range(600)]
+        readings.append(dict(readings[0]))                                   # duplicate inside the batch
+        readings.append({'measurement_time': start, 'value': 'n/a'})        # rejected
+
+        result = ingest_glucose_readings(ingest_patient, readings)
+        assert result == {'received': 602, 'inserted': 600, 'duplicates': 1, 'rejected': 1}
+
+        # Overlapping re-upload: only the new tail is inserted
+        tail = [{'measurement_time': start + timedelta(minutes=5 * i), 'value': 120, 'is_before_meal': 'after'}
+                for i in range(590, 610)]
+        result = ingest_glucose_readings(ingest_patient, tail)
+        assert result['inserted'] == 10 and result['duplicates'] == 10
+
+        with db_session:
+            assert count(g for g in GlucoseReading) == 610
+            assert select(g.measurement_time for g in GlucoseReading).min() == start
+
+    def test_aggregates_match_rebuild(self, ingest_patient):
+        readings = [{'measurement_time': datetime(2025, 6, 9, 6, 0) + timedelta(minutes=15 * i),
+                     'value': 70 + 7 * i, 'is_before_meal': i % 3 == 0} for i in range(40)]
+        ingest_glucose_readings(ingest_patient, readings[:25])
+        ingest_glucose_readings(ingest_patient, readings[20:])
+
+        incremental = rollup_rows()
+        rebuild_glucose_rollups()
+        assert rollup_rows() == incremental
+
+        summary = get_patient_summary(ingest_patient)
+        assert summary['week_count'] == 40
+        assert summary['latest_value'] == readings[-1]['value']
+
+    def test_alerts_evaluated_once_per_batch(self, ingest_patient):
+        readings = [{'measurement_time': datetime(2025, 6, 10, 11, 0) - timedelta(minutes=10 * i),
+                     'value': 350, 'is_before_meal': False} for i in range(30)]
+        readings.append({'measurement_time': datetime(2025, 6, 10, 11, 30), 'value': 180, 'is_before_meal': True})
+
+        ingest_glucose_readings(ingest_patient, readings)
+
+        with db_session:
+            alerts = select(a for a in Alert)[:]
+            assert sorted(a.alert_type for a in alerts) == ['glucose_critical', 'glucose_elevated']
+            critical = next(a for a in alerts if a.alert_type == 'glucose_critical')
+            assert critical.payload['count'] == 30 and len(critical.payload['readings']) == 10
+            assert '(30)' in alert_text(critical) and alert_text(critical).endswith('and 20 more')
+
+    def test_parse_csv_export(self, ingest_patient):
+        text = ('\ufeffmeasurement_time,value,is_before_meal,notes\n'
+                '2025-06-09T07:00:00,110,before,fasting\n'
+                '2025-06-09 09:00,165,false,\n')
+        result = ingest_glucose_readings(ingest_patient, parse_glucose_csv(text))
+        assert result['inserted'] == 2
+
+        with db_session:
+            reading = GlucoseReading.get(measurement_time=datetime(2025, 6, 9, 9, 0))
+            assert reading.value == 165.0 and not reading.is_before_meal
+
+'''
+Questo file (test_ingest.py) verifica il caricamento massivo delle letture di glicemia:
+deduplicazione su (paziente, orario), coerenza di rollup e riepilogo con la ricostruzione
+completa, e valutazione degli alert una sola volta per ogni blocco caricato.
+'''
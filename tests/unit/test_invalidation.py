@@ -0,0 +1,128 @@
+# tests/unit/test_invalidation.py
+"""
+Test unitari per l'invalidazione della cache tra processi (model/invalidation.py).
+Il watcher segue un file SQLite a parte, scritto da una seconda connessione come farebbe un altro processo.
+"""
+import sqlite3
+
+import pytest
+from pony.orm import db_session
+
+from model import (
+    add_user, add_therapy, add_glucose_reading, get_user_by_username, get_patient_active_therapies,
+    rebuild_patient_summaries, db
+)
+from model import cache, invalidation
+from model.summary import summary_data_changed
+
+
+@pytest.fixture
+def change_log(tmp_path):
+    """File con il solo registro DataChange e la connessione di un "altro processo" che ci scrive"""
+    path = str(tmp_path / 'changes.sqlite')
+    writer = sqlite3.connect(path, isolation_level=None)
+    writer.execute('CREATE TABLE "DataChange" ("id" INTEGER PRIMARY KEY AUTOINCREMENT, '
+                   '"patient_id" INTEGER, "changed_at" INTEGER NOT NULL)')
+    watcher = invalidation.DataChangeWatcher(path)
+
+    def log(*patient_ids):
+        for patient_id in patient_ids:
+            writer.execute('INSERT INTO "DataChange" ("patient_id", "changed_at") VALUES (?, 0)', (patient_id,))
+
+    yield watcher, log, writer
+    invalidation._watcher = None
+    watcher.stop()
+    writer.close()
+    cache.clear_read_cache()
+
+
+class TestChangeLog:
+    """Test per le righe scritte nella stessa transazione delle modifiche"""
+
+    def test_writes_log_the_patient(self, empty_model_db):
+        add_user('log_patient', 'secret', role='patient')
+        with db_session:
+            patient_id = get_user_by_username('log_patient').patient_profile.id
+        add_glucose_reading(patient_id, 120.0, True)
+        rebuild_patient_summaries()
+
+        with db_session:
+            logged = db.select('SELECT "patient_id" FROM "DataChange" ORDER BY "id"')
+        assert logged[-3:] == [patient_id, patient_id, None]
+
+
+class TestDataChangeWatcher:
+    """Test per il polling di PRAGMA data_version e l'evizione dei soli pazienti modificati"""
+
+    def test_poll_evicts_changed_patients_only(self, change_log):
+        watcher, log, _ = change_log
+        cache.configure_read_cache(backend='local', url='')
+        cache._cache.set(('read', 1, 1, ()), 'a')
+        cache._cache.set(('read', 2, 1, ()), 'b')
+        assert watcher.poll() == []  # no commit since the watcher opened
+
+        log(1)
+        assert watcher.poll() == [1]
+        assert cache._cache.get(('read', 1, 1, ()))[0] is False
+        assert cache._cache.get(('read', 2, 1, ()))[0] is True
+
+    def test_gap_in_the_log_evicts_everything(self, change_log):
+        watcher, log, writer = change_log
+        cache._cache.set(('read', 2, 1, ()), 'b')
+        log(1, 3)
+        writer.execute('DELETE FROM "DataChange" WHERE "patient_id" = 1')  # purged before being read
+        assert watcher.poll() == [3, None]
+        assert cache._cache.size() == 0
+
+    def test_known_versions_until_another_process_writes(self, empty_model_db, change_log):
+        watcher, log, _ = change_log
+        add_user('watch_doctor', 'secret', role='doctor')
+        add_user('watch_patient', 'secret', role='patient')
+        with db_session:
+            doctor_id = get_user_by_username('watch_doctor').doctor_profile.id
+            patient_id = get_user_by_username('watch_patient').patient_profile.id
+        watcher.start(3600)  # polled by hand below
+        invalidation._watcher = watcher
+        assert get_patient_active_therapies(patient_id) == []
+        assert patient_id in cache._known_versions
+
+        # This process's own writes still invalidate at once
+        add_therapy(patient_id, doctor_id, 'Metformin', 2, 500.0, 'mg', 'With meals')
+        assert len(get_patient_active_therapies(patient_id)) == 1
+
+        # Another process changes the data: the known version is trusted until the watcher polls
+        with db_session:
+            db.execute('UPDATE "Therapy" SET "is_active" = 0')
+            db.execute('UPDATE "PatientSummary" SET "data_version" = "data_version" + 1')
+        assert len(get_patient_active_therapies(patient_id)) == 1
+        log(patient_id)
+        watcher.poll()
+        assert get_patient_active_therapies(patient_id) == []
+
+    def test_own_write_forgets_the_version_at_commit(self, empty_model_db, change_log):
+        watcher, _, _ = change_log
+        add_user('commit_patient', 'secret', role='patient')
+        with db_session:
+            patient_id = get_user_by_username('commit_patient').patient_profile.id
+        watcher.start(3600)
+        invalidation._watcher = watcher
+        get_patient_active_therapies(patient_id)
+        old_version = cache._known_versions[patient_id]
+
+        with db_session:
+            summary_data_changed(patient_id)
+            # A concurrent read stores the old version before the write commits
+            cache._known_versions[patient_id] = old_version
+        assert patient_id not in cache._known_versions
+
+    def test_dead_thread_is_not_running(self, change_log):
+        watcher, _, _ = change_log
+        invalidation._watcher = watcher  # never started
+        assert not invalidation.invalidation_watcher_running()
+
+
+'''
+Questo file (test_invalidation.py) verifica l'invalidazione tra processi: il registro DataChange
+scritto insieme ai dati, il watcher che dopo un commit di un'altra connessione elimina solo i
+pazienti modificati (o tutto se il registro ha un buco) e il riuso delle versioni già lette.
+'''
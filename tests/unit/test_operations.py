@@ -68,6 +68,7 @@ class TestGlucoseOperations:
         
         with patch('model.operations.Patient') as mock_patient, \
              patch('model.operations.GlucoseReading') as mock_reading, \
+             patch('model.operations.record_glucose_reading') as mock_rollups, \
              patch('model.operations.check_glucose_thresholds_and_alert') as mock_check_thresholds, \
              patch('model.operations.check_medication_compliance') as mock_check_compliance:
             
@@ -78,6 +79,8 @@ class TestGlucoseOperations:
             
             assert result == True
             mock_reading.assert_called_once()
+            # I rollup fanno parte della stessa scrittura
+            mock_rollups.assert_called_once()
             mock_check_thresholds.assert_called_once_with(1)
             mock_check_compliance.assert_called_once_with(1)
     
@@ -418,7 +421,7 @@ class TestAlertOperations:
             mock_doctor.__getitem__.return_value = mock_doctor_instance
             
             mock_alerts = [MagicMock(), MagicMock()]
-            mock_select.return_value.__getitem__.return_value = mock_alerts
+            mock_select.return_value.order_by.return_value.__getitem__.return_value = mock_alerts
             
             result = get_unread_alerts(doctor_id=1)
             
@@ -436,7 +439,7 @@ class TestAlertOperations:
             mock_patient.__getitem__.return_value = mock_patient_instance
             
             mock_alerts = [MagicMock()]
-            mock_select.return_value.__getitem__.return_value = mock_alerts
+            mock_select.return_value.order_by.return_value.__getitem__.return_value = mock_alerts
             
             result = get_unread_alerts(patient_id=1)
             
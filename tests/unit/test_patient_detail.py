@@ -0,0 +1,100 @@
+# tests/unit/test_patient_detail.py
+"""
+Test unitari per il pacchetto di dati della scheda paziente del medico (model/patient_detail.py).
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from pony.orm import db_session
+
+from model import (
+    add_user, add_glucose_reading, add_therapy, record_medication_intake, update_patient_info,
+    get_user_by_username, get_patient_detail, get_glucose_chart, Therapy
+)
+from model import clock
+from model.summary import get_patient_data_version
+
+
+@pytest.fixture
+def detail_patient(empty_model_db):
+    """Paziente con una terapia e due letture, orologio simulato"""
+    add_user('detail_doctor', 'secret', role='doctor')
+    add_user('detail_patient', 'secret', role='patient')
+    with db_session:
+        doctor_id = get_user_by_username('detail_doctor').doctor_profile.id
+        patient_id = get_user_by_username('detail_patient').patient_profile.id
+    sim = clock.SimulatedClock(datetime(2025, 6, 10, 8, 0))
+    clock.set_clock(sim)
+    add_therapy(patient_id, doctor_id, 'Metformin', 2, 500.0, 'mg', 'after meals')
+    add_glucose_reading(patient_id, 110, True)
+    sim.advance(timedelta(hours=2))
+    add_glucose_reading(patient_id, 250, False)
+    with db_session:
+        therapy_id = Therapy.select().first().id
+    yield patient_id, therapy_id, sim
+    clock.reset_clock()
+
+
+class TestPatientDetail:
+    """Test per il contenuto del pacchetto e la sua validità in cache"""
+
+    def test_bundle_contents(self, detail_patient):
+        patient_id, therapy_id, _ = detail_patient
+        record_medication_intake(patient_id, therapy_id, 500.0)
+
+        detail = get_patient_detail(patient_id)
+
+        assert detail['username'] == 'detail_patient'
+        assert [r['value'] for r in detail['recent_readings']] == [250, 110]
+        therapy = detail['therapies'][0]
+        assert (therapy['drug_name'], therapy['compliance_percentage']) == ('Metformin', round(100 / 14, 1))
+        assert [s['total'] for s in detail['glucose_chart']['series']] == [1, 1]
+        assert get_patient_detail(patient_id + 1000) is None
+
+    def test_cached_until_patient_data_changes(self, detail_patient):
+        patient_id, therapy_id, _ = detail_patient
+        detail = get_patient_detail(patient_id)
+        assert get_patient_detail(patient_id) is detail
+
+        version = get_patient_data_version(patient_id)
+        update_patient_info(patient_id, risk_factors='smoking')
+        assert get_patient_data_version(patient_id) == version + 1
+        detail = get_patient_detail(patient_id)
+        assert detail['risk_factors'] == 'smoking'
+
+        record_medication_intake(patient_id, therapy_id, 500.0)
+        assert get_patient_detail(patient_id)['therapies'][0]['compliance_percentage'] > 0
+
+
+class TestGlucoseChart:
+    """Test per il grafico ridotto: risoluzione secondo l'intervallo, estremi conservati"""
+
+    def test_range_drives_resolution(self, detail_patient):
+        patient_id, _, sim = detail_patient
+        # A day of CGM readings every 5 minutes before meals, with one hypo
+        for i in range(288):
+            sim.advance(minutes=5)
+            add_glucose_reading(patient_id, 45 if i == 100 else 100 + i % 20, True)
+
+        week = get_glucose_chart(patient_id, 7)
+        before = week['series'][0]
+        assert week['readings'] and before['total'] == 289
+        assert len(before['points']) <= 500 and min(v for _, v in before['points']) == 45
+
+        year = get_glucose_chart(patient_id, 365)
+        assert not year['readings']
+        # 26 hourly averages; the hypo is the low edge of its hour's band, not a point of the line
+        hourly = year['series'][0]
+        assert hourly['total'] == 26 and len(hourly['band']) == 26 and week['series'][0]['band'] is None
+        assert min(low for _, low, _ in hourly['band']) == 45
+        assert [t for t, _ in hourly['points']] == [t for t, _, _ in hourly['band']]
+
+        with pytest.raises(ValueError):
+            get_glucose_chart(patient_id, 14)
+
+
+'''
+Questo file (test_patient_detail.py) verifica il pacchetto di dati della scheda paziente:
+anagrafica, ultime letture, aderenza e grafico ridotto secondo l'intervallo scelto, e il riuso dalla cache finché la
+versione dei dati del paziente non cambia dopo una scrittura.
+'''
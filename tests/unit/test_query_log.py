@@ -0,0 +1,84 @@
+# tests/unit/test_query_log.py
+"""
+Test unitari per il registro delle query lente (model/query_log.py).
+"""
+import pytest
+
+from model import query_log
+
+
+@pytest.fixture(autouse=True)
+def clean_query_log(monkeypatch):
+    """Registro vuoto; la soglia cambiata da install_query_log() torna al valore iniziale"""
+    monkeypatch.setattr(query_log, 'SLOW_QUERY_THRESHOLD_MS', query_log.SLOW_QUERY_THRESHOLD_MS)
+    query_log.reset_query_log()
+    yield
+    query_log.reset_query_log()
+
+
+class FakeDatabase:
+    """Database finto che espone solo _exec_sql come Pony"""
+
+    def __init__(self):
+        self.executed = []
+
+    def _exec_sql(self, sql, arguments=None, returning_id=False, start_transaction=False):
+        self.executed.append((sql, arguments))
+        return 'cursor'
+
+
+class TestFingerprint:
+    """Test per la normalizzazione delle query"""
+
+    def test_literals_are_normalized(self):
+        a = query_log.fingerprint_sql("SELECT * FROM Alert WHERE id = 5 AND alert_type = 'glucose_high'")
+        b = query_log.fingerprint_sql("SELECT * FROM Alert WHERE id = 12 AND alert_type = 'medication_reminder'")
+        assert a == b
+
+    def test_in_lists_collapse(self):
+        a = query_log.fingerprint_sql("SELECT * FROM Alert WHERE id IN (?, ?)")
+        b = query_log.fingerprint_sql("SELECT *\n  FROM Alert WHERE id IN (?, ?, ?, ?)")
+        assert a == b
+        assert 'IN (?...)' in a
+
+
+class TestQueryLog:
+    """Test per la registrazione delle query"""
+
+    def test_install_wraps_exec_sql(self):
+        database = FakeDatabase()
+        query_log.install_query_log(database, threshold_ms=1000)
+        threshold = query_log.SLOW_QUERY_THRESHOLD_MS
+        query_log.install_query_log(FakeDatabase())
+        assert query_log.SLOW_QUERY_THRESHOLD_MS == threshold  # None leaves it alone
+
+        result = database._exec_sql("SELECT 1 FROM User WHERE id = ?", (3,))
+
+        assert result == 'cursor'
+        assert database.executed == [("SELECT 1 FROM User WHERE id = ?", (3,))]
+        rows = query_log.get_query_fingerprints()
+        assert len(rows) == 1
+        assert rows[0]['count'] == 1
+        assert query_log.get_slow_queries() == []
+
+    def test_slow_queries_capture_details(self):
+        query_log.install_query_log(FakeDatabase(), threshold_ms=50)
+
+        query_log.record_query("SELECT * FROM Alert WHERE patient = ?", (7,), 120.0)
+        query_log.record_query("SELECT * FROM Alert WHERE patient = ?", (8,), 10.0)
+
+        slow = query_log.get_slow_queries()
+        assert len(slow) == 1
+        assert slow[0]['duration_ms'] == 120.0
+        assert slow[0]['arguments'] == '(7,)'
+        assert slow[0]['operation'] is not None
+
+        stats = query_log.get_query_fingerprints()[0]
+        assert stats['count'] == 2
+        assert stats['total_ms'] == 130.0
+        assert stats['slow_count'] == 1
+        assert stats['p95_ms'] == 120.0
+
+'''
+Questo file (test_query_log.py) verifica impronte SQL, aggregati e registro delle query lente.
+'''
@@ -0,0 +1,87 @@
+# tests/unit/test_reads.py
+"""
+Test unitari per il pool di connessioni in sola lettura (model/reads.py).
+"""
+import sqlite3
+import threading
+
+import pytest
+from pony.orm import db_session, count
+
+from model import db, add_user, User
+from model import reads
+
+
+@pytest.fixture
+def file_copy(empty_model_db, tmp_path, monkeypatch):
+    """Copia il database in memoria in un file WAL e vi indirizza il pool di lettura"""
+    add_user('reader_patient', 'secret', role='patient')
+    path = str(tmp_path / 'copy.sqlite')
+    # The in-memory connection of this thread (opened by add_user) is the source
+    target = sqlite3.connect(path)
+    db.provider.pool.con.backup(target)
+    target.execute('PRAGMA journal_mode = WAL')
+    target.close()
+
+    monkeypatch.setattr(reads, 'get_db_path', lambda: path)
+    reads.configure_read_pool(enabled=True, size=2, timeout=0.05)
+    reads.reset_read_pool_stats()
+    yield path
+    reads.configure_read_pool(enabled=False)
+
+
+class TestReadSession:
+    """Test per le letture su connessioni in sola lettura e il ritorno alla connessione principale"""
+
+    def test_reads_run_on_read_only_connection(self, file_copy):
+        with reads.read_session():
+            assert reads.in_read_only_session()
+            assert count(u for u in User) == 1
+            with pytest.raises(Exception):
+                db.execute('DELETE FROM "User"')
+        assert not reads.in_read_only_session()
+        assert reads.get_read_pool_stats()['acquired'] == 1
+
+        # The thread's own connection is back: writes go to the in-memory database again
+        add_user('writer_patient', 'secret', role='patient')
+        with db_session:
+            assert count(u for u in User) == 2
+
+    def test_fresh_thread_returns_connection_to_pool(self, file_copy):
+        counts = []
+
+        def read():
+            with reads.read_session():
+                counts.append(count(u for u in User))
+        thread = threading.Thread(target=read)
+        thread.start()
+        thread.join(5)
+        assert counts == [1]
+        assert reads.get_read_pool_stats()['idle'] == 1
+
+    def test_read_your_writes_uses_primary_connection(self, file_copy):
+        add_user('fresh_patient', 'secret', role='patient')
+        with reads.read_session(read_your_writes=True):
+            assert not reads.in_read_only_session()
+            assert count(u for u in User) == 2
+        with reads.read_session():
+            # The file copy predates the write
+            assert count(u for u in User) == 1
+
+    def test_exhausted_pool_falls_back_to_primary(self, file_copy):
+        pool = reads._get_pool()
+        held = [pool.acquire(0), pool.acquire(0)]
+        assert pool.acquire(0.01) is None
+
+        with reads.read_session():
+            assert not reads.in_read_only_session()
+        assert reads.get_read_pool_stats()['fallbacks'] == 1
+        for connection in held:
+            pool.release(connection)
+
+
+'''
+Questo file (test_reads.py) verifica il pool di lettura: le sessioni usano connessioni in sola
+lettura su una copia su file, la connessione principale del thread viene ripristinata,
+read_your_writes legge le proprie scritture e un pool esaurito ripiega sulla connessione principale.
+'''
@@ -0,0 +1,82 @@
+# tests/unit/test_retention.py
+"""
+Test unitari per l'archiviazione degli alert e la compattazione (model/retention.py).
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from pony.orm import db_session
+
+from model import db, add_user, create_alert, get_user_by_username, Alert, AlertArchive
+from model import clock, retention
+
+NOW = datetime(2025, 6, 10, 12, 0)
+
+
+@pytest.fixture
+def retention_patient(empty_model_db):
+    """Paziente con orologio simulato e lotti di archiviazione piccoli"""
+    add_user('retention_patient', 'secret', role='patient')
+    with db_session:
+        patient_id = get_user_by_username('retention_patient').patient_profile.id
+    retention.configure_retention(days=30, batch_size=2)
+    yield patient_id
+    retention.configure_retention(days=30, batch_size=500)
+    clock.reset_clock()
+
+
+def add_alert(patient_id, age_days, is_read=True, resolved_age_days=None, message='Old alert'):
+    """Crea un alert con l'età indicata e ne restituisce l'id"""
+    clock.set_clock(clock.SimulatedClock(NOW - timedelta(days=age_days)))
+    create_alert(patient_id, 'follow_up', message, 'low')
+    clock.set_clock(clock.SimulatedClock(NOW))
+    with db_session:
+        alert = Alert.select().order_by(Alert.id.desc()).first()
+        alert.is_read = is_read
+        if resolved_age_days is not None:
+            alert.resolved_at = NOW - timedelta(days=resolved_age_days)
+        return alert.id
+
+
+class TestAlertRetention:
+    """Test per lo spostamento a blocchi degli alert letti e vecchi"""
+
+    def test_only_old_read_alerts_are_archived(self, retention_patient):
+        archived = [add_alert(retention_patient, 60) for _ in range(5)]
+        archived.append(add_alert(retention_patient, 90, resolved_age_days=40))
+        kept = [add_alert(retention_patient, 60, is_read=False),          # unread
+                add_alert(retention_patient, 5),                          # recent
+                add_alert(retention_patient, 60, resolved_age_days=10)]   # resolved recently
+
+        report = retention.run_alert_retention()
+
+        assert report['moved'] == 6 and report['batches'] == 3
+        with db_session:
+            assert sorted(a.id for a in Alert.select()) == kept
+            assert sorted(a.id for a in AlertArchive.select()) == archived
+            row = AlertArchive[archived[0]]
+            assert (row.patient_id, row.alert_type, row.message) == (retention_patient, 'follow_up', 'Old alert')
+            assert row.archived_at == NOW
+        assert retention.run_alert_retention()['moved'] == 0
+
+    def test_free_pages_are_returned(self, retention_patient):
+        for _ in range(40):
+            add_alert(retention_patient, 60, message='x' * 4000)
+        with db_session:
+            assert db.execute('PRAGMA auto_vacuum').fetchone()[0] == 2  # INCREMENTAL
+        retention.configure_retention(batch_size=100)
+
+        report = retention.run_alert_retention()
+
+        assert report['moved'] == 40
+        with db_session:
+            db.execute('DELETE FROM "AlertArchive"')
+        reclaimed, free = retention.incremental_vacuum()
+        assert report['reclaimed_bytes'] + reclaimed > 0 and free == 0
+
+
+'''
+Questo file (test_retention.py) verifica la conservazione degli alert: solo gli alert letti e
+più vecchi del periodo vengono archiviati, a blocchi e con tutti i campi, e le pagine liberate
+tornano al file con incremental_vacuum.
+'''
@@ -0,0 +1,118 @@
+# tests/unit/test_rollups.py
+"""
+Test unitari per le tabelle di aggregazione della glicemia (model/rollups.py).
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from pony.orm import db_session
+
+from model import (
+    db, add_user, add_glucose_reading, get_user_by_username,
+    rebuild_glucose_rollups, get_glucose_window_stats, get_glucose_series
+)
+from model import clock
+
+
+@pytest.fixture
+def rollup_patient(empty_model_db):
+    """Paziente senza medico con letture registrate a orari simulati"""
+    add_user('rollup_patient', 'secret', role='patient')
+    with db_session:
+        patient_id = get_user_by_username('rollup_patient').patient_profile.id
+    yield patient_id
+    clock.reset_clock()
+
+
+def log_readings(patient_id, readings):
+    sim = clock.SimulatedClock(datetime(2025, 5, 1, 0, 0))
+    clock.set_clock(sim)
+    for moment, value, before_meal in readings:
+        sim.set(moment)
+        add_glucose_reading(patient_id, value, before_meal)
+    return sim
+
+
+def rollup_rows():
+    with db_session:
+        return {
+            table: sorted(db.select(
+                f'SELECT "patient", "bucket_start", "is_before_meal", "reading_count", "value_sum", '
+                f'"value_sum_sq", "value_min", "value_max", "below_range", "in_range", "above_range" FROM "{table}"'
+            ))
+            for table in ('GlucoseHourlyRollup', 'GlucoseDailyRollup')
+        }
+
+
+class TestGlucoseRollups:
+    """Test per l'aggiornamento incrementale e la ricostruzione dei rollup"""
+
+    READINGS = [
+        (datetime(2025, 5, 1, 7, 10), 95.0, True),
+        (datetime(2025, 5, 1, 7, 50), 140.0, True),
+        (datetime(2025, 5, 1, 13, 0), 210.0, False),
+        (datetime(2025, 5, 2, 7, 5), 75.0, True),
+        (datetime(2025, 5, 3, 20, 30), 160.0, False),
+    ]
+
+    def test_incremental_matches_rebuild(self, rollup_patient):
+        log_readings(rollup_patient, self.READINGS)
+        incremental = rollup_rows()
+
+        counts = rebuild_glucose_rollups()
+
+        assert rollup_rows() == incremental
+        assert counts == {'hour': 4, 'day': 4}
+
+    def test_window_stats_from_rollups(self, rollup_patient):
+        sim = log_readings(rollup_patient, self.READINGS)
+        sim.set(datetime(2025, 5, 4, 12, 0))
+
+        stats = get_glucose_window_stats(rollup_patient, days=7)
+
+        values = [value for _, value, _ in self.READINGS]
+        assert stats['count'] == 5
+        assert stats['average'] == round(sum(values) / len(values), 1)
+        assert (stats['min'], stats['max']) == (75.0, 210.0)
+        # 95, 160 in range; 75 below; 140, 210 above
+        assert (stats['below_range'], stats['in_range'], stats['above_range']) == (1, 2, 2)
+
+        before_meal = get_glucose_window_stats(rollup_patient, days=7, before_meal=True)
+        assert before_meal['count'] == 3
+
+        # Window starting mid-day: partial day from the hourly table, whole days from the daily one
+        assert get_glucose_window_stats(rollup_patient, days=2)['count'] == 1
+        assert get_glucose_window_stats(rollup_patient, days=3, until=datetime(2025, 5, 4, 10, 0))['count'] == 3
+        # Readings after `until` stay out, even later the same day
+        assert get_glucose_window_stats(rollup_patient, days=2, until=datetime(2025, 5, 3, 10, 0))['count'] == 2
+        assert get_glucose_window_stats(rollup_patient, days=3, until=datetime(2025, 5, 2, 7, 30))['count'] == 4
+
+    def test_daily_series(self, rollup_patient):
+        sim = log_readings(rollup_patient, self.READINGS)
+        sim.set(datetime(2025, 5, 4, 12, 0))
+
+        series = get_glucose_series(rollup_patient, days=30, granularity='day')
+
+        first = series[0]
+        assert first['bucket_start'] == datetime(2025, 5, 1)
+        assert first['is_before_meal'] is True
+        assert (first['count'], first['average'], first['min'], first['max']) == (2, 117.5, 95.0, 140.0)
+        assert len(series) == 4
+
+    def test_failing_rollup_rolls_back_the_reading(self, rollup_patient, monkeypatch):
+        log_readings(rollup_patient, self.READINGS[:1])
+
+        def broken(*args):
+            raise RuntimeError("rollup table unavailable")
+        monkeypatch.setattr('model.operations.record_glucose_reading', broken)
+        with pytest.raises(RuntimeError):
+            add_glucose_reading(rollup_patient, 180.0, False)
+
+        with db_session:
+            assert db.select('SELECT COUNT(*) FROM "GlucoseReading"')[0] == 1
+        assert rollup_rows()['GlucoseHourlyRollup'][0][3] == 1
+
+
+'''
+Questo file (test_rollups.py) verifica le tabelle di aggregazione orarie e giornaliere della glicemia.
+'''
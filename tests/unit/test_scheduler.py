@@ -0,0 +1,33 @@
+# tests/unit/test_scheduler.py
+"""
+Test unitari per lo scheduler dei controlli di compliance (scheduler.py).
+"""
+from concurrent.futures import Future
+from unittest.mock import patch
+
+import scheduler
+
+
+class TestComplianceCheck:
+    """Test per la suddivisione del controllo in job di scrittura separati"""
+
+    def test_one_write_job_per_patient(self):
+        jobs = []
+
+        def submit(func, *args):
+            jobs.append((func.__name__, args))
+            future = Future()
+            future.set_result(None)
+            return future
+
+        with patch('scheduler.submit_write', submit), patch('scheduler.get_patient_ids', return_value=[3, 7]):
+            scheduler.run_compliance_check()
+
+        assert jobs == [('clear_all_compliance_alerts', ()),
+                        ('check_medication_compliance', (3,)), ('check_medication_compliance', (7,))]
+
+
+'''
+Questo file (test_scheduler.py) verifica che il controllo di compliance passi dal thread di
+scrittura un paziente alla volta, così le scritture delle richieste non aspettano l'intero giro.
+'''
@@ -0,0 +1,118 @@
+# tests/unit/test_security.py
+"""
+Test unitari per il pool di hashing delle password e i limiti di concorrenza (model/security.py).
+"""
+import threading
+from concurrent.futures import Future
+
+import pytest
+
+from model import security
+from model.security import PasswordPoolBusy
+
+
+@pytest.fixture
+def inline_pool():
+    yield
+    security.configure_password_pool(workers=0, max_pending=16, timeout=10, max_per_account=2, max_per_ip=4)
+
+
+class TestLoginSlots:
+    """Test per i limiti per account e per IP"""
+
+    def test_account_cap(self, inline_pool):
+        security.configure_password_pool(workers=0, max_per_account=1, max_per_ip=10)
+
+        with security.login_slot(account='mario', client_ip='10.0.0.1'):
+            with pytest.raises(PasswordPoolBusy):
+                with security.login_slot(account='mario', client_ip='10.0.0.2'):
+                    pass
+            # Un altro account non è bloccato
+            with security.login_slot(account='anna', client_ip='10.0.0.1'):
+                pass
+
+        # Lo slot viene rilasciato all'uscita
+        with security.login_slot(account='mario', client_ip='10.0.0.1'):
+            pass
+
+    def test_ip_cap_releases_account_slot(self, inline_pool):
+        security.configure_password_pool(workers=0, max_per_account=5, max_per_ip=1)
+
+        with security.login_slot(account='a', client_ip='10.0.0.9'):
+            with pytest.raises(PasswordPoolBusy):
+                with security.login_slot(account='b', client_ip='10.0.0.9'):
+                    pass
+
+        assert security._account_slots == {}
+        assert security._ip_slots == {}
+
+
+class TestPasswordPool:
+    """Test per la coda limitata del pool"""
+
+    def test_queue_limit_rejects(self, inline_pool, monkeypatch):
+        security.configure_password_pool(workers=1, max_pending=1)
+        future = Future()
+        submitted = threading.Event()
+
+        class FakePool:
+            def submit(self, *args):
+                submitted.set()
+                return future
+
+        monkeypatch.setattr(security, '_get_pool', lambda: FakePool())
+
+        worker = threading.Thread(target=security.hash_password, args=('pw',))
+        worker.start()
+        submitted.wait(5)
+        try:
+            with pytest.raises(PasswordPoolBusy):
+                security.hash_password('other')
+        finally:
+            future.set_result(('hash', 1.0))
+            worker.join()
+
+        stats = security.get_password_pool_stats()
+        assert stats['rejected'] >= 1
+        assert stats['in_flight'] == 0
+
+    def test_timeout_is_busy_and_keeps_the_slot(self, inline_pool, monkeypatch):
+        security.configure_password_pool(workers=1, max_pending=1, timeout=0.05)
+        futures = [Future(), Future()]
+        monkeypatch.setattr(security, '_get_pool', lambda: type('FakePool', (), {
+            'submit': lambda self, *args: futures.pop(0)})())
+        running = futures[0]
+
+        with pytest.raises(PasswordPoolBusy):
+            security.hash_password('slow')
+        # The hash is still running in the pool: its slot is not free yet
+        with pytest.raises(PasswordPoolBusy):
+            security.hash_password('next')
+
+        running.set_result(('hash', 1.0))
+        futures[0].set_result(('hash', 1.0))
+        assert security.hash_password('next') == 'hash'
+        stats = security.get_password_pool_stats()
+        assert stats['timed_out'] >= 1 and stats['in_flight'] == 0
+
+    def test_real_process_pool_round_trip(self, inline_pool):
+        security.configure_password_pool(workers=1)
+        security.set_password_hash_method(security.FAST_HASH_METHOD)
+
+        password_hash = security.hash_password('secret')
+
+        assert security.verify_password(password_hash, 'secret')
+        assert not security.verify_password(password_hash, 'nope')
+        assert security.get_password_pool_stats()['completed'] >= 3
+
+    def test_fast_method_is_used_inline(self, inline_pool):
+        security.set_password_hash_method(security.FAST_HASH_METHOD)
+
+        password_hash = security.hash_password('secret')
+
+        assert password_hash.startswith('pbkdf2:sha256:1000$')
+        assert security.verify_password(password_hash, 'secret')
+
+'''
+Questo file (test_security.py) verifica coda limitata, metriche e limiti di concorrenza del pool password.
+'''
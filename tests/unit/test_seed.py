@@ -0,0 +1,37 @@
+# tests/unit/test_seed.py
+"""
+Test unitari per il caricamento dei dati demo (model/seed.py).
+"""
+from pony.orm import db_session
+
+from model import User, Patient, GlucoseReading, Alert, validate_user
+from model.seed import seed_demo_data, load_fixture
+
+
+class TestSeedDemoData:
+    """Test per il caricamento in blocco della fixture demo"""
+
+    def test_seed_loads_fixture_once(self, empty_model_db):
+        fixture = load_fixture()
+
+        assert seed_demo_data() is True
+        assert seed_demo_data() is False
+
+        with db_session:
+            assert User.select().count() == len(fixture['users'])
+            assert Patient.select().count() == len(fixture['patients'])
+            assert GlucoseReading.select().count() == len(fixture['glucose_readings']['rows'])
+            assert Alert.select().count() == len(fixture['alerts'])
+            assert Patient[2].assigned_doctor.user.username == 'dr_smith'
+
+    def test_precomputed_hashes_validate(self, empty_model_db):
+        seed_demo_data()
+
+        with db_session:
+            assert validate_user('dr_smith', 'doctorpass') is not None
+            assert validate_user('mario_rossi', 'wrongpass') is None
+
+
+'''
+Questo file (test_seed.py) verifica il seeding in blocco dei dati demo.
+'''
@@ -0,0 +1,116 @@
+# tests/unit/test_storage_format.py
+"""
+Test unitari per il formato compatto di archiviazione (model/storage_format.py).
+"""
+import sqlite3
+from datetime import datetime
+
+import pytest
+from pony.orm import Database, Required, Optional, db_session, select, count
+
+from model import db, add_user, create_alert, get_user_by_username, Alert, User
+from model.storage_format import (
+    to_epoch, from_epoch, AlertSeverity, CodedStr, install_storage_format, migrate_storage_format
+)
+
+
+class Level(CodedStr):
+    CODES = ('', 'low', 'high')
+
+
+class TestEncodings:
+    """Test per la conversione di date e codici"""
+
+    def test_epoch_round_trip_drops_microseconds(self):
+        moment = datetime(2025, 6, 9, 7, 30, 15, 999999)
+        assert from_epoch(to_epoch(moment)) == datetime(2025, 6, 9, 7, 30, 15)
+        # Wall-clock midnight is a multiple of one day
+        assert to_epoch(datetime(2025, 6, 9)) % 86400 == 0
+        assert from_epoch('2025-06-09 07:30:15.000000') == datetime(2025, 6, 9, 7, 30, 15)
+
+    def test_unknown_code_is_rejected(self):
+        assert AlertSeverity.code('high') == 2
+        assert AlertSeverity.value_of(0) == 'low'
+        with pytest.raises(ValueError):
+            AlertSeverity.code('urgent')
+
+    def test_entities_store_integers(self, empty_model_db):
+        add_user('format_doctor', 'secret', role='doctor')
+        add_user('format_patient', 'secret', role='patient')
+        with db_session:
+            patient_id = get_user_by_username('format_patient').patient_profile.id
+        assert create_alert(patient_id, 'glucose_high', 'High glucose', 'high')
+
+        with db_session:
+            assert db.select('SELECT DISTINCT typeof("role") FROM "User"') == ['integer']
+            assert db.select('SELECT typeof("alert_type"), typeof("severity"), typeof("created_at") '
+                             'FROM "Alert"') == [('integer', 'integer', 'integer')]
+            alert = Alert.select().first()
+            assert (alert.alert_type, alert.severity) == ('glucose_high', 'high')
+            assert get_user_by_username('format_doctor').role == 'doctor'
+            # Range conditions on datetimes still work in Pony queries
+            since = datetime(2000, 1, 1)
+            assert select(a for a in Alert if a.created_at >= since).count() == 1
+
+    def test_pony_queries_see_strings(self, empty_model_db):
+        add_user('query_doctor', 'secret', role='doctor')
+        add_user('query_patient', 'secret', role='patient')
+        with db_session:
+            patient_id = get_user_by_username('query_patient').patient_profile.id
+        create_alert(patient_id, 'glucose_high', 'High glucose', 'high')
+        create_alert(patient_id, 'follow_up', 'Call back', 'low')
+
+        with db_session:
+            role = 'doctor'
+            assert [u.username for u in select(u for u in User if u.role == 'patient')] == ['query_patient']
+            assert [u.username for u in select(u for u in User if u.role == role)] == ['query_doctor']
+            assert select(a for a in Alert if a.alert_type != 'follow_up').count() == 1
+            types = ('follow_up', 'medication_missed')
+            assert select(a for a in Alert if a.alert_type in types).count() == 1
+            assert sorted(select((a.alert_type, count(a)) for a in Alert)) == [('follow_up', 1), ('glucose_high', 1)]
+            # A value without a code is an error, not an empty result
+            with pytest.raises(ValueError):
+                select(a for a in Alert if a.severity == 'urgent')[:]
+
+
+class TestMigration:
+    """Test per la conversione di un database scritto con il formato testuale"""
+
+    def test_version_0_file_is_converted(self, tmp_path):
+        path = str(tmp_path / 'legacy.sqlite')
+        legacy = sqlite3.connect(path)
+        legacy.execute('CREATE TABLE "Event" ("id" INTEGER PRIMARY KEY AUTOINCREMENT, '
+                       '"happened_at" DATETIME NOT NULL, "level" TEXT NOT NULL)')
+        legacy.execute('CREATE INDEX "idx_event__happened_at" ON "Event" ("happened_at")')
+        legacy.executemany('INSERT INTO "Event" ("happened_at", "level") VALUES (?, ?)',
+                           [('2025-06-09 07:30:15.250000', 'high'), ('2025-06-10 00:00:00.000000', '')])
+        legacy.commit()
+        legacy.close()
+
+        database = Database()
+
+        class Event(database.Entity):
+            happened_at = Required(datetime, index=True)
+            level = Optional(Level)
+
+        database.bind(provider='sqlite', filename=path)
+        install_storage_format(database)
+        database.generate_mapping(create_tables=True)
+        assert migrate_storage_format(database)
+        assert not migrate_storage_format(database)
+
+        with db_session:
+            assert database.select('SELECT typeof("happened_at"), typeof("level") FROM "Event"') == \
+                [('integer', 'integer')] * 2
+            assert [(e.happened_at, e.level) for e in Event.select().order_by(Event.id)] == [
+                (datetime(2025, 6, 9, 7, 30, 15), 'high'), (datetime(2025, 6, 10), '')]
+            assert database.select("SELECT name FROM sqlite_master WHERE type = 'index' "
+                                   "AND tbl_name = 'Event'") == ['idx_event__happened_at']
+        database.disconnect()
+
+
+'''
+Questo file (test_storage_format.py) verifica il formato compatto: secondi interi dall'epoca,
+codici per i valori enumerati, query su intervalli di date ancora funzionanti e migrazione
+di un file scritto con date testuali e stringhe.
+'''
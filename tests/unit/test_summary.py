@@ -0,0 +1,154 @@
+# tests/unit/test_summary.py
+"""
+Test unitari per la riga di riepilogo del paziente (model/summary.py).
+"""
+from datetime import datetime
+
+import pytest
+from pony.orm import db_session
+
+from model import (
+    db, add_user, add_glucose_reading, add_therapy, create_alert, get_user_by_username,
+    clear_compliance_alerts_for_patient, get_patient_summary, rebuild_patient_summaries,
+    record_medication_intake, add_symptom, update_patient_info, acknowledge_alerts,
+    get_patient_data_version, get_patient_data_versions, Therapy
+)
+from model import clock
+
+
+@pytest.fixture
+def summary_patient(empty_model_db):
+    """Paziente con medico assegnato e orologio simulato"""
+    add_user('summary_doctor', 'secret', role='doctor')
+    add_user('summary_patient', 'secret', role='patient')
+    with db_session:
+        doctor = get_user_by_username('summary_doctor').doctor_profile
+        patient = get_user_by_username('summary_patient').patient_profile
+        patient.assigned_doctor = doctor
+        ids = patient.id, doctor.id
+    sim = clock.SimulatedClock(datetime(2025, 6, 10, 8, 0))
+    clock.set_clock(sim)
+    yield ids + (sim,)
+    clock.reset_clock()
+
+
+def summary_row(patient_id):
+    with db_session:
+        return db.select(
+            'SELECT "latest_value", "latest_time", "week_start", "week_sum", "week_count", '
+            '"active_therapy_count", "unread_alert_count" FROM "PatientSummary" WHERE "patient" = $patient_id',
+            {'patient_id': patient_id}
+        )[0]
+
+
+class TestPatientSummary:
+    """Test per l'aggiornamento transazionale del riepilogo"""
+
+    def test_write_paths_match_rebuild(self, summary_patient):
+        patient_id, doctor_id, sim = summary_patient
+
+        add_glucose_reading(patient_id, 100.0, True)
+        sim.advance(hours=5)
+        add_glucose_reading(patient_id, 150.0, False)
+        add_therapy(patient_id, doctor_id, 'Metformin', 2, 500.0, 'mg', 'With meals')
+        create_alert(patient_id, 'compliance_issue', 'Missed doses', 'medium', doctor_id)
+        create_alert(patient_id, 'glucose_high', 'High glucose', 'high', doctor_id)
+        clear_compliance_alerts_for_patient(patient_id)
+
+        summary = get_patient_summary(patient_id)
+        assert summary['latest_value'] == 150.0
+        assert summary['latest_time'] == datetime(2025, 6, 10, 13, 0)
+        assert summary['active_therapy_count'] == 1
+        assert summary['unread_alert_count'] == 1
+        assert summary['week_count'] == 2 and summary['week_average'] == 125.0
+
+        incremental = summary_row(patient_id)
+        rebuild_patient_summaries(patient_id)
+        assert summary_row(patient_id) == incremental
+
+    def test_week_window_moves_without_writes(self, summary_patient):
+        patient_id, _, sim = summary_patient
+
+        add_glucose_reading(patient_id, 120.0, True)
+        sim.advance(days=3)
+        add_glucose_reading(patient_id, 180.0, False)
+
+        assert get_patient_summary(patient_id)['week_average'] == 150.0
+
+        # The first reading leaves the 7-day window: the read re-sums the daily rollups
+        sim.advance(days=5)
+        summary = get_patient_summary(patient_id)
+        assert summary['week_count'] == 1 and summary['week_average'] == 180.0
+        assert summary['latest_value'] == 180.0
+
+    def test_missing_row_is_computed_not_stored(self, summary_patient):
+        patient_id, _, _ = summary_patient
+        add_glucose_reading(patient_id, 110.0, True)
+        with db_session:
+            db.execute('DELETE FROM "PatientSummary"')
+
+        assert get_patient_summary(patient_id)['latest_value'] == 110.0
+        with db_session:
+            assert db.select('SELECT COUNT(*) FROM "PatientSummary"')[0] == 0
+
+    def test_failing_summary_update_rolls_back_the_write(self, summary_patient, monkeypatch):
+        patient_id, _, _ = summary_patient
+        add_glucose_reading(patient_id, 110.0, True)
+
+        def broken(patient_id):
+            raise RuntimeError("summary table unavailable")
+        monkeypatch.setattr('model.summary._log_data_change', broken)
+        with pytest.raises(RuntimeError):
+            add_glucose_reading(patient_id, 300.0, False)
+        with db_session:
+            assert db.select('SELECT COUNT(*) FROM "GlucoseReading"')[0] == 1
+
+    def test_failing_alert_counter_rolls_back_the_alert(self, summary_patient, monkeypatch):
+        patient_id, doctor_id, _ = summary_patient
+        create_alert(patient_id, 'compliance_issue', 'Missed doses', 'medium', doctor_id)
+
+        def broken(patient_id):
+            raise RuntimeError("summary table unavailable")
+        monkeypatch.setattr('model.summary._log_data_change', broken)
+        with pytest.raises(RuntimeError):
+            create_alert(patient_id, 'glucose_high', 'High glucose', 'high', doctor_id)
+        with pytest.raises(RuntimeError):
+            clear_compliance_alerts_for_patient(patient_id)
+        monkeypatch.undo()
+
+        with db_session:
+            assert db.select('SELECT COUNT(*) FROM "Alert" WHERE "resolved_at" IS NULL')[0] == 1
+        assert get_patient_summary(patient_id)['unread_alert_count'] == 1
+
+
+class TestPatientDataVersion:
+    """Test per la versione dei dati incrementata da ogni scrittura"""
+
+    def test_every_write_path_bumps_the_version(self, summary_patient):
+        patient_id, doctor_id, _ = summary_patient
+        versions = [get_patient_data_version(patient_id)]
+        assert versions[0] is not None  # row created with the patient
+
+        def bumped(write, *args, **kwargs):
+            write(*args, **kwargs)
+            versions.append(get_patient_data_version(patient_id))
+            return versions[-1] > versions[-2]
+
+        assert bumped(add_glucose_reading, patient_id, 120.0, True)
+        assert bumped(add_therapy, patient_id, doctor_id, 'Metformin', 2, 500.0, 'mg', 'With meals')
+        with db_session:
+            therapy_id = Therapy.select().first().id
+        assert bumped(record_medication_intake, patient_id, therapy_id, 500.0)
+        assert bumped(add_symptom, patient_id, 'fatigue', 'After lunch', 'mild')
+        assert bumped(create_alert, patient_id, 'compliance_issue', 'Missed doses', 'medium', doctor_id)
+        assert bumped(acknowledge_alerts, patient_id=patient_id)
+        # Already read: only resolved_at changes
+        assert bumped(clear_compliance_alerts_for_patient, patient_id)
+        assert bumped(update_patient_info, patient_id, risk_factors='smoking')
+        assert bumped(rebuild_patient_summaries, patient_id)
+        assert get_patient_data_versions([patient_id, patient_id + 1000]) == {patient_id: versions[-1]}
+
+
+'''
+Questo file (test_summary.py) verifica la riga di riepilogo per paziente usata dalle dashboard.
+'''
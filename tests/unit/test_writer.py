@@ -0,0 +1,108 @@
+# tests/unit/test_writer.py
+"""
+Test unitari per la coda di scrittura a thread singolo con commit di gruppo (model/writer.py).
+"""
+import sqlite3
+import threading
+
+import pytest
+
+from model import writer
+
+
+class TestWriteQueue:
+    """Test per il raggruppamento dei commit, la coda limitata e i tentativi su lock"""
+
+    @staticmethod
+    def block_writer():
+        """Occupa il thread di scrittura finché l'evento restituito non viene impostato"""
+        started, gate = threading.Event(), threading.Event()
+
+        def blocking_job():
+            started.set()
+            return gate.wait(5)
+        future = writer.submit_write(blocking_job)
+        assert started.wait(5)
+        return gate, future
+
+    @pytest.fixture(autouse=True)
+    def queued_writer(self):
+        timeout = writer.WRITE_TIMEOUT
+        writer.configure_writer(enabled=True, max_pending=4, batch_max=8)
+        writer.reset_writer_stats()
+        yield
+        writer.configure_writer(enabled=False, timeout=timeout)
+
+    def test_waiting_jobs_share_one_commit(self):
+        gate, first = self.block_writer()
+        queued = [writer.submit_write(lambda n=n: n * 2) for n in range(4)]
+
+        with pytest.raises(writer.WriteQueueFull):
+            writer.submit_write(lambda: None)
+
+        gate.set()
+        assert first.result(timeout=5) is True
+        assert [future.result(timeout=5) for future in queued] == [0, 2, 4, 6]
+        stats = writer.get_writer_stats()
+        assert stats['rejected'] == 1 and stats['max_batch'] == 4
+
+    def test_failing_job_does_not_fail_the_batch(self):
+        gate, _ = self.block_writer()
+        good = writer.submit_write(lambda: 'ok')
+        bad = writer.submit_write(lambda: 1 / 0)
+        gate.set()
+
+        assert good.result(timeout=5) == 'ok'
+        with pytest.raises(ZeroDivisionError):
+            bad.result(timeout=5)
+
+    def test_locked_database_is_retried(self):
+        attempts = []
+
+        def contended_write():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise sqlite3.OperationalError("database is locked")
+            return len(attempts)
+
+        assert writer.run_write(contended_write) == 3
+        assert writer.get_writer_stats()['busy_retries'] == 2
+
+    def test_timed_out_write_is_cancelled_or_still_running(self):
+        writer.configure_writer(enabled=True, max_pending=4, batch_max=8, timeout=0.05)
+        written = []
+        gate, first = self.block_writer()
+
+        # Still queued at the timeout: cancelled, never written
+        with pytest.raises(TimeoutError):
+            writer.run_write(written.append, 'queued')
+        gate.set()
+        assert first.result(timeout=5) is True
+
+        # Already running at the timeout: it will commit, so it is not reported as failed
+        started, release = threading.Event(), threading.Event()
+
+        def slow_write():
+            started.set()
+            release.wait(5)
+            written.append('running')
+        with pytest.raises(writer.WriteStillRunning):
+            writer.run_write(slow_write)
+        release.set()
+        assert writer.run_write(lambda: None) is None  # the writer is past the slow job
+        assert written == ['running']
+        assert writer.get_writer_stats()['cancelled'] == 1
+
+    def test_jobs_within_the_window_are_grouped(self):
+        writer.configure_writer(enabled=True, max_pending=16, batch_max=16, batch_window_ms=200)
+        futures = [writer.submit_write(lambda n=n: n) for n in range(5)]
+        assert [future.result(timeout=5) for future in futures] == list(range(5))
+        stats = writer.get_writer_stats()
+        assert stats['batches'] == 1 and stats['avg_batch'] == 5
+
+'''
+Questo file (test_writer.py) verifica la coda di scrittura: i job in attesa condividono un
+solo commit, la coda piena rifiuta i nuovi job, un job fallito non fa fallire gli altri e
+i conflitti "database is locked" vengono ritentati; allo scadere dell'attesa un job ancora in coda
+viene annullato, uno già avviato viene segnalato come ancora in corso. I job non accedono al database.
+'''
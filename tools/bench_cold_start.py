@@ -0,0 +1,71 @@
+# tools/bench_cold_start.py
+"""
+Measure cold-start cost of importing the model / app modules in a fresh interpreter.
+
+    python tools/bench_cold_start.py --runs 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+project_root = Path(__file__).parent.parent
+
+SCENARIOS = {
+    'import model': "import model",
+    'import mvc_app': "import mvc_app",
+    'create_app()': "import mvc_app; mvc_app.create_app()",
+    'create_app(DevelopmentConfig)': "import mvc_app; mvc_app.create_app(mvc_app.DevelopmentConfig)",
+}
+
+
+def time_snippet(code, env):
+    start = perf_counter()
+    subprocess.run([sys.executable, '-c', code], cwd=project_root, env=env, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return (perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start benchmark")
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    baseline = time_snippet("pass", dict(os.environ))
+    print(f"interpreter startup: {baseline:.0f} ms (included in the numbers below)")
+
+    for name, code in SCENARIOS.items():
+        for fresh in (True, False):
+            db_path = os.path.join(tempfile.mkdtemp(prefix='diabetes-cold-'), 'app.sqlite')
+            env = dict(os.environ, DATABASE_PATH=db_path)
+            if not fresh:
+                # Create and seed the database once so runs measure a warm file
+                try:
+                    time_snippet(code, env)
+                except subprocess.CalledProcessError:
+                    pass
+            samples = []
+            for _ in range(args.runs):
+                if fresh:
+                    for suffix in ('', '-wal', '-shm'):
+                        if os.path.exists(db_path + suffix):
+                            os.remove(db_path + suffix)
+                try:
+                    samples.append(time_snippet(code, env))
+                except subprocess.CalledProcessError:
+                    break
+            label = f"{name} [{'fresh db' if fresh else 'existing db'}]"
+            if samples:
+                print(f"{label:<45} median {statistics.median(samples):8.0f} ms  "
+                      f"min {min(samples):8.0f} ms")
+            else:
+                print(f"{label:<45} not available")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+# tools/bench_storage.py
+"""
+Mixed read/write benchmark of the SQLite storage profiles (model.database.STORAGE_PROFILES).
+
+    python tools/bench_storage.py --duration 10
+    python tools/bench_storage.py --profiles balanced durable --readers 4 --writers 2
+
+Every profile runs in a fresh interpreter on a fresh file:
+1. bulk load: glucose history for every patient through ingest_glucose_readings()
+2. mixed load: reader threads (summary, 7-day stats, last readings) while writer threads
+   add one reading at a time through the write queue (rollups and summary included, alert
+   evaluation left out so that the storage cost dominates) and a "sweep" thread commits
+   a large batch every second, like the scheduler does.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from time import perf_counter
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+PROFILES = ['sqlite-defaults', 'durable', 'balanced', 'bulk-load']
+
+
+def _percentile(samples, fraction):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def run_profile(args):
+    """Worker mode: configure the database with one profile and measure it (prints JSON)"""
+    from pony.orm import db_session
+    from model.security import configure_password_pool, set_password_hash_method, FAST_HASH_METHOD
+    from model.database import configure_db, get_storage_settings
+    from model.writer import configure_writer, run_write, submit_write
+    from model import (
+        add_user, get_user_by_username, ingest_glucose_readings,
+        get_patient_summary, get_glucose_window_stats, db
+    )
+
+    configure_password_pool(workers=0)
+    set_password_hash_method(FAST_HASH_METHOD)
+    configure_db(filename=args.db, profile=args.worker, slow_query_ms=60_000)
+    configure_writer(enabled=True, max_pending=1024)
+
+    patient_ids = []
+    for index in range(args.patients):
+        add_user(f'bench_patient_{index}', 'secret', role='patient')
+        with db_session:
+            patient_ids.append(get_user_by_username(f'bench_patient_{index}').patient_profile.id)
+
+    # 1. Bulk load
+    rng = random.Random(7)
+    start_time = datetime.now() - timedelta(minutes=5 * args.history)
+    loaded, start = 0, perf_counter()
+    for patient_id in patient_ids:
+        readings = [{'measurement_time': start_time + timedelta(minutes=5 * i), 'value': rng.uniform(60, 280),
+                     'is_before_meal': i % 2 == 0} for i in range(args.history)]
+        loaded += run_write(ingest_glucose_readings, patient_id, readings, False)['inserted']
+    load_s = perf_counter() - start
+
+    # 2. Mixed load
+    stop = threading.Event()
+    reads, writes, sweeps, errors = [], [], [], []
+
+    def reader(seed):
+        local = random.Random(seed)
+        while not stop.is_set():
+            patient_id = local.choice(patient_ids)
+            begin = perf_counter()
+            try:
+                with db_session:
+                    get_patient_summary(patient_id)
+                    get_glucose_window_stats(patient_id, days=7)
+                    db.select('SELECT "value", "measurement_time" FROM "GlucoseReading" WHERE "patient" = $p '
+                              'ORDER BY "measurement_time" DESC LIMIT 50', {'p': patient_id})
+                reads.append((perf_counter() - begin) * 1000)
+            except Exception as e:
+                errors.append(f"read: {e}")
+            stop.wait(args.think_ms / 1000.0)
+
+    def writer(seed):
+        local = random.Random(seed)
+        while not stop.is_set():
+            begin = perf_counter()
+            try:
+                reading = {'measurement_time': datetime.now(), 'value': local.uniform(60, 280),
+                           'is_before_meal': local.random() < 0.5}
+                run_write(ingest_glucose_readings, local.choice(patient_ids), [reading], False)
+                writes.append((perf_counter() - begin) * 1000)
+            except Exception as e:
+                errors.append(f"write: {e}")
+            stop.wait(args.think_ms / 1000.0)
+
+    def sweep():
+        batch_start = datetime.now() + timedelta(days=1)
+        while not stop.wait(1.0):
+            readings = [{'measurement_time': batch_start + timedelta(seconds=i), 'value': 120, 'is_before_meal': True}
+                        for i in range(args.sweep_rows)]
+            batch_start += timedelta(seconds=args.sweep_rows)
+            begin = perf_counter()
+            try:
+                submit_write(ingest_glucose_readings, patient_ids[0], readings, False).result()
+                sweeps.append((perf_counter() - begin) * 1000)
+            except Exception as e:
+                errors.append(f"sweep: {e}")
+
+    threads = ([threading.Thread(target=reader, args=(n,)) for n in range(args.readers)] +
+               [threading.Thread(target=writer, args=(100 + n,)) for n in range(args.writers)] +
+               [threading.Thread(target=sweep)])
+    for thread in threads:
+        thread.start()
+    stop.wait(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    print(json.dumps({
+        'profile': args.worker,
+        'pragmas': get_storage_settings(),
+        'load_rows_per_s': round(loaded / load_s),
+        'reads_per_s': round(len(reads) / args.duration, 1),
+        'read_p50_ms': round(statistics.median(reads), 2) if reads else None,
+        'read_p99_ms': round(_percentile(reads, 0.99), 2),
+        'writes_per_s': round(len(writes) / args.duration, 1),
+        'write_p95_ms': round(_percentile(writes, 0.95), 2),
+        'sweep_avg_ms': round(statistics.mean(sweeps), 1) if sweeps else None,
+        'errors': len(errors),
+    }))
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite storage profile benchmark")
+    parser.add_argument('--profiles', nargs='+', default=PROFILES, choices=PROFILES)
+    parser.add_argument('--patients', type=int, default=20)
+    parser.add_argument('--history', type=int, default=5000, help="readings per patient in the bulk load")
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--sweep-rows', type=int, default=2000, help="rows of the once-a-second large write")
+    parser.add_argument('--duration', type=float, default=10.0, help="seconds of mixed load per profile")
+    parser.add_argument('--think-ms', type=float, default=5.0, help="pause between two requests of one thread")
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    parser.add_argument('--dir', help="directory for the benchmark files (default: system temp dir)")
+    parser.add_argument('--db', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        return run_profile(args)
+
+    print(f"{'profile':<16}{'load rows/s':>12}{'reads/s':>10}{'read p50':>10}{'read p99':>10}"
+          f"{'writes/s':>10}{'write p95':>11}{'sweep ms':>10}{'errors':>8}")
+    for profile in args.profiles:
+        work_dir = tempfile.mkdtemp(prefix='diabetes-storage-', dir=args.dir)
+        db_path = os.path.join(work_dir, 'bench.sqlite')
+        command = [sys.executable, __file__, '--worker', profile, '--db', db_path,
+                   '--patients', str(args.patients), '--history', str(args.history),
+                   '--readers', str(args.readers), '--writers', str(args.writers),
+                   '--sweep-rows', str(args.sweep_rows), '--duration', str(args.duration),
+                   '--think-ms', str(args.think_ms)]
+        try:
+            output = subprocess.run(command, cwd=project_root, check=True, capture_output=True, text=True).stdout
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        row = json.loads(output.strip().splitlines()[-1])
+        print(f"{profile:<16}{row['load_rows_per_s']:>12}{row['reads_per_s']:>10}{row['read_p50_ms']:>10}"
+              f"{row['read_p99_ms']:>10}{row['writes_per_s']:>10}{row['write_p95_ms']:>11}"
+              f"{str(row['sweep_avg_ms']):>10}{row['errors']:>8}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
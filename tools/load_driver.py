@@ -0,0 +1,179 @@
+# tools/load_driver.py
+"""
+HTTP load driver: concurrent logged-in doctors hammering the dashboard callbacks.
+
+    python mvc_app.py                      # dev server on :8050
+    gunicorn -c gunicorn.conf.py           # or the pre-forked production server
+    python tools/load_driver.py --url http://127.0.0.1:8050 --users 8 --duration 30
+
+Each virtual user logs in once through the Dash login callback, then loops over the
+doctor dashboard callbacks (stats, patient table, glucose chart) and reports throughput
+and latency percentiles per callback.
+"""
+import argparse
+import http.cookiejar
+import json
+import statistics
+import sys
+import threading
+import time
+import urllib.request
+from time import perf_counter
+
+# Callbacks exercised by every iteration: (label, input id.property, input value)
+SCENARIO = [
+    ('doctor stats', 'url.pathname', '/doctor-dashboard'),
+    ('patient table', 'doctor-tabs.active_tab', 'patient-list'),
+    ('glucose chart', 'selected-patient.value', None),
+]
+
+
+def _split_output(output):
+    """Same split as dash._utils.split_callback_id, without the allow_duplicate suffix"""
+    if output.startswith('..'):
+        return [_split_output(part) for part in output[2:-2].split('...')]
+    id_, prop = output.rsplit('.', 1)
+    return {'id': id_, 'property': prop.split('@')[0]}
+
+
+class DashClient:
+    """Minimal Dash renderer stand-in: one cookie jar, callbacks posted by input id"""
+
+    def __init__(self, base_url, dependencies):
+        self.base_url = base_url.rstrip('/')
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+        self.dependencies = dependencies
+
+    def _callback_for(self, input_id, first_output=None):
+        for callback in self.dependencies:
+            ids = [f"{item['id']}.{item['property']}" for item in callback['inputs']]
+            if input_id in ids and (first_output is None or first_output in callback['output']):
+                return callback
+        raise LookupError(f"No callback with input {input_id}")
+
+    def call(self, input_id, value, state=None, first_output=None):
+        callback = self._callback_for(input_id, first_output)
+        state = state or {}
+        body = {
+            'output': callback['output'],
+            'outputs': _split_output(callback['output']),
+            'inputs': [{'id': item['id'], 'property': item['property'],
+                        'value': value if f"{item['id']}.{item['property']}" == input_id else None}
+                       for item in callback['inputs']],
+            'state': [{'id': item['id'], 'property': item['property'],
+                       'value': state.get(f"{item['id']}.{item['property']}")}
+                      for item in callback['state']],
+            'changedPropIds': [input_id],
+        }
+        request = urllib.request.Request(
+            f"{self.base_url}/_dash-update-component", data=json.dumps(body).encode(),
+            headers={'Content-Type': 'application/json'}, method='POST')
+        with self.opener.open(request, timeout=60) as response:
+            return response.status, response.read()
+
+    def login(self, username, password, attempts=20):
+        # Concurrent logins for one account are capped server side: back off and retry
+        for attempt in range(attempts):
+            status, payload = self.call(
+                'login-button.n_clicks', 1,
+                state={'login-username.value': username, 'login-password.value': password})
+            if b'dashboard' in payload:
+                return status
+            if b'try again' not in payload:
+                break
+            time.sleep(0.1 * (attempt + 1))
+        raise RuntimeError(f"Login failed for {username}: {payload[:200]!r}")
+
+
+def fetch_dependencies(base_url):
+    with urllib.request.urlopen(f"{base_url.rstrip('/')}/_dash-dependencies", timeout=30) as response:
+        return json.loads(response.read())
+
+
+def run_user(args, dependencies, results, errors, stop):
+    client = DashClient(args.url, dependencies)
+    try:
+        client.login(args.username, args.password)
+    except Exception as e:
+        errors.append(f"login: {e}")
+        return
+    while not stop.is_set():
+        for label, input_id, value in SCENARIO:
+            if stop.is_set():
+                break
+            start = perf_counter()
+            try:
+                client.call(input_id, args.patient_id if value is None else value)
+            except Exception as e:
+                errors.append(f"{label}: {e}")
+                continue
+            results.append((label, (perf_counter() - start) * 1000, perf_counter()))
+
+
+def _percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dashboard load driver")
+    parser.add_argument('--url', default='http://127.0.0.1:8050')
+    parser.add_argument('--users', type=int, default=8, help="concurrent virtual users")
+    parser.add_argument('--duration', type=float, default=30.0, help="seconds of measured load")
+    parser.add_argument('--username', default='dr_smith')
+    parser.add_argument('--password', default='doctorpass')
+    parser.add_argument('--patient-id', type=int, default=1)
+    parser.add_argument('--json', action='store_true', help="print the summary as JSON")
+    args = parser.parse_args()
+
+    dependencies = fetch_dependencies(args.url)
+    results, errors = [], []
+    stop = threading.Event()
+    threads = [threading.Thread(target=run_user, args=(args, dependencies, results, errors, stop), daemon=True)
+               for _ in range(args.users)]
+    for thread in threads:
+        thread.start()
+
+    start = perf_counter()
+    stop.wait(args.duration)
+    stop.set()
+    elapsed = perf_counter() - start
+    for thread in threads:
+        thread.join(timeout=60)
+
+    measured = [row for row in results if row[2] - start <= elapsed]
+    summary = {
+        'url': args.url,
+        'users': args.users,
+        'duration_s': round(elapsed, 1),
+        'requests': len(measured),
+        'errors': len(errors),
+        'throughput_rps': round(len(measured) / elapsed, 1) if elapsed else 0.0,
+        'callbacks': {}
+    }
+    for label, _, _ in SCENARIO:
+        samples = [duration for name, duration, _ in measured if name == label]
+        if samples:
+            summary['callbacks'][label] = {
+                'count': len(samples),
+                'p50_ms': round(statistics.median(samples), 1),
+                'p95_ms': round(_percentile(samples, 0.95), 1),
+                'max_ms': round(max(samples), 1)
+            }
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(f"{summary['url']}: {summary['users']} users, {summary['requests']} requests in "
+              f"{summary['duration_s']}s -> {summary['throughput_rps']} req/s, {summary['errors']} errors")
+        for label, row in summary['callbacks'].items():
+            print(f"  {label:<15} n={row['count']:<6} p50 {row['p50_ms']:8.1f} ms  "
+                  f"p95 {row['p95_ms']:8.1f} ms  max {row['max_ms']:8.1f} ms")
+        for message in errors[:5]:
+            print(f"  error: {message}")
+    return 1 if errors and not measured else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+# tools/migrate_storage.py
+"""
+Convert a database to the compact storage format (model/storage_format.py) and report the gain.
+
+    python tools/migrate_storage.py --db data/app_database.sqlite
+
+configure_db() migrates on its own at startup; this tool does the same offline, then VACUUMs
+the file and prints table/index sizes and the time of a 30-day range scan before and after.
+"""
+import argparse
+import sqlite3
+import sys
+from datetime import timedelta
+from pathlib import Path
+from time import perf_counter
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def table_sizes(connection):
+    """{table or index name: bytes} from the dbstat virtual table"""
+    rows = connection.execute('SELECT name, SUM(pgsize) FROM dbstat GROUP BY name').fetchall()
+    return {name: size for name, size in rows
+            if not name.startswith('sqlite_') or name.startswith('sqlite_autoindex')}
+
+
+def range_scan_ms(connection, days=30, repeat=5):
+    """Best time of reading every patient's last `days` days of glucose readings"""
+    from model.storage_format import to_epoch, from_epoch
+
+    epoch = connection.execute('PRAGMA user_version').fetchone()[0] >= 1
+    latest = connection.execute('SELECT "patient", MAX("measurement_time") FROM "GlucoseReading" '
+                                'GROUP BY "patient"').fetchall()
+    bounds = []
+    for patient, last in latest:
+        since = from_epoch(last) - timedelta(days=days)
+        bounds.append((patient, to_epoch(since) if epoch else since.strftime('%Y-%m-%d %H:%M:%S.%f')))
+
+    best, rows = None, 0
+    for _ in range(repeat):
+        start = perf_counter()
+        rows = 0
+        for patient, since in bounds:
+            rows += len(connection.execute(
+                'SELECT "measurement_time", "value", "is_before_meal" FROM "GlucoseReading" '
+                'WHERE "patient" = ? AND "measurement_time" >= ? ORDER BY "measurement_time"',
+                (patient, since)).fetchall())
+        elapsed = (perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate to integer timestamps and enum codes")
+    parser.add_argument('--db', required=True, help="SQLite file to convert in place")
+    parser.add_argument('--no-vacuum', action='store_true', help="skip VACUUM (sizes will not shrink)")
+    args = parser.parse_args()
+
+    from model.security import configure_password_pool
+    from model.database import configure_db, release_connection
+
+    configure_password_pool(workers=0)
+
+    connection = sqlite3.connect(args.db)
+    before = table_sizes(connection)
+    scan_before, rows = range_scan_ms(connection)
+    connection.close()
+
+    start = perf_counter()
+    configure_db(filename=args.db, profile='bulk-load')
+    release_connection()
+    migrate_s = perf_counter() - start
+
+    connection = sqlite3.connect(args.db)
+    if not args.no_vacuum:
+        # Lets the alert retention job shrink the file later (PRAGMA incremental_vacuum)
+        connection.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        connection.execute('VACUUM')
+    after = table_sizes(connection)
+    scan_after, _ = range_scan_ms(connection)
+    connection.close()
+
+    print(f"migrated in {migrate_s:.1f} s")
+    print(f"{'table / index':<48}{'before KiB':>12}{'after KiB':>12}")
+    for name in sorted(before, key=before.get, reverse=True):
+        print(f"{name:<48}{before[name] // 1024:>12}{after.get(name, 0) // 1024:>12}")
+    print(f"{'total':<48}{sum(before.values()) // 1024:>12}{sum(after.values()) // 1024:>12}")
+    print(f"30-day range scan of every patient ({rows} rows): {scan_before:.1f} ms -> {scan_after:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,37 @@
+# tools/rebuild_rollups.py
+"""
+Rebuild the hourly/daily glucose rollups from the raw readings (backfill or repair).
+
+    python tools/rebuild_rollups.py                 # all patients, default database
+    python tools/rebuild_rollups.py --patient 3 --db data/app_database.sqlite
+"""
+import argparse
+import sys
+from pathlib import Path
+from time import perf_counter
+
+# Aggiungi il path root del progetto
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild glucose rollup tables")
+    parser.add_argument('--db', help="SQLite file (default: DATABASE_PATH or data/app_database.sqlite)")
+    parser.add_argument('--patient', type=int, help="only rebuild this patient id")
+    args = parser.parse_args()
+
+    from model import configure_db, rebuild_glucose_rollups
+    configure_db(filename=args.db)
+
+    start = perf_counter()
+    counts = rebuild_glucose_rollups(args.patient)
+    elapsed = (perf_counter() - start) * 1000
+    scope = f"patient {args.patient}" if args.patient is not None else "all patients"
+    print(f"Rebuilt rollups for {scope} in {elapsed:.0f} ms: "
+          f"{counts['hour']} hourly buckets, {counts['day']} daily buckets")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,266 @@
+# tools/simulate.py
+"""
+Time-travel simulation of patient behaviour, alert engine and compliance scheduler.
+
+Runs the real scheduler loop and model operations against a throw-away SQLite file. The
+scheduler sleeps on a simulated clock: each sleep replays the patient events that fall in it,
+in one transaction, and moves time forward, so months of activity take seconds.
+
+    python tools/simulate.py --days 90 --sweep-interval 3600
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import sys
+import tempfile
+from collections import Counter
+from datetime import timedelta
+from pathlib import Path
+from time import perf_counter
+
+# Aggiungi il path root del progetto
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+# Behaviour of the demo patients: readings per day, glucose levels and adherence
+DEFAULT_PROFILE = {'reading_hours': [7, 20], 'before_meal': (110, 20), 'after_meal': (160, 30), 'adherence': 0.85}
+PATIENT_PROFILES = {
+    'patient1': {'reading_hours': [7, 20], 'before_meal': (95, 10), 'after_meal': (150, 15), 'adherence': 0.95},
+    'mario_rossi': {'reading_hours': [7, 13, 20], 'before_meal': (180, 30), 'after_meal': (230, 35), 'adherence': 0.55},
+    'anna_verdi': {'reading_hours': [8], 'before_meal': (140, 15), 'after_meal': (170, 20), 'adherence': 0.8},
+    'luca_bianchi': {'reading_hours': [7, 12, 14, 19, 22], 'before_meal': (120, 35), 'after_meal': (170, 45), 'adherence': 0.9},
+    'giulia_ferrari': {'reading_hours': [8, 14], 'before_meal': (105, 12), 'after_meal': (140, 20), 'adherence': 0.97},
+}
+
+# Hours of the day at which doses are taken, by number of daily doses
+DOSE_HOURS = {1: [21], 2: [8, 20], 3: [7, 13, 19], 4: [7, 12, 17, 22]}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Simulate patients, alerts and compliance sweeps over simulated days")
+    parser.add_argument('--days', type=int, default=90, help="simulated days (default: 90)")
+    parser.add_argument('--sweep-interval', type=int, default=3600,
+                        help="seconds between compliance sweeps in simulated time (default: 3600)")
+    parser.add_argument('--report-every', type=int, default=7, help="days per report row (default: 7)")
+    parser.add_argument('--seed', type=int, default=42, help="random seed for patient behaviour")
+    parser.add_argument('--db', help="SQLite file to use (default: temporary file)")
+    parser.add_argument('--json', action='store_true', help="print the report as JSON")
+    return parser.parse_args()
+
+
+def database_size(path):
+    """Size of the SQLite file including its WAL, in bytes"""
+    total = 0
+    for suffix in ('', '-wal'):
+        if os.path.exists(path + suffix):
+            total += os.path.getsize(path + suffix)
+    return total
+
+
+def build_day_events(day_start, patients, rng):
+    """Return the (time, kind, payload) events produced by the patients in one day"""
+    events = []
+    for patient in patients:
+        profile = patient['profile']
+        for hour in profile['reading_hours']:
+            is_before_meal = hour in (7, 8, 12) or rng.random() < 0.3
+            mean, spread = profile['before_meal'] if is_before_meal else profile['after_meal']
+            value = round(max(40.0, min(450.0, rng.gauss(mean, spread))), 1)
+            moment = day_start + timedelta(hours=hour, minutes=rng.randint(0, 59))
+            events.append((moment, 'reading', (patient['id'], value, is_before_meal)))
+
+        for therapy_id, daily_doses in patient['therapies']:
+            for hour in DOSE_HOURS.get(daily_doses, DOSE_HOURS[4]):
+                if rng.random() < profile['adherence']:
+                    moment = day_start + timedelta(hours=hour, minutes=rng.randint(0, 59))
+                    events.append((moment, 'intake', (patient['id'], therapy_id)))
+
+    events.sort(key=lambda event: event[0])
+    return events
+
+
+class ReplayClock:
+    """Clock of the simulation: every sleep of the scheduler replays the patient events that
+    fall in it (see run_simulation), then moves time to the end of the sleep"""
+
+    def __init__(self, start, on_sleep):
+        self.moment = start
+        self.on_sleep = on_sleep
+
+    def now(self):
+        return self.moment
+
+    def set(self, moment):
+        self.moment = moment
+
+    def sleep(self, seconds):
+        until = self.moment + timedelta(seconds=seconds)
+        self.on_sleep(until)
+        self.moment = until
+
+
+def run_simulation(args):
+    from pony.orm import db_session, select, count
+    from model import (
+        Alert, GlucoseReading, MedicationIntake, Patient, configure_db, initialize_db,
+        add_glucose_reading, record_medication_intake, check_and_clear_compliance_alerts
+    )
+    from model.clock import now, set_clock, reset_clock
+    from model.writer import configure_writer
+    import scheduler
+
+    configure_db(filename=args.db)
+    initialize_db()
+    # One thread drives everything: the scheduler's writes run inline, without the queue's batch window
+    configure_writer(enabled=False)
+
+    rng = random.Random(args.seed)
+
+    with db_session:
+        patients = [
+            {
+                'id': p.id,
+                'profile': PATIENT_PROFILES.get(p.user.username, DEFAULT_PROFILE),
+                'therapies': [(t.id, t.daily_doses) for t in p.therapies if t.is_active]
+            }
+            for p in select(p for p in Patient)
+        ]
+
+    def alert_counts():
+        with db_session:
+            return Counter(dict(select((a.alert_type, count(a)) for a in Alert)[:]))
+
+    def row_counts():
+        with db_session:
+            return {
+                'readings': GlucoseReading.select().count(),
+                'intakes': MedicationIntake.select().count(),
+                'alerts': Alert.select().count()
+            }
+
+    start = now().replace(minute=0, second=0, microsecond=0)
+    end = start + timedelta(days=args.days)
+    events = []
+    for day in range(args.days):
+        events.extend(build_day_events(start + timedelta(days=day), patients, rng))
+
+    periods = []
+    state = {'next_event': 0, 'previous_alerts': alert_counts(), 'last_wake': perf_counter()}
+
+    def period_at(moment):
+        index = (moment - start).days // args.report_every
+        if index == len(periods):
+            periods.append({'first_day': index * args.report_every + 1, 'sweeps': 0, 'sweep_ms': [],
+                            'write_ms': 0.0, 'writes': 0, 'commits': 0})
+        return periods[index]
+
+    def replay(until):
+        """One scheduler sleep: the patient events up to `until`, all in one transaction"""
+        moment = clock.now()
+        period = period_at(moment)
+        # Everything the scheduler did since it last woke up is one sweep
+        period['sweep_ms'].append((perf_counter() - state['last_wake']) * 1000)
+        period['sweeps'] += 1
+
+        t = perf_counter()
+        writes = 0
+        with db_session:
+            while state['next_event'] < len(events) and events[state['next_event']][0] < until:
+                event_time, kind, payload = events[state['next_event']]
+                clock.set(event_time)
+                if kind == 'reading':
+                    add_glucose_reading(*payload)
+                else:
+                    patient_id, therapy_id = payload
+                    record_medication_intake(patient_id, therapy_id, 1.0, None, event_time)
+                    check_and_clear_compliance_alerts(patient_id)
+                state['next_event'] += 1
+                writes += 1
+        period['write_ms'] += (perf_counter() - t) * 1000
+        period['writes'] += writes
+        period['commits'] += 1 if writes else 0
+
+        # Close the report row when this sleep reaches the next one (or the end of the run)
+        if until >= end or (until - start).days // args.report_every != (moment - start).days // args.report_every:
+            current_alerts = alert_counts()
+            period['last_day'] = min((until - start).days, args.days)
+            period['alerts_created'] = dict(current_alerts - state['previous_alerts'])
+            period['rows'] = row_counts()
+            period['db_bytes'] = database_size(args.db)
+            state['previous_alerts'] = current_alerts
+        state['last_wake'] = perf_counter()
+
+    clock = ReplayClock(start, replay)
+    set_clock(clock)
+    compliance_interval = scheduler.COMPLIANCE_CHECK_INTERVAL
+    scheduler.COMPLIANCE_CHECK_INTERVAL = args.sweep_interval
+    wall_start = perf_counter()
+
+    try:
+        # The real scheduler loop, sleeping on the simulated clock
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            scheduler.run_scheduler_until(end)
+    finally:
+        scheduler.COMPLIANCE_CHECK_INTERVAL = compliance_interval
+        reset_clock()
+
+    return {
+        'days': args.days,
+        'patients': len(patients),
+        'sweep_interval_seconds': args.sweep_interval,
+        'wall_seconds': round(perf_counter() - wall_start, 2),
+        'periods': [summarize_period(p) for p in periods]
+    }
+
+
+def summarize_period(period):
+    sweep_ms = sorted(period['sweep_ms'])
+    return {
+        'days': f"{period['first_day']}-{period['last_day']}",
+        'sweeps': period['sweeps'],
+        'sweep_avg_ms': round(sum(sweep_ms) / len(sweep_ms), 2) if sweep_ms else 0.0,
+        'sweep_max_ms': round(sweep_ms[-1], 2) if sweep_ms else 0.0,
+        'writes': period['writes'],
+        'commits': period['commits'],
+        'write_avg_ms': round(period['write_ms'] / period['writes'], 2) if period['writes'] else 0.0,
+        'alerts_created': sum(period['alerts_created'].values()),
+        'alerts_by_type': period['alerts_created'],
+        'rows': period['rows'],
+        'db_kb': round(period['db_bytes'] / 1024, 1)
+    }
+
+
+def print_report(report):
+    print(f"Simulated {report['days']} days, {report['patients']} patients, "
+          f"sweep every {report['sweep_interval_seconds']}s (wall time {report['wall_seconds']}s)")
+    print(f"{'days':>8} {'sweeps':>7} {'sweep avg':>10} {'sweep max':>10} {'writes':>7} "
+          f"{'write avg':>10} {'alerts':>7} {'alert rows':>11} {'readings':>9} {'db KB':>9}")
+    for row in report['periods']:
+        print(f"{row['days']:>8} {row['sweeps']:>7} {row['sweep_avg_ms']:>8.1f}ms {row['sweep_max_ms']:>8.1f}ms "
+              f"{row['writes']:>7} {row['write_avg_ms']:>8.1f}ms {row['alerts_created']:>7} "
+              f"{row['rows']['alerts']:>11} {row['rows']['readings']:>9} {row['db_kb']:>9}")
+
+    totals = Counter()
+    for row in report['periods']:
+        totals.update(row['alerts_by_type'])
+    print("Alerts by type: " + ", ".join(f"{k}={v}" for k, v in totals.most_common()))
+
+
+def main():
+    args = parse_args()
+
+    if not args.db:
+        args.db = os.path.join(tempfile.mkdtemp(prefix='diabetes-sim-'), 'simulation.sqlite')
+
+    report = run_simulation(args)
+    if args.json:
+        print(json.dumps(report, indent=2, default=str))
+    else:
+        print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -93,8 +93,10 @@ def get_patient_details_tab():
         html.Div(id="patient-detail-content")
     ])
 
-def get_patient_detail_content():
-    """Detailed patient information layout"""
+def get_patient_detail_content(patient_info=None, glucose_figure=None, recent_readings=None,
+                               compliance_info=None, risk_factors="", medical_history="", comorbidities="",
+                               glucose_ranges=(), glucose_days=None):
+    """Detailed patient information layout, filled in with the selected patient's data"""
     return html.Div([
         dbc.Row([
             # Patient info card
@@ -102,7 +104,7 @@ def get_patient_detail_content():
                 dbc.Card([
                     dbc.CardHeader("Patient Information"),
                     dbc.CardBody([
-                        html.Div(id="patient-info-display")
+                        html.Div(patient_info, id="patient-info-display")
                     ])
                 ])
             ], width=4),
@@ -110,9 +112,16 @@ def get_patient_detail_content():
             # Glucose trend
             dbc.Col([
                 dbc.Card([
-                    dbc.CardHeader("Glucose Trend (Last 30 Days)"),
+                    dbc.CardHeader("Glucose Trend"),
                     dbc.CardBody([
-                        dcc.Graph(id="doctor-glucose-chart")
+                        # Range in days: longer ranges plot coarser (downsampled) series
+                        dbc.RadioItems(
+                            id="doctor-glucose-range",
+                            options=[{"label": f"{days} days", "value": days} for days in glucose_ranges],
+                            value=glucose_days,
+                            inline=True
+                        ),
+                        dcc.Graph(id="doctor-glucose-chart", figure=glucose_figure or {})
                     ])
                 ])
             ], width=8)
@@ -124,7 +133,7 @@ def get_patient_detail_content():
                 dbc.Card([
                     dbc.CardHeader("Recent Glucose Readings"),
                     dbc.CardBody([
-                        html.Div(id="doctor-recent-readings")
+                        html.Div(recent_readings, id="doctor-recent-readings")
                     ])
                 ])
             ], width=6),
@@ -134,7 +143,7 @@ def get_patient_detail_content():
                 dbc.Card([
                     dbc.CardHeader("Medication Compliance"),
                     dbc.CardBody([
-                        html.Div(id="patient-compliance-info")
+                        html.Div(compliance_info, id="patient-compliance-info")
                     ])
                 ])
             ], width=6)
@@ -152,6 +161,7 @@ def get_patient_detail_content():
                                     dbc.Label("Risk Factors"),
                                     dbc.Textarea(
                                         id="update-risk-factors",
+                                        value=risk_factors,
                                         placeholder="smoking, alcohol, obesity, etc.",
                                         rows=2
                                     )
@@ -160,6 +170,7 @@ def get_patient_detail_content():
                                     dbc.Label("Medical History"),
                                     dbc.Textarea(
                                         id="update-medical-history",
+                                        value=medical_history,
                                         placeholder="previous pathologies",
                                         rows=2
                                     )
@@ -170,6 +181,7 @@ def get_patient_detail_content():
                                     dbc.Label("Comorbidities"),
                                     dbc.Textarea(
                                         id="update-comorbidities",
+                                        value=comorbidities,
                                         placeholder="hypertension, etc.",
                                         rows=2
                                     )
@@ -295,7 +307,14 @@ def get_alerts_monitoring_tab():
         dbc.Row([
             dbc.Col([
                 html.H4("Priority Alerts"),
-                html.Div(id="priority-alerts-list")
+                html.Div(id="priority-alerts-ack-output"),
+                dbc.Button("Mark all as read", id="priority-alerts-ack", color="primary", outline=True,
+                           size="sm", className="mb-2", style={'display': 'none'}),
+                html.Div(id="priority-alerts-list"),
+                dbc.Button("Load more", id="priority-alerts-more", color="secondary", outline=True,
+                           size="sm", style={'display': 'none'}),
+                dcc.Store(id="priority-alerts-cursor"),
+                dcc.Store(id="priority-alerts-visible")
             ], width=6),
             dbc.Col([
                 html.H4("Compliance Monitoring"),
@@ -93,7 +93,19 @@ def get_log_data_tab():
                                 ])
                             ], className="mb-3"),
                             dbc.Button("Log Glucose Reading", id="log-glucose-btn", color="primary")
-                        ])
+                        ]),
+                        html.Hr(),
+                        # Bulk upload of a meter / CGM export (original timestamps are kept)
+                        dbc.Label("Upload readings (CSV: measurement_time, value, is_before_meal, notes)"),
+                        dcc.Upload(
+                            id="glucose-upload",
+                            children=html.Div(["Drag and drop or ", html.A("select a CSV file")]),
+                            accept=".csv,text/csv",
+                            style={
+                                'borderWidth': '1px', 'borderStyle': 'dashed', 'borderRadius': '5px',
+                                'textAlign': 'center', 'padding': '10px'
+                            }
+                        )
                     ])
                 ])
             ], width=6),
@@ -213,7 +225,14 @@ def get_alerts_tab():
     """Content for the alerts tab"""
     return html.Div([
         html.H4("My Alerts & Notifications"),
-        html.Div(id="patient-alerts-list")
+        html.Div(id="patient-alerts-ack-output"),
+        dbc.Button("Mark all as read", id="patient-alerts-ack", color="primary", outline=True,
+                   size="sm", className="mb-2", style={'display': 'none'}),
+        html.Div(id="patient-alerts-list"),
+        dbc.Button("Load more", id="patient-alerts-more", color="secondary", outline=True,
+                   size="sm", style={'display': 'none'}),
+        dcc.Store(id="patient-alerts-cursor"),
+        dcc.Store(id="patient-alerts-visible")
     ])
 
 '''
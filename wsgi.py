@@ -0,0 +1,12 @@
+# wsgi.py
+from config import ProductionConfig
+from mvc_app import create_app
+
+# Built once in the gunicorn master (preload_app) and inherited by every forked worker
+app = create_app(ProductionConfig)
+server = app.server
+
+'''
+    Questo file (wsgi.py) è il punto di ingresso per il server di produzione.
+    Espone il server Flask di Dash (server) da servire con gunicorn (vedi gunicorn.conf.py).
+'''